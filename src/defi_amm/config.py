@@ -1,5 +1,35 @@
+import os
+
 BALANCE_MAX_INCENTIVE = 0.02
 BASE_FEE = 0.003  # 0.3% base fee
 MAX_FEE = 0.01  # 1% maximum fee
 VOLUME_THRESHOLD = 1000000  # $1 million volume threshold
-MAX_IMBALANCE = 0.5  # 50% maximum imbalance factor
\ No newline at end of file
+MAX_IMBALANCE = 0.5  # 50% maximum imbalance factor
+VOLUME_WINDOWS = (60, 3600, 86400)  # Sliding swap volume windows in seconds: 1m, 1h, 24h
+VOLUME_BUCKETS = 60  # Buckets per volume window
+ORACLE_OBSERVATIONS = 1024  # Price observations kept per pool for TWAPs
+
+# Transaction history storage
+HISTORY_BACKEND = os.getenv('HISTORY_BACKEND', 'memory')  # 'memory' or 'sqlite'
+HISTORY_DB_PATH = os.getenv('HISTORY_DB_PATH', 'transaction_history.db')
+HISTORY_MAX_RECORDS_PER_POOL = int(os.getenv('HISTORY_MAX_RECORDS_PER_POOL', 10000))
+HISTORY_PAGE_SIZE = 100
+HISTORY_MAX_PAGE_SIZE = 1000
+
+# Write-ahead log of pool operations; unset WAL_DIR to keep the state in memory only
+WAL_DIR = os.getenv('WAL_DIR')
+WAL_SNAPSHOT_INTERVAL = int(os.getenv('WAL_SNAPSHOT_INTERVAL', 10000))  # Records between snapshots
+WAL_SYNC = os.getenv('WAL_SYNC', '1') != '0'  # fsync on commit
+
+# Memory-mapped pool table for read-only processes; unset POOL_TABLE_PATH to disable
+POOL_TABLE_PATH = os.getenv('POOL_TABLE_PATH')
+POOL_TABLE_CAPACITY = int(os.getenv('POOL_TABLE_CAPACITY', 65536))  # Maximum number of pools
+
+# Candidate paths cached by the swap router, least recently used first out
+ROUTER_PATH_CACHE_SIZE = 4096
+
+# Batch endpoint
+BATCH_MAX_OPERATIONS = 1000
+
+# Root seed of the service's random streams; unset for fresh entropy
+RANDOM_SEED = int(os.environ['RANDOM_SEED']) if os.getenv('RANDOM_SEED') else None
@@ -1,17 +1,33 @@
 #!/usr/bin/env python
 from flask import Flask
 
+from defi_amm.config import (HISTORY_BACKEND, HISTORY_DB_PATH, HISTORY_MAX_RECORDS_PER_POOL, POOL_TABLE_CAPACITY,
+                             POOL_TABLE_PATH, RANDOM_SEED, WAL_DIR, WAL_SNAPSHOT_INTERVAL, WAL_SYNC)
 from defi_amm.models.amm import AMM
 from defi_amm.models.risk_management import RiskManagement
+from defi_amm.storage.history import create_history_store
+from defi_amm.storage.pool_table import MappedPoolTable
+from defi_amm.storage.wal import CREATE_POOL, open_write_ahead_log
+from defi_amm.utils.locks import PoolLockManager
+from defi_amm.utils.rng import create_streams
 
 app = Flask(__name__)
 
+random_streams = create_streams(RANDOM_SEED)
 amm = AMM()
-amm.create_pool('ETH', 'USDC', 5000, 5000)
+write_ahead_log = open_write_ahead_log(WAL_DIR, amm, WAL_SNAPSHOT_INTERVAL, WAL_SYNC)
+if not amm.pools:
+    amm.create_pool('ETH', 'USDC', 5000, 5000)
+    if write_ahead_log is not None:
+        write_ahead_log.wait_durable(write_ahead_log.append(CREATE_POOL, 'ETH', 'USDC', 5000, 5000))
+pool_table = MappedPoolTable.create(POOL_TABLE_PATH, POOL_TABLE_CAPACITY) if POOL_TABLE_PATH else None
+if pool_table is not None:
+    pool_table.attach(amm)
 
-risk_management = RiskManagement(amm)
-transaction_history = {}
+risk_management = RiskManagement(amm, rng=random_streams.risk)
+pool_locks = PoolLockManager()
+transaction_history = create_history_store(HISTORY_BACKEND, HISTORY_DB_PATH, HISTORY_MAX_RECORDS_PER_POOL)
 from defi_amm.routes import *
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    app.run(host='0.0.0.0', port=5000, debug=True, threaded=True)
@@ -1,12 +1,23 @@
-import random
-import time
-from typing import Dict, Tuple
+import math
+import threading
+from collections.abc import MutableMapping
+from functools import partial
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Tuple
 
 from defi_amm.config import BALANCE_MAX_INCENTIVE, VOLUME_THRESHOLD, MAX_IMBALANCE, MAX_FEE
-from defi_amm.models.liquidity_pool import LiquidityPool
+from defi_amm.models.liquidity_pool import LiquidityPool, SwapQuote, SWAP_A_TO_B, SWAP_B_TO_A
+from defi_amm.models.pool_registry import PoolRegistry
+from defi_amm.models.token_registry import TokenRegistry
+from defi_amm.models.volume_tracker import VolumeTracker
 from defi_amm.utils.logging import logger
 
 
+def _escape_symbol(symbol: str) -> str:
+    if '-' in symbol or '\\' in symbol:
+        return symbol.replace('\\', '\\\\').replace('-', '\\-')
+    return symbol
+
+
 class AMMException(ValueError):
     """
     Custom exception for errors related to the Automated Market Maker (AMM) operations.
@@ -29,6 +40,131 @@ class AMMException(ValueError):
         logger.critical(f"AMMException: {message}")
 
 
+class PoolState(NamedTuple):
+    """
+    Immutable copy of the state of one pool, as captured by `AMM.snapshot`.
+
+    Attributes:
+        token_a (str): The symbol of the pool's token A, the smaller symbol of the pair.
+        token_b (str): The symbol of the pool's token B.
+        token_a_reserve (float): The reserve of token A.
+        token_b_reserve (float): The reserve of token B.
+        k (float): The constant product of the reserves.
+        fee (float): The swap fee as a decimal fraction.
+        total_fees_a (float): The total fees collected in token A.
+        total_fees_b (float): The total fees collected in token B.
+        total_lp_tokens (float): The total amount of LP tokens minted.
+    """
+    token_a: str
+    token_b: str
+    token_a_reserve: float
+    token_b_reserve: float
+    k: float
+    fee: float
+    total_fees_a: float
+    total_fees_b: float
+    total_lp_tokens: float
+
+
+class AMMSnapshot(NamedTuple):
+    """
+    Immutable copy of the state of every pool of an AMM, returned by `AMM.snapshot`.
+
+    Snapshots share the `PoolState` of every pool that did not change between them, and forks made
+    from a snapshot read it without copying, so keeping many of them is cheap.
+
+    Attributes:
+        pools (Mapping[str, PoolState]): Pool keys mapped to pool states; shared between snapshots and
+            forks, so it must not be modified.
+        total_value_locked (Dict[str, float]): The TVL per token at the time of the snapshot.
+        fees_earned (Dict[str, float]): The fees earned per token at the time of the snapshot.
+    """
+    pools: Mapping[str, PoolState]
+    total_value_locked: Dict[str, float]
+    fees_earned: Dict[str, float]
+
+    @classmethod
+    def from_pool_states(cls, states: Iterable[PoolState]) -> 'AMMSnapshot':
+        """
+        Builds a snapshot from pool states, summing the TVL and fee totals from them.
+
+        Args:
+            states (Iterable[PoolState]): The state of every pool.
+
+        Returns:
+            AMMSnapshot: The snapshot.
+        """
+        pools = {}
+        tvl: Dict[str, float] = {}
+        fees: Dict[str, float] = {}
+        for state in states:
+            pools[AMM._get_pool_key(state.token_a, state.token_b)] = state
+            tvl[state.token_a] = tvl.get(state.token_a, 0) + state.token_a_reserve
+            tvl[state.token_b] = tvl.get(state.token_b, 0) + state.token_b_reserve
+            fees[state.token_a] = fees.get(state.token_a, 0) + state.total_fees_a
+            fees[state.token_b] = fees.get(state.token_b, 0) + state.total_fees_b
+        return cls(pools, tvl, fees)
+
+
+class _ForkedPools(MutableMapping):
+    """
+    Copy-on-write pool table of a forked AMM.
+
+    Pools are read from the shared, immutable `PoolState` mapping of a snapshot and turned into
+    `LiquidityPool` objects the first time they are looked up, since any looked-up pool may be
+    mutated. Forking therefore costs O(1), and a fork only ever copies the pools it touches.
+    """
+
+    def __init__(self, states: Mapping[str, PoolState], materialize: Callable[[str, PoolState], LiquidityPool]):
+        self.states = states
+        self.materialized: Dict[str, LiquidityPool] = {}
+        self._materialize = materialize
+        self._created = 0
+
+    def __getitem__(self, pool_key: str) -> LiquidityPool:
+        pool = self.materialized.get(pool_key)
+        if pool is None:
+            pool = self.materialized[pool_key] = self._materialize(pool_key, self.states[pool_key])
+        return pool
+
+    def get(self, pool_key: str, default: Optional[LiquidityPool] = None) -> Optional[LiquidityPool]:
+        pool = self.materialized.get(pool_key)
+        if pool is None:
+            return self[pool_key] if pool_key in self.states else default
+        return pool
+
+    def __setitem__(self, pool_key: str, pool: LiquidityPool) -> None:
+        if pool_key not in self:
+            self._created += 1
+        self.materialized[pool_key] = pool
+
+    def __delitem__(self, pool_key: str) -> None:
+        raise TypeError("Pools of a forked AMM cannot be deleted; restore a snapshot instead")
+
+    def __contains__(self, pool_key: object) -> bool:
+        return pool_key in self.materialized or pool_key in self.states
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.states
+        yield from (pool_key for pool_key in self.materialized if pool_key not in self.states)
+
+    def __len__(self) -> int:
+        return len(self.states) + self._created
+
+    def rebase(self, states: Mapping[str, PoolState]) -> List[Tuple[str, LiquidityPool]]:
+        """
+        Switches to another snapshot's states, dropping materialized pools it does not contain.
+
+        Returns the dropped pools with their keys.
+        """
+        self.states = states
+        dropped = [(pool_key, pool) for pool_key, pool in self.materialized.items() if pool_key not in states]
+        for pool_key, _ in dropped:
+            del self.materialized[pool_key]
+        self._created = 0
+        return dropped
+
+
 class AMM:
     """
     Represents an Automated Market Maker (AMM) system that manages multiple liquidity pools.
@@ -38,60 +174,79 @@ class AMM:
 
     Attributes:
         pools (Dict[str, LiquidityPool]): A dictionary mapping pool keys to LiquidityPool instances.
+        registry (Optional[PoolRegistry]): Columnar storage backing the pools, or None when each
+            pool keeps its own state.
+        tokens (TokenRegistry): Integer IDs of the token symbols of the pools, shared with `registry`
+            when the AMM is columnar.
+        pool_listeners (List[Callable[[str, str, str], None]]): Callbacks invoked with
+            `(pool_key, token_a, token_b)` after a pool is created, tokens in canonical order.
+        pool_validators (List[Callable[[str, str], None]]): Callbacks invoked with `(token_a, token_b)`,
+            tokens in canonical order, before `create_pool` creates a pool; an exception raised by
+            one of them rejects the pool.
+        pool_removed_listeners (List[Callable[[str, str, str], None]]): Callbacks invoked with
+            `(pool_key, token_a, token_b)` after `restore` drops a pool created after the snapshot.
+        check_consistency (bool): If True, every TVL or fee query is verified against a full scan.
+        volume_tracker (VolumeTracker): Executed swap volume per pool over sliding windows, in units
+            of each pool's token A.
     """
 
-    def __init__(self):
+    def __init__(self, columnar: bool = False, check_consistency: bool = False):
         """
         Initializes the AMM with an empty dictionary of liquidity pools.
+
+        Args:
+            columnar (bool): If True, pool state is stored in a `PoolRegistry` and the entries of
+                `pools` are views over it, which turns aggregates into vectorized reductions.
+            check_consistency (bool): If True, the running TVL and fee totals are checked against a
+                full scan of the pools on every read (meant for tests).
         """
         self.pools: Dict[str, LiquidityPool] = {}
-
-        self.last_trade_time = {}
-        self.last_trade_volume = {}
+        self.registry: Optional[PoolRegistry] = PoolRegistry() if columnar else None
+        self.tokens = self.registry.tokens if self.registry is not None else TokenRegistry()
+        self.pool_listeners: List[Callable[[str, str, str], None]] = []
+        self.pool_validators: List[Callable[[str, str], None]] = []
+        self.pool_removed_listeners: List[Callable[[str, str, str], None]] = []
+        self.check_consistency = check_consistency
+        self.volume_tracker = VolumeTracker()
+        self._tvl: Dict[str, float] = {}
+        self._fees: Dict[str, float] = {}
+        self._pool_tokens: Dict[str, Tuple[str, str]] = {}
+        # (ID of the token sold, ID of the token bought) -> (pool key, whether the token sold is token A)
+        self._pairs: Dict[Tuple[int, int], Tuple[str, bool]] = {}
+        # Token -> {other token of the pool: pool key}; None until first use in a forked AMM
+        self._token_pools: Optional[Dict[str, Dict[str, str]]] = {}
+        self._snapshot: Optional[AMMSnapshot] = None
+        # Guards the running totals and the snapshot cache, which pools under different locks share
+        self._totals_lock = threading.Lock()
+        self._generation = 0
+
+    def __getstate__(self) -> dict:
+        # Locks cannot be pickled; a copy starts with a lock of its own
+        state = self.__dict__.copy()
+        del state["_totals_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._totals_lock = threading.Lock()
 
     def calculate_recent_volume(self, token_a: str, token_b: str, time_window: int) -> float:
         """
-        Simulates the calculation of recent trading volume for a given token pair.
+        Returns the volume swapped in a token pair's pool during the last `time_window` seconds.
 
         Args:
             token_a (str): The symbol for token A.
             token_b (str): The symbol for token B.
-            time_window (int): The time window in seconds to consider for recent volume.
+            time_window (int): The window in seconds, one of the `volume_tracker` windows.
 
         Returns:
-            float: The simulated trading volume in the specified time window.
-        """
-        pool_key = self._get_pool_key(token_a, token_b)
-        current_time = time.time()
-
-        # If this is the first trade for this pool, initialize it
-        if pool_key not in self.last_trade_time:
-            self.last_trade_time[pool_key] = current_time
-            self.last_trade_volume[pool_key] = 0
-
-        # Calculate time elapsed since last trade
-        time_elapsed = current_time - self.last_trade_time[pool_key]
-
-        # If the elapsed time is greater than our window, reset the volume
-        if time_elapsed > time_window:
-            self.last_trade_volume[pool_key] = 0
+            float: The executed swap volume in the window, in units of the pool's token A.
 
-        # Generate a random volume for this trade
-        # We'll assume the volume is between 1000 and 100000 units
-        this_trade_volume = random.uniform(1000, 100000)
-
-        # Add this volume to our running total
-        self.last_trade_volume[pool_key] += this_trade_volume
-
-        # Update the last trade time
-        self.last_trade_time[pool_key] = current_time
-
-        # If the elapsed time is less than our window, scale the volume
-        if time_elapsed < time_window:
-            scaling_factor = time_window / time_elapsed
-            return self.last_trade_volume[pool_key] * scaling_factor
-        else:
-            return self.last_trade_volume[pool_key]
+        Raises:
+            ValueError: If the window is not tracked.
+        """
+        # A pair without a pool has no volume counters, so its volume is 0
+        return self.volume_tracker.volume(self.find_pool_key(token_a, token_b), time_window)
 
     def create_pool(self, token_a: str, token_b: str, initial_a: float, initial_b: float) -> None:
         """
@@ -105,32 +260,383 @@ class AMM:
 
         Raises:
             AMMException: If a pool for the given token pair already exists.
+            Exception: Whatever a `pool_validators` callback raises to reject the pool.
         """
-        pool_key = self._get_pool_key(token_a, token_b)
-        if pool_key in self.pools:
+        if self._lookup_pair(token_a, token_b) is not None:
             raise AMMException("Pool already exists")
-        self.pools[pool_key] = LiquidityPool(initial_a, initial_b)
+        pool_key = self._get_pool_key(token_a, token_b)
+        canonical_a, canonical_b = min(token_a, token_b), max(token_a, token_b)
+        for validate in self.pool_validators:
+            validate(canonical_a, canonical_b)
+        if self.registry is not None:
+            index = self.registry.add_pool(canonical_a, canonical_b, initial_a, initial_b)
+            self.pools[pool_key] = self.registry.create_view(index)
+        else:
+            self.pools[pool_key] = LiquidityPool(initial_a, initial_b)
+
+        pool = self.pools[pool_key]
+        with self._totals_lock:
+            self._tvl[canonical_a] = self._tvl.get(canonical_a, 0) + pool.token_a_reserve
+            self._tvl[canonical_b] = self._tvl.get(canonical_b, 0) + pool.token_b_reserve
+            self._fees.setdefault(canonical_a, 0)
+            self._fees.setdefault(canonical_b, 0)
+        self._bind_pool(pool_key, pool, canonical_a, canonical_b)
+        if self._token_pools is not None:
+            self._link_pool(self._token_pools, pool_key, canonical_a, canonical_b)
+
+        for listener in self.pool_listeners:
+            listener(pool_key, canonical_a, canonical_b)
+
+    def _bind_pool(self, pool_key: str, pool: LiquidityPool, token_a: str, token_b: str) -> None:
+        """
+        Registers the canonical tokens of a pool and routes its changes into the running totals.
+        """
+        self._pool_tokens[pool_key] = (token_a, token_b)
+        self._index_pair(pool_key, token_a, token_b)
+        self._invalidate_snapshot()
+        pool.listener = partial(self._accumulate, token_a, token_b)
 
-    def get_pool(self, token_a: str, token_b: str) -> LiquidityPool:
+    def _invalidate_snapshot(self) -> None:
+        with self._totals_lock:
+            self._snapshot = None
+            self._generation += 1
+
+    def _unbind_pool(self, pool_key: str, pool: LiquidityPool) -> Tuple[str, str]:
         """
-        Retrieves the liquidity pool for the specified token pair.
+        Detaches a dropped pool from the running totals and removes it from the pair index.
+        """
+        pool.listener = None
+        token_a, token_b = self._pool_tokens.pop(pool_key)
+        id_a, id_b = self.tokens.find(token_a), self.tokens.find(token_b)
+        if self._pairs.get((id_a, id_b), (None,))[0] == pool_key:
+            del self._pairs[id_a, id_b], self._pairs[id_b, id_a]
+        return token_a, token_b
+
+    def _index_pair(self, pool_key: str, token_a: str, token_b: str) -> None:
+        """
+        Records the pool key of a token pair under both orders of its token IDs.
+        """
+        id_a, id_b = self.tokens.register(token_a), self.tokens.register(token_b)
+        self._pairs[id_a, id_b] = (pool_key, True)
+        self._pairs[id_b, id_a] = (pool_key, False)
+
+    def _lookup_pair(self, token_from: str, token_to: str) -> Optional[Tuple[str, bool]]:
+        """
+        Returns the pool key of a token pair and whether `token_from` is its token A, or None.
+
+        Pairs are indexed when a pool is bound; a pool a fork has not looked up yet is indexed on
+        its first lookup here.
+        """
+        pair = self._pairs.get((self.tokens.find(token_from), self.tokens.find(token_to)))
+        if pair is None and isinstance(self.pools, _ForkedPools):
+            pool_key = self._get_pool_key(token_from, token_to)
+            if pool_key in self.pools.states:
+                self._index_pair(pool_key, *self.get_pool_tokens(pool_key))
+                pair = self._pairs.get((self.tokens.find(token_from), self.tokens.find(token_to)))
+        return pair
+
+    def find_pool_key(self, token_a: str, token_b: str) -> Optional[str]:
+        """
+        Returns the key of a token pair's pool, looked up by token IDs.
 
         Args:
             token_a (str): The symbol for token A.
             token_b (str): The symbol for token B.
 
         Returns:
-            LiquidityPool: The liquidity pool instance for the specified token pair.
+            Optional[str]: The pool key, or None if the pair has no pool.
+        """
+        pair = self._lookup_pair(token_a, token_b)
+        return None if pair is None else pair[0]
+
+    def _find_pool(self, token_from: str, token_to: str) -> Tuple[str, LiquidityPool, bool]:
+        """
+        Looks up the pool of a token pair by token IDs, without building its key.
+
+        Args:
+            token_from (str): The symbol of the token being sold.
+            token_to (str): The symbol of the token being bought.
+
+        Returns:
+            Tuple[str, LiquidityPool, bool]: The pool key, the pool, and whether `token_from` is the
+            pool's token A.
 
         Raises:
             AMMException: If the pool for the given token pair does not exist.
         """
-        pool_key = self._get_pool_key(token_a, token_b)
+        pair = self._lookup_pair(token_from, token_to)
+        if pair is None:
+            raise AMMException("Pool not found")
+        pool_key, from_is_a = pair
         pool = self.pools.get(pool_key)
-        if not pool:
+        if pool is None:
             raise AMMException("Pool not found")
+        return pool_key, pool, from_is_a
+
+    def get_pool_tokens(self, pool_key: str) -> Tuple[str, str]:
+        """
+        Returns the symbols of a pool's tokens in canonical order, without parsing its key.
+
+        Args:
+            pool_key (str): The key of the pool.
+
+        Returns:
+            Tuple[str, str]: The symbols of the pool's token A and token B.
+
+        Raises:
+            AMMException: If the pool does not exist.
+        """
+        tokens = self._pool_tokens.get(pool_key)
+        if tokens is None:
+            state = self.pools.states.get(pool_key) if isinstance(self.pools, _ForkedPools) else None
+            if state is None:
+                raise AMMException("Pool not found")
+            tokens = (state.token_a, state.token_b)
+        return tokens
+
+    @staticmethod
+    def _link_pool(token_pools: Dict[str, Dict[str, str]], pool_key: str, token_a: str, token_b: str) -> None:
+        token_pools.setdefault(token_a, {})[token_b] = pool_key
+        token_pools.setdefault(token_b, {})[token_a] = pool_key
+
+    def _get_token_pools(self, token: str) -> Dict[str, str]:
+        """
+        Returns the pools holding a token, keyed by the other token of each pool.
+
+        The index is maintained by `create_pool` and `restore`; a forked AMM builds it from its
+        snapshot on first use.
+        """
+        if self._token_pools is None:
+            self._token_pools = {}
+            for pool_key in self.pools:
+                self._link_pool(self._token_pools, pool_key, *self.get_pool_tokens(pool_key))
+        return self._token_pools.get(token, {})
+
+    def get_token_pools(self, token: str) -> List[str]:
+        """
+        Lists the pools that hold a token, without scanning every pool.
+
+        Args:
+            token (str): The token symbol.
+
+        Returns:
+            List[str]: The keys of the pools containing the token, empty for an unknown token.
+        """
+        return list(self._get_token_pools(token).values())
+
+    def get_token_exposure(self, token: str) -> Dict[str, float]:
+        """
+        Returns the amount of a token held by each pool that contains it.
+
+        Only the pools of the token are read, through the token-to-pools index.
+
+        Args:
+            token (str): The token symbol.
+
+        Returns:
+            Dict[str, float]: The reserve of the token in each of its pools, keyed by pool key.
+        """
+        exposure = {}
+        for other, pool_key in self._get_token_pools(token).items():
+            pool = self.pools[pool_key]
+            # The smaller symbol of a pair is the pool's token A
+            exposure[pool_key] = pool.token_a_reserve if token < other else pool.token_b_reserve
+        return exposure
+
+    def get_token_value_locked(self, token: str) -> float:
+        """
+        Returns the total amount of a token locked across all pools.
+
+        This reads the running TVL total of the token; with `check_consistency` it is verified
+        against the token's pools only.
+
+        Args:
+            token (str): The token symbol.
+
+        Returns:
+            float: The TVL of the token, 0 for an unknown token.
+
+        Raises:
+            AMMException: If `check_consistency` is enabled and the running total disagrees with the pools.
+        """
+        tvl = self._tvl.get(token, 0)
+        if self.check_consistency:
+            scanned = sum(self.get_token_exposure(token).values())
+            if not math.isclose(tvl, scanned, rel_tol=1e-9, abs_tol=1e-9):
+                raise AMMException(f"TVL accumulator out of sync for {token}: {tvl} != {scanned}")
+        return tvl
+
+    def _materialize_pool(self, pool_key: str, state: PoolState) -> LiquidityPool:
+        """
+        Builds a pool owned by this AMM from a captured state.
+
+        The pool gets its own price oracle, which starts accumulating at the time it is built.
+        """
+        pool = LiquidityPool(state.token_a_reserve, state.token_b_reserve, state.fee)
+        pool.k = state.k
+        pool.total_fees_a = state.total_fees_a
+        pool.total_fees_b = state.total_fees_b
+        pool.total_lp_tokens = state.total_lp_tokens
+        self._bind_pool(pool_key, pool, state.token_a, state.token_b)
         return pool
 
+    def _capture_pool(self, pool_key: str, pool: LiquidityPool) -> PoolState:
+        """
+        Copies the state of a pool, retrying like `LiquidityPool.get_pool_snapshot` if it overlaps a mutation.
+        """
+        token_a, token_b = self._pool_tokens[pool_key]
+        while True:
+            version = pool.version
+            if version % 2 == 0:
+                state = PoolState(token_a, token_b, pool.token_a_reserve, pool.token_b_reserve, pool.k, pool.fee,
+                                  pool.total_fees_a, pool.total_fees_b, pool.total_lp_tokens)
+                if pool.version == version:
+                    return state
+
+    def snapshot(self) -> AMMSnapshot:
+        """
+        Captures the state of every pool and the running totals.
+
+        The snapshot is cached until a pool changes, so repeated snapshots and forks of an unchanged
+        AMM are O(1). A forked AMM only captures the pools it has looked up and shares the states of
+        the others with the snapshot it was forked from. Fees must be changed through `adjust_fee`
+        (or together with the reserves) to invalidate the cache.
+
+        Returns:
+            AMMSnapshot: An immutable copy of the AMM state, to pass to `restore` or `from_snapshot`.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+        # A change made while the pools are captured leaves the result uncached
+        generation = self._generation
+        if isinstance(self.pools, _ForkedPools):
+            states = self.pools.states
+            if self.pools.materialized:
+                states = dict(states)
+                for pool_key, pool in self.pools.materialized.items():
+                    states[pool_key] = self._capture_pool(pool_key, pool)
+        else:
+            states = {pool_key: self._capture_pool(pool_key, pool) for pool_key, pool in self.pools.items()}
+        with self._totals_lock:
+            snapshot = AMMSnapshot(states, dict(self._tvl), dict(self._fees))
+            if self._generation == generation:
+                self._snapshot = snapshot
+        return snapshot
+
+    def restore(self, snapshot: AMMSnapshot) -> None:
+        """
+        Resets every pool to the state captured in a snapshot.
+
+        Pools keep their identity and only those whose state differs are written, through
+        `LiquidityPool.restore_state` so their listeners and oracles see the change. Pools created
+        after the snapshot are dropped and announced to `pool_removed_listeners`, and pools missing
+        from the AMM are created again and announced to `pool_listeners`. Swap volumes are not part of the snapshot and are kept.
+
+        Args:
+            snapshot (AMMSnapshot): A snapshot of this AMM or of one it was forked from.
+
+        Raises:
+            AMMException: If the AMM is columnar and the snapshot does not hold exactly its pools.
+        """
+        removed = []
+        if isinstance(self.pools, _ForkedPools):
+            if self.pool_removed_listeners:
+                removed = [(pool_key, *self.get_pool_tokens(pool_key))
+                           for pool_key in self.pools if pool_key not in snapshot.pools]
+            for pool_key, pool in self.pools.rebase(snapshot.pools):
+                self._unbind_pool(pool_key, pool)
+            pools = self.pools.materialized
+            self._token_pools = None
+        else:
+            if self.registry is not None and self.pools.keys() != snapshot.pools.keys():
+                raise AMMException("Cannot add or drop pools of a columnar AMM when restoring a snapshot")
+            for pool_key in [pool_key for pool_key in self.pools if pool_key not in snapshot.pools]:
+                token_a, token_b = self._unbind_pool(pool_key, self.pools.pop(pool_key))
+                del self._token_pools[token_a][token_b], self._token_pools[token_b][token_a]
+                removed.append((pool_key, token_a, token_b))
+            pools = self.pools
+
+        for pool_key, pool in pools.items():
+            state = snapshot.pools[pool_key]
+            if self._capture_pool(pool_key, pool) != state:
+                pool.restore_state(state._asdict())
+                pool.fee = state.fee
+
+        created = []
+        if not isinstance(self.pools, _ForkedPools):
+            for pool_key, state in snapshot.pools.items():
+                if pool_key not in self.pools:
+                    self.pools[pool_key] = self._materialize_pool(pool_key, state)
+                    self._link_pool(self._token_pools, pool_key, state.token_a, state.token_b)
+                    created.append((pool_key, state.token_a, state.token_b))
+
+        with self._totals_lock:
+            self._tvl = dict(snapshot.total_value_locked)
+            self._fees = dict(snapshot.fees_earned)
+            self._snapshot = snapshot
+            self._generation += 1
+        for pool_key, token_a, token_b in removed:
+            for listener in self.pool_removed_listeners:
+                listener(pool_key, token_a, token_b)
+        for pool_key, token_a, token_b in created:
+            for listener in self.pool_listeners:
+                listener(pool_key, token_a, token_b)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: AMMSnapshot) -> 'AMM':
+        """
+        Creates an AMM whose pools are copied from a snapshot on first use.
+
+        The new AMM shares the snapshot's pool states and turns a state into its own `LiquidityPool`
+        only when the pool is looked up, so creating it is O(1) in the number of pools. Pools get
+        fresh price oracles and volume trackers, starting at the time they are first used.
+
+        Args:
+            snapshot (AMMSnapshot): The state to start from.
+
+        Returns:
+            AMM: An independent AMM; changes to it never affect the snapshot or its source.
+        """
+        amm = cls()
+        amm.pools = _ForkedPools(snapshot.pools, amm._materialize_pool)
+        amm._token_pools = None
+        amm._tvl = dict(snapshot.total_value_locked)
+        amm._fees = dict(snapshot.fees_earned)
+        amm._snapshot = snapshot
+        return amm
+
+    def fork(self) -> 'AMM':
+        """
+        Creates an independent copy-on-write copy of the AMM for what-if analysis.
+
+        Equivalent to `AMM.from_snapshot(self.snapshot())`: pools are shared until the fork looks
+        them up, so forking an unchanged AMM repeatedly is O(1) and each fork only copies the pools
+        it touches. The fork has no `pool_listeners` and keeps `check_consistency`.
+
+        Returns:
+            AMM: The fork.
+        """
+        fork = AMM.from_snapshot(self.snapshot())
+        fork.check_consistency = self.check_consistency
+        return fork
+
+    def get_pool(self, token_a: str, token_b: str) -> LiquidityPool:
+        """
+        Retrieves the liquidity pool for the specified token pair.
+
+        Args:
+            token_a (str): The symbol for token A.
+            token_b (str): The symbol for token B.
+
+        Returns:
+            LiquidityPool: The liquidity pool instance for the specified token pair.
+
+        Raises:
+            AMMException: If the pool for the given token pair does not exist.
+        """
+        return self._find_pool(token_a, token_b)[1]
+
     def add_liquidity(self, token_a: str, token_b: str, amount_a: float, amount_b: float) -> float:
         """
         Adds liquidity to the specified token pair's pool.
@@ -172,6 +678,8 @@ class AMM:
         """
         Swaps a specified amount of one token for another within a pool.
 
+        The executed volume is recorded in `volume_tracker`, in units of the pool's token A.
+
         Args:
             token_from (str): The symbol of the token being swapped out.
             token_to (str): The symbol of the token being swapped in.
@@ -183,11 +691,32 @@ class AMM:
         Raises:
             AMMException: If the pool for the given token pair does not exist.
         """
-        pool = self.get_pool(token_from, token_to)
-        if token_from < token_to:
-            return pool.swap_a_to_b(amount)
+        pool_key, pool, from_is_a = self._find_pool(token_from, token_to)
+        if from_is_a:
+            amount_out = pool.swap_a_to_b(amount)
+            self.volume_tracker.record(pool_key, amount)
         else:
-            return pool.swap_b_to_a(amount)
+            amount_out = pool.swap_b_to_a(amount)
+            self.volume_tracker.record(pool_key, amount_out)
+        return amount_out
+
+    def quote(self, token_from: str, token_to: str, amounts) -> SwapQuote:
+        """
+        Quotes what `swap` would return for each of the given amounts, without modifying the pool.
+
+        Args:
+            token_from (str): The symbol of the token being sold.
+            token_to (str): The symbol of the token being bought.
+            amounts (array-like): The amounts of `token_from` to quote.
+
+        Returns:
+            SwapQuote: Outputs in `token_to`, effective prices and price impacts for each amount.
+
+        Raises:
+            AMMException: If the pool for the given token pair does not exist.
+        """
+        _, pool, from_is_a = self._find_pool(token_from, token_to)
+        return pool.quote(amounts, SWAP_A_TO_B if from_is_a else SWAP_B_TO_A)
 
     def get_exchange_rate(self, token_a: str, token_b: str) -> float:
         """
@@ -223,6 +752,45 @@ class AMM:
         pool = self.get_pool(token_a, token_b)
         return pool.get_pool_state()
 
+    def get_pool_snapshot(self, token_a: str, token_b: str) -> Dict[str, float]:
+        """
+        Retrieves a consistent copy of a pool's state without locking, safe to call while other
+        threads are mutating the pool.
+
+        Args:
+            token_a (str): The symbol for token A.
+            token_b (str): The symbol for token B.
+
+        Returns:
+            Dict[str, float]: A dictionary containing the current reserves, fees, and total LP tokens.
+
+        Raises:
+            AMMException: If the pool for the given token pair does not exist.
+        """
+        pool = self.get_pool(token_a, token_b)
+        return pool.get_pool_snapshot()
+
+    def get_twap(self, token_a: str, token_b: str, window: float) -> float:
+        """
+        Retrieves the time-weighted average price of `token_a` in units of `token_b` over the last
+        `window` seconds, from the pool's price accumulators.
+
+        Args:
+            token_a (str): The symbol of the token being priced.
+            token_b (str): The symbol of the token the price is expressed in.
+            window (float): The averaging window in seconds.
+
+        Returns:
+            float: The TWAP of `token_a` in `token_b`.
+
+        Raises:
+            AMMException: If the pool for the given token pair does not exist.
+            PriceOracleException: If the window is not positive or older than the pool's observations.
+        """
+        _, pool, a_is_a = self._find_pool(token_a, token_b)
+        price_a, price_b = pool.get_twap(window)
+        return price_a if a_is_a else price_b
+
     def calculate_impermanent_loss(self, token_a: str, token_b: str, price_ratio_change: float) -> float:
         """
         Calculates the impermanent loss for a specified token pair's pool based on a change
@@ -247,6 +815,9 @@ class AMM:
         """
         Generates a unique key for identifying a pool based on the token pair.
 
+        The symbols are joined by a dash; backslashes and dashes inside them are escaped with a
+        backslash, so that pairs such as ('DAI', 'X-USDC') and ('DAI-X', 'USDC') get distinct keys.
+
         Args:
             token_a (str): The symbol for token A.
             token_b (str): The symbol for token B.
@@ -254,38 +825,115 @@ class AMM:
         Returns:
             str: A string key that uniquely identifies the pool for the token pair.
         """
-        return f"{min(token_a, token_b)}-{max(token_a, token_b)}"
+        return f"{_escape_symbol(min(token_a, token_b))}-{_escape_symbol(max(token_a, token_b))}"
+
+    def _accumulate(self, token_a: str, token_b: str, delta_reserve_a: float, delta_reserve_b: float,
+                    delta_fees_a: float, delta_fees_b: float) -> None:
+        """
+        Pool listener that folds a change of reserves and fees into the per-token running totals.
+
+        Args:
+            token_a (str): The symbol of the pool's token A.
+            token_b (str): The symbol of the pool's token B.
+            delta_reserve_a (float): The change of the token A reserve.
+            delta_reserve_b (float): The change of the token B reserve.
+            delta_fees_a (float): The change of the fees collected in token A.
+            delta_fees_b (float): The change of the fees collected in token B.
+        """
+        with self._totals_lock:
+            self._snapshot = None
+            self._generation += 1
+            self._tvl[token_a] += delta_reserve_a
+            self._tvl[token_b] += delta_reserve_b
+            if delta_fees_a:
+                self._fees[token_a] += delta_fees_a
+            if delta_fees_b:
+                self._fees[token_b] += delta_fees_b
 
     def get_total_value_locked(self) -> Dict[str, float]:
         """
-        Calculates the total value locked (TVL) in the AMM across all pools.
+        Returns the total value locked (TVL) in the AMM across all pools.
+
+        The totals are maintained incrementally by the pools as their reserves change, so this is a
+        read of the running totals rather than a scan of every pool.
 
         Returns:
             Dict[str, float]: A dictionary where the keys are token symbols and the values
             are the total amounts of those tokens locked in the AMM's pools.
+
+        Raises:
+            AMMException: If `check_consistency` is enabled and the running totals disagree with a full scan.
         """
-        tvl = {}
-        for pool_key, pool in self.pools.items():
-            token_a, token_b = pool_key.split('-')
-            tvl[token_a] = tvl.get(token_a, 0) + pool.token_a_reserve
-            tvl[token_b] = tvl.get(token_b, 0) + pool.token_b_reserve
-        return tvl
+        if self.check_consistency:
+            self.verify_accumulators()
+        with self._totals_lock:
+            return dict(self._tvl)
 
     def calculate_fees_earned(self) -> Dict[str, float]:
         """
-        Calculates the total fees earned across all pools in the AMM.
+        Returns the total fees earned across all pools in the AMM.
+
+        The totals are maintained incrementally by the pools as fees are collected, so this is a
+        read of the running totals rather than a scan of every pool.
 
         Returns:
             Dict[str, float]: A dictionary where the keys are token symbols and the values
             are the total fees earned in those tokens across all of the AMM's pools.
+
+        Raises:
+            AMMException: If `check_consistency` is enabled and the running totals disagree with a full scan.
         """
+        if self.check_consistency:
+            self.verify_accumulators()
+        with self._totals_lock:
+            return dict(self._fees)
+
+    def _scan_total_value_locked(self) -> Dict[str, float]:
+        """
+        Recomputes the TVL per token from the state of every pool.
+        """
+        if self.registry is not None:
+            return self.registry.total_value_locked()
+        tvl = {}
+        for pool_key, pool in self.pools.items():
+            token_a, token_b = self.get_pool_tokens(pool_key)
+            tvl[token_a] = tvl.get(token_a, 0) + pool.token_a_reserve
+            tvl[token_b] = tvl.get(token_b, 0) + pool.token_b_reserve
+        return tvl
+
+    def _scan_fees_earned(self) -> Dict[str, float]:
+        """
+        Recomputes the fees earned per token from the state of every pool.
+        """
+        if self.registry is not None:
+            return self.registry.fees_earned()
         fees = {}
         for pool_key, pool in self.pools.items():
-            token_a, token_b = pool_key.split('-')
+            token_a, token_b = self.get_pool_tokens(pool_key)
             fees[token_a] = fees.get(token_a, 0) + pool.total_fees_a
             fees[token_b] = fees.get(token_b, 0) + pool.total_fees_b
         return fees
 
+    def verify_accumulators(self, rel_tol: float = 1e-9, abs_tol: float = 1e-9) -> None:
+        """
+        Checks the running TVL and fee totals against a full scan of the pools.
+
+        Args:
+            rel_tol (float): The relative tolerance allowed for floating-point drift (default is 1e-9).
+            abs_tol (float): The absolute tolerance allowed for floating-point drift (default is 1e-9).
+
+        Raises:
+            AMMException: If any total disagrees with the scan.
+        """
+        with self._totals_lock:
+            tvl, fees = dict(self._tvl), dict(self._fees)
+        for name, running, scanned in (("TVL", tvl, self._scan_total_value_locked()),
+                                       ("Fees", fees, self._scan_fees_earned())):
+            if running.keys() != scanned.keys() or not all(
+                    math.isclose(running[token], scanned[token], rel_tol=rel_tol, abs_tol=abs_tol)
+                    for token in scanned):
+                raise AMMException(f"{name} accumulator out of sync: {running} != {scanned}")
+
     def calculate_rebalancing_incentive(self, token_a: str, token_b: str, amount_a: float, amount_b: float) -> float:
         """
         :param token_a: The symbol or identifier of the first token in the pool.
@@ -296,9 +944,9 @@ class AMM:
 
         This method calculates the rebalancing incentive for adding liquidity to a pool. It takes in the symbols or identifiers of the two tokens in the pool, as well as the amounts of token A and token B to be added. It returns a float value representing the bonus incentive for adding liquidity.
 
-        The method first obtains the pool object using the `get_pool` method, passing in the token symbols. It then retrieves the current state of the pool using the `get_pool_state` method.
+        The method first obtains the pool object using the `get_pool` method, passing in the token symbols. It then retrieves the current reserves of the pool using the `get_reserves` method.
 
-        The current ratio of token A reserve to token B reserve is calculated by dividing `state['token_a_reserve']` by `state['token_b_reserve']`. Similarly, the new ratio after adding the specified amounts of token A and token B is calculated.
+        The current ratio of token A reserve to token B reserve is calculated by dividing the token A reserve by the token B reserve. Similarly, the new ratio after adding the specified amounts of token A and token B is calculated.
 
         The method then calculates the difference between the current ratio and the perfect balance ratio of 1, both for the current state and the new state.
 
@@ -309,10 +957,10 @@ class AMM:
         If the balance improvement is not greater than 0, indicating that the new liquidity does not improve the balance, the method returns 0.0 as the rebalancing incentive.
         """
         pool = self.get_pool(token_a, token_b)
-        state = pool.get_pool_state()
+        token_a_reserve, token_b_reserve = pool.get_reserves()
 
-        current_ratio = state['token_a_reserve'] / state['token_b_reserve']
-        new_ratio = (state['token_a_reserve'] + amount_a) / (state['token_b_reserve'] + amount_b)
+        current_ratio = token_a_reserve / token_b_reserve
+        new_ratio = (token_a_reserve + amount_a) / (token_b_reserve + amount_b)
 
         current_imbalance = abs(current_ratio - 1)
         new_imbalance = abs(new_ratio - 1)
@@ -362,7 +1010,7 @@ class AMM:
             adjust_fee("token_A", "token_B")
         """
         pool = self.get_pool(token_a, token_b)
-        state = pool.get_pool_state()
+        token_a_reserve, token_b_reserve = pool.get_reserves()
 
         # Calculate trading volume in the last hour
         recent_volume = self.calculate_recent_volume(token_a, token_b, time_window=3600)
@@ -371,7 +1019,7 @@ class AMM:
         volume_factor = min(recent_volume / VOLUME_THRESHOLD, 1)
 
         # Calculate pool imbalance
-        imbalance = abs(state['token_a_reserve'] / state['token_b_reserve'] - 1)
+        imbalance = abs(token_a_reserve / token_b_reserve - 1)
         imbalance_factor = min(imbalance / MAX_IMBALANCE, 1)
 
         # Calculate new fee
@@ -379,3 +1027,4 @@ class AMM:
         new_fee = min(new_fee, MAX_FEE)
 
         pool.fee = new_fee
+        self._invalidate_snapshot()
@@ -0,0 +1,309 @@
+import math
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+from defi_amm.models.amm import AMM, AMMException
+from defi_amm.utils.logging import logger
+
+# Relaxations smaller than this (in log space) are treated as rounding noise
+_TOLERANCE = 1e-12
+
+
+class ArbitrageOpportunity(NamedTuple):
+    """
+    A profitable cycle of swaps and its optimal size.
+
+    Attributes:
+        path (Tuple[str, ...]): The tokens visited, starting and ending with the token traded.
+        amount_in (float): The input that maximizes the profit.
+        amount_out (float): The amount of the starting token received back for `amount_in`.
+        profit (float): `amount_out - amount_in`, in units of the starting token.
+    """
+    path: Tuple[str, ...]
+    amount_in: float
+    amount_out: float
+    profit: float
+
+
+class ArbitrageDetector:
+    """
+    Finds cycles of swaps across the pools of an AMM that return more than they take.
+
+    Every pool is a pair of directed edges in the token graph, weighted with minus the logarithm
+    of the rate a marginal swap gets, fee included; a cycle is profitable exactly when its total
+    weight is negative. Such cycles are found with a vectorized Bellman-Ford relaxation.
+
+    Each swap maps its input x to `reserve_out - k / (reserve_in + (1 - fee) * x)`, a Möbius
+    transformation, so a whole cycle composes into a single one and its optimal input and profit
+    follow in closed form, matching what executing the swaps returns.
+
+    The detector wraps the listener of every pool to learn which pools changed. After the first
+    scan, `find_opportunities` only re-prices the known cycles through changed pools and searches
+    for new cycles from the tokens of those pools, since any new cycle must contain one of them.
+
+    Attributes:
+        amm (AMM): The AMM whose pools are scanned.
+        min_profit (float): Cycles returning less than this profit are not reported.
+        tokens (List[str]): The tokens of the graph, indexed by node.
+    """
+
+    def __init__(self, amm: AMM, min_profit: float = 1e-9):
+        """
+        Builds the token graph of an AMM and subscribes to its pools.
+
+        Args:
+            amm (AMM): The AMM to scan.
+            min_profit (float): The smallest profit reported, in units of the starting token; this
+                keeps the rounding residue of executed arbitrages from being reported (default is 1e-9).
+        """
+        self.amm = amm
+        self.min_profit = min_profit
+        self._build()
+        amm.pool_listeners.append(self._on_pool_created)
+        amm.pool_removed_listeners.append(self._on_pool_removed)
+
+    def _build(self) -> None:
+        """
+        (Re)builds the graph from every pool of the AMM and marks every pool as changed.
+        """
+        self.tokens: List[str] = []
+        self._nodes: Dict[str, int] = {}
+        self._pool_keys: List[str] = []
+        self._pool_index: Dict[str, int] = {}
+        self._sources = np.zeros(0, dtype=np.int64)
+        self._targets = np.zeros(0, dtype=np.int64)
+        self._weights = np.zeros(0)
+        self._dirty: Set[str] = set()
+        self._cycles: Dict[Tuple[Tuple[str, bool], ...], ArbitrageOpportunity] = {}
+        self._scanned = False
+        self._stale = False
+        for pool_key in list(self.amm.pools):
+            self._add_pool(pool_key, *self.amm.get_pool_tokens(pool_key))
+
+    def _node(self, token: str) -> int:
+        node = self._nodes.get(token)
+        if node is None:
+            node = self._nodes[token] = len(self.tokens)
+            self.tokens.append(token)
+        return node
+
+    def _add_pool(self, pool_key: str, token_a: str, token_b: str) -> None:
+        """
+        Adds the two edges of a pool, or rebinds them if the pool object was replaced, and watches it.
+        """
+        if pool_key not in self._pool_index:
+            node_a, node_b = self._node(token_a), self._node(token_b)
+            self._pool_index[pool_key] = len(self._pool_keys)
+            self._pool_keys.append(pool_key)
+            # Edge 2 * i sells token A of pool i, edge 2 * i + 1 sells token B
+            self._sources = np.append(self._sources, [node_a, node_b])
+            self._targets = np.append(self._targets, [node_b, node_a])
+            self._weights = np.append(self._weights, [np.inf, np.inf])
+        self._watch(pool_key)
+        self._dirty.add(pool_key)
+
+    def _watch(self, pool_key: str) -> None:
+        pool = self.amm.pools[pool_key]
+        listener = pool.listener
+
+        def mark_changed(delta_reserve_a: float, delta_reserve_b: float, delta_fees_a: float,
+                         delta_fees_b: float) -> None:
+            if listener is not None:
+                listener(delta_reserve_a, delta_reserve_b, delta_fees_a, delta_fees_b)
+            self._dirty.add(pool_key)
+
+        pool.listener = mark_changed
+
+    def _on_pool_created(self, pool_key: str, token_a: str, token_b: str) -> None:
+        self._add_pool(pool_key, token_a, token_b)
+
+    def _on_pool_removed(self, pool_key: str, token_a: str, token_b: str) -> None:
+        # The edge arrays are indexed by pool, so the graph is rebuilt on the next scan
+        self._stale = True
+
+    def _update_weights(self, pool_keys: Set[str]) -> None:
+        """
+        Recomputes the edge weights of the given pools from their reserves.
+        """
+        index = np.fromiter((self._pool_index[pool_key] for pool_key in pool_keys), dtype=np.int64,
+                            count=len(pool_keys))
+        pools = [self.amm.pools[pool_key] for pool_key in pool_keys]
+        reserve_a = np.array([pool.token_a_reserve for pool in pools], dtype=float)
+        reserve_b = np.array([pool.token_b_reserve for pool in pools], dtype=float)
+        k = np.array([pool.k for pool in pools], dtype=float)
+        fee_multiplier = 1 - np.array([pool.fee for pool in pools], dtype=float)
+        # The marginal rate of selling into a pool is the derivative of its output at zero input
+        with np.errstate(divide='ignore'):
+            self._weights[2 * index] = -np.log(fee_multiplier * k / reserve_a ** 2)
+            self._weights[2 * index + 1] = -np.log(fee_multiplier * k / reserve_b ** 2)
+
+    def _find_negative_cycles(self, seeds: np.ndarray) -> List[List[int]]:
+        """
+        Finds negative cycles reachable from the seed nodes by Bellman-Ford relaxation.
+
+        All edges are relaxed at once per round. A cycle among the predecessor edges has negative
+        weight, so the search stops at the first round whose predecessor edges contain a cycle, or
+        when no distance improves, which proves there is no negative cycle to find.
+
+        Args:
+            seeds (np.ndarray): The nodes the search starts from.
+
+        Returns:
+            List[List[int]]: The edges of each cycle found, in traversal order.
+        """
+        num_nodes = len(self.tokens)
+        distances = np.full(num_nodes, np.inf)
+        distances[seeds] = 0
+        predecessors = np.full(num_nodes, -1)
+        edges = np.arange(len(self._sources))
+        for _ in range(num_nodes):
+            candidates = distances[self._sources] + self._weights
+            best = np.full(num_nodes, np.inf)
+            np.minimum.at(best, self._targets, candidates)
+            improved = best < distances - _TOLERANCE
+            if not improved.any():
+                return []
+            winners = improved[self._targets] & (candidates == best[self._targets])
+            predecessors[self._targets[winners]] = edges[winners]
+            distances = np.where(improved, best, distances)
+            cycles = self._predecessor_cycles(predecessors.tolist(), np.flatnonzero(improved).tolist())
+            if cycles:
+                return cycles
+        return []
+
+    def _predecessor_cycles(self, predecessors: List[int], starts: List[int]) -> List[List[int]]:
+        """
+        Follows the predecessor edges back from each start node and collects the cycles they close.
+
+        Every node is walked at most once over all starts, so this is linear in the number of nodes.
+        """
+        sources = self._sources
+        cycles = []
+        walked: Set[int] = set()
+        for node in starts:
+            positions: Dict[int, int] = {}
+            walk = []
+            while node not in walked and node not in positions and predecessors[node] >= 0:
+                positions[node] = len(walk)
+                walk.append(node)
+                node = int(sources[predecessors[node]])
+            if node in positions:
+                # The predecessor edge of each node comes from the next node of the walk
+                cycles.append([predecessors[cycle_node] for cycle_node in reversed(walk[positions[node]:])])
+            walked.update(walk)
+        return cycles
+
+    def _price_cycle(self, hops: Tuple[Tuple[str, bool], ...], start: str) -> Optional[ArbitrageOpportunity]:
+        """
+        Finds the profit-maximizing input of a cycle in closed form.
+
+        Each hop maps x to `(p * x + q) / (r * x + s)` with `p = (1 - fee) * reserve_out`,
+        `q = reserve_out * reserve_in - k`, `r = 1 - fee` and `s = reserve_in`, so the cycle is the
+        product of the hop matrices `[[p, q], [r, s]]`. The profit `f(x) - x` of the composite map
+        peaks where `f'(x) = det / (r * x + s) ** 2 = 1`.
+
+        Args:
+            hops (Tuple[Tuple[str, bool], ...]): The `(pool_key, b_to_a)` of every hop.
+            start (str): The token the cycle starts and ends with.
+
+        Returns:
+            Optional[ArbitrageOpportunity]: The opportunity, or None if the cycle is not profitable.
+        """
+        composite = np.eye(2)
+        path = [start]
+        for pool_key, b_to_a in hops:
+            pool = self.amm.pools[pool_key]
+            reserve_in, reserve_out = ((pool.token_b_reserve, pool.token_a_reserve) if b_to_a else
+                                       (pool.token_a_reserve, pool.token_b_reserve))
+            fee_multiplier = 1 - pool.fee
+            hop = np.array([[fee_multiplier * reserve_out, reserve_out * reserve_in - pool.k],
+                            [fee_multiplier, reserve_in]])
+            composite = hop @ composite
+            # Möbius maps are invariant to scaling, which keeps long cycles from overflowing
+            composite /= np.abs(composite).max()
+            path.append(self.amm.get_pool_tokens(pool_key)[0 if b_to_a else 1])
+
+        (p, q), (r, s) = composite.tolist()
+        determinant = p * s - q * r
+        if determinant <= 0 or r <= 0:
+            return None
+        amount_in = (math.sqrt(determinant) - s) / r
+        if amount_in <= 0:
+            return None
+        amount_out = (p * amount_in + q) / (r * amount_in + s)
+        if amount_out - amount_in < self.min_profit:
+            return None
+        return ArbitrageOpportunity(tuple(path), amount_in, amount_out, amount_out - amount_in)
+
+    def _cycle_hops(self, edges: List[int]) -> Tuple[Tuple[Tuple[str, bool], ...], str]:
+        """
+        Converts the edges of a cycle into hops, rotated to start at the smallest pool key so each
+        cycle has a single representation.
+        """
+        hops = [(self._pool_keys[edge // 2], edge % 2 == 1) for edge in edges]
+        first = min(range(len(hops)), key=lambda i: hops[i])
+        edges = edges[first:] + edges[:first]
+        return tuple(hops[first:] + hops[:first]), self.tokens[self._sources[edges[0]]]
+
+    def find_opportunities(self) -> List[ArbitrageOpportunity]:
+        """
+        Returns the profitable cycles found across the AMM's pools, most profitable first.
+
+        Only pools that changed since the previous call are re-read: known cycles through them are
+        re-priced and new cycles are searched for from their tokens. Each profitable cycle is
+        reported once, starting with the token that leads into its smallest pool key.
+
+        Returns:
+            List[ArbitrageOpportunity]: The opportunities, sorted by decreasing profit.
+        """
+        if self._stale:
+            self._build()
+        if self._dirty:
+            dirty = self._dirty
+            self._dirty = set()
+            self._update_weights(dirty)
+            for hops, opportunity in list(self._cycles.items()):
+                if any(pool_key in dirty for pool_key, _ in hops):
+                    repriced = self._price_cycle(hops, opportunity.path[0])
+                    if repriced is None:
+                        del self._cycles[hops]
+                    else:
+                        self._cycles[hops] = repriced
+
+            if self._scanned:
+                seeds = np.unique(self._sources[[2 * self._pool_index[pool_key] for pool_key in dirty] +
+                                                [2 * self._pool_index[pool_key] + 1 for pool_key in dirty]])
+            else:
+                seeds = np.arange(len(self.tokens))
+            self._scanned = True
+            for edges in self._find_negative_cycles(seeds):
+                hops, start = self._cycle_hops(edges)
+                # Hops through the same pool twice would see each other's reserves
+                if hops not in self._cycles and len({pool_key for pool_key, _ in hops}) == len(hops):
+                    opportunity = self._price_cycle(hops, start)
+                    if opportunity is not None:
+                        self._cycles[hops] = opportunity
+            logger.debug(f"Arbitrage scan of {len(dirty)} changed pools: {len(self._cycles)} profitable cycles")
+        return sorted(self._cycles.values(), key=lambda opportunity: -opportunity.profit)
+
+    def execute(self, opportunity: ArbitrageOpportunity) -> float:
+        """
+        Trades an opportunity through the AMM, one swap per hop.
+
+        Args:
+            opportunity (ArbitrageOpportunity): The cycle and input to trade.
+
+        Returns:
+            float: The realized profit in units of the starting token.
+
+        Raises:
+            AMMException: If the path is not a cycle of existing pools.
+        """
+        path = opportunity.path
+        if len(path) < 3 or path[0] != path[-1]:
+            raise AMMException("An arbitrage path must be a cycle")
+        amount = opportunity.amount_in
+        for token_from, token_to in zip(path, path[1:]):
+            amount = self.amm.swap(token_from, token_to, amount)
+        return amount - opportunity.amount_in
@@ -0,0 +1,472 @@
+import math
+from decimal import Decimal
+from typing import Callable, Dict, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from defi_amm.models.liquidity_pool import SWAP_A_TO_B, SWAP_B_TO_A
+from defi_amm.utils.logging import logger
+
+WEI = 10 ** 18  # Base units per token with 18 decimals
+FEE_DENOMINATOR = 10_000  # Fees are expressed in basis points
+MINIMUM_LIQUIDITY = 1000  # LP tokens locked forever by the first deposit, as in Uniswap v2
+_INT64_MAX = np.iinfo(np.int64).max
+
+
+class FixedPointPoolException(ValueError):
+    """
+    Custom exception for errors related to the fixed-point pool operations.
+
+    Attributes:
+        message (str): Explanation of the error that occurred.
+    """
+
+    def __init__(self, message):
+        """
+        Initializes the FixedPointPoolException with a given message.
+
+        Args:
+            message (str): The error message to be logged and stored in the exception.
+        """
+        super().__init__(message)
+        logger.warning(f"FixedPointPoolException: {message}")
+
+
+def to_wei(amount: Union[int, float, str, Decimal], decimals: int = 18) -> int:
+    """
+    Converts a token amount to integer base units, rounding down.
+
+    The conversion goes through the decimal representation of `amount`, so `to_wei(0.1)` is
+    exactly 10**17. It is meant for inputs and reports; pool arithmetic never leaves integers.
+
+    Args:
+        amount (Union[int, float, str, Decimal]): The amount in whole tokens.
+        decimals (int): The number of decimals of the token (default is 18).
+
+    Returns:
+        int: The amount in base units.
+    """
+    return int(Decimal(str(amount)).scaleb(decimals))
+
+
+def from_wei(amount: int, decimals: int = 18) -> float:
+    """
+    Converts integer base units to a float amount of whole tokens.
+
+    Args:
+        amount (int): The amount in base units.
+        decimals (int): The number of decimals of the token (default is 18).
+
+    Returns:
+        float: The amount in whole tokens.
+    """
+    return amount / 10 ** decimals
+
+
+def get_amount_out(amount_in: int, reserve_in: int, reserve_out: int, fee_bps: int = 30) -> int:
+    """
+    Returns the output of a constant-product swap with Uniswap v2 `getAmountOut` rounding.
+
+    With the default fee of 30 basis points the result is bit-identical to the on-chain
+    `amountIn * 997 * reserveOut / (reserveIn * 1000 + amountIn * 997)`, rounded down.
+
+    Args:
+        amount_in (int): The input amount in base units.
+        reserve_in (int): The reserve of the input token.
+        reserve_out (int): The reserve of the output token.
+        fee_bps (int): The swap fee in basis points (default is 30).
+
+    Returns:
+        int: The output amount in base units.
+    """
+    amount_in_with_fee = amount_in * (FEE_DENOMINATOR - fee_bps)
+    return amount_in_with_fee * reserve_out // (reserve_in * FEE_DENOMINATOR + amount_in_with_fee)
+
+
+def _check_directions(directions) -> np.ndarray:
+    """
+    Returns the swap directions as an array, rejecting codes other than `SWAP_A_TO_B` and `SWAP_B_TO_A`.
+    """
+    directions = np.asarray(directions)
+    if not np.isin(directions, (SWAP_A_TO_B, SWAP_B_TO_A)).all():
+        raise FixedPointPoolException("Swap directions must be SWAP_A_TO_B or SWAP_B_TO_A")
+    return directions
+
+
+class FixedPointLiquidityPool:
+    """
+    Constant-product pool on integer base units with the rounding of Uniswap v2.
+
+    An alternative to `LiquidityPool` for results that must reconcile with on-chain uint256 math:
+    reserves, LP supply and fees are Python integers, every division rounds down, and the pool
+    invariant is the product of the current reserves, so it never drifts. All operations use
+    plain integer arithmetic, without `Decimal`. Liquidity follows `UniswapV2Pair.mint`/`burn`:
+    deposits mint the smaller of the two proportional shares, and the first deposit locks
+    `MINIMUM_LIQUIDITY` LP tokens.
+
+    Attributes:
+        token_a_reserve (int): The current reserve of token A in base units.
+        token_b_reserve (int): The current reserve of token B in base units.
+        fee_bps (int): The swap fee in basis points (30 for 0.3%).
+        total_fees_a (int): The swap fees collected in token A, rounded down per swap.
+        total_fees_b (int): The swap fees collected in token B, rounded down per swap.
+        total_lp_tokens (int): The total supply of LP tokens, including the locked minimum.
+        listener (Optional[Callable[[int, int, int, int], None]]): Called after every change of
+            reserves or fees with the deltas `(reserve_a, reserve_b, fees_a, fees_b)`.
+        version (int): Sequence counter, odd while a mutation is in progress, as in `LiquidityPool`.
+    """
+
+    def __init__(self, token_a_reserve: int, token_b_reserve: int, fee_bps: int = 30):
+        """
+        Initializes a pool with a first deposit.
+
+        Args:
+            token_a_reserve (int): Initial reserve of token A in base units.
+            token_b_reserve (int): Initial reserve of token B in base units.
+            fee_bps (int): Swap fee in basis points (default is 30, representing 0.3%).
+
+        Raises:
+            FixedPointPoolException: If the amounts are not integers or the deposit is too small.
+        """
+        self._check_amounts(token_a_reserve, token_b_reserve)
+        self.total_lp_tokens = math.isqrt(token_a_reserve * token_b_reserve)
+        if self.total_lp_tokens <= MINIMUM_LIQUIDITY:
+            raise FixedPointPoolException("Insufficient initial liquidity")
+        self.token_a_reserve = token_a_reserve
+        self.token_b_reserve = token_b_reserve
+        self.fee_bps = fee_bps
+        self.total_fees_a = 0
+        self.total_fees_b = 0
+        self.listener: Optional[Callable[[int, int, int, int], None]] = None
+        self.version = 0
+
+    @staticmethod
+    def _check_amounts(*amounts: int) -> None:
+        for amount in amounts:
+            if not isinstance(amount, int) or amount <= 0:
+                raise FixedPointPoolException(f"Amounts must be positive integers in base units, got {amount!r}")
+
+    @property
+    def k(self) -> int:
+        """
+        The constant product of the current reserves.
+        """
+        return self.token_a_reserve * self.token_b_reserve
+
+    @property
+    def fee(self) -> float:
+        """
+        The swap fee as a decimal fraction, for parity with `LiquidityPool.fee`.
+        """
+        return self.fee_bps / FEE_DENOMINATOR
+
+    def _update(self, delta_a: int, delta_b: int, fees_a: int, fees_b: int, delta_lp_tokens: int = 0) -> None:
+        self.version += 1
+        self.total_lp_tokens += delta_lp_tokens
+        self.token_a_reserve += delta_a
+        self.token_b_reserve += delta_b
+        self.total_fees_a += fees_a
+        self.total_fees_b += fees_b
+        self.version += 1
+        if self.listener is not None:
+            self.listener(delta_a, delta_b, fees_a, fees_b)
+
+    def add_liquidity(self, token_a_amount: int, token_b_amount: int) -> int:
+        """
+        Deposits both tokens and mints LP tokens for the smaller proportional share.
+
+        Args:
+            token_a_amount (int): The amount of token A to deposit, in base units.
+            token_b_amount (int): The amount of token B to deposit, in base units.
+
+        Returns:
+            int: The LP tokens minted; any excess of one token is donated to the pool.
+
+        Raises:
+            FixedPointPoolException: If an amount is invalid or the deposit mints no LP tokens.
+        """
+        self._check_amounts(token_a_amount, token_b_amount)
+        lp_tokens_minted = min(token_a_amount * self.total_lp_tokens // self.token_a_reserve,
+                               token_b_amount * self.total_lp_tokens // self.token_b_reserve)
+        if lp_tokens_minted <= 0:
+            raise FixedPointPoolException("Insufficient liquidity minted")
+        self._update(token_a_amount, token_b_amount, 0, 0, lp_tokens_minted)
+        return lp_tokens_minted
+
+    def remove_liquidity(self, lp_tokens: int) -> Tuple[int, int]:
+        """
+        Burns LP tokens for the proportional share of both reserves, rounded down.
+
+        Args:
+            lp_tokens (int): The amount of LP tokens to burn.
+
+        Returns:
+            Tuple[int, int]: The amounts of token A and token B returned.
+
+        Raises:
+            FixedPointPoolException: If the LP tokens exceed the withdrawable supply or redeem nothing.
+        """
+        self._check_amounts(lp_tokens)
+        if lp_tokens > self.total_lp_tokens - MINIMUM_LIQUIDITY:
+            raise FixedPointPoolException("Insufficient LP tokens")
+        token_a_amount = lp_tokens * self.token_a_reserve // self.total_lp_tokens
+        token_b_amount = lp_tokens * self.token_b_reserve // self.total_lp_tokens
+        if token_a_amount <= 0 or token_b_amount <= 0:
+            raise FixedPointPoolException("Insufficient liquidity burned")
+        self._update(-token_a_amount, -token_b_amount, 0, 0, -lp_tokens)
+        return token_a_amount, token_b_amount
+
+    def swap_a_to_b(self, token_a_amount: int) -> int:
+        """
+        Swaps an exact amount of token A for token B.
+
+        Args:
+            token_a_amount (int): The amount of token A to sell, in base units.
+
+        Returns:
+            int: The amount of token B received.
+
+        Raises:
+            FixedPointPoolException: If the amount is invalid or the output rounds down to zero.
+        """
+        self._check_amounts(token_a_amount)
+        token_b_amount = get_amount_out(token_a_amount, self.token_a_reserve, self.token_b_reserve, self.fee_bps)
+        if token_b_amount <= 0:
+            raise FixedPointPoolException("Insufficient output amount")
+        self._update(token_a_amount, -token_b_amount, token_a_amount * self.fee_bps // FEE_DENOMINATOR, 0)
+        return token_b_amount
+
+    def swap_b_to_a(self, token_b_amount: int) -> int:
+        """
+        Swaps an exact amount of token B for token A.
+
+        Args:
+            token_b_amount (int): The amount of token B to sell, in base units.
+
+        Returns:
+            int: The amount of token A received.
+
+        Raises:
+            FixedPointPoolException: If the amount is invalid or the output rounds down to zero.
+        """
+        self._check_amounts(token_b_amount)
+        token_a_amount = get_amount_out(token_b_amount, self.token_b_reserve, self.token_a_reserve, self.fee_bps)
+        if token_a_amount <= 0:
+            raise FixedPointPoolException("Insufficient output amount")
+        self._update(-token_a_amount, token_b_amount, 0, token_b_amount * self.fee_bps // FEE_DENOMINATOR)
+        return token_a_amount
+
+    def swap_batch(self, amounts, directions) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Applies a sequence of swaps with the same integer arithmetic as the single swaps.
+
+        The loop works on local integers and writes the state back once, notifying the listener
+        once. A swap whose output rounds down to zero is skipped and reported as 0.
+
+        Args:
+            amounts (array-like): The input amounts in base units, one per swap.
+            directions (array-like): `SWAP_A_TO_B` or `SWAP_B_TO_A` per swap, or a single value.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The output of each swap (object array of ints) and the
+            success mask.
+
+        Raises:
+            FixedPointPoolException: If a direction is unknown.
+        """
+        amounts = [int(amount) for amount in amounts]
+        directions = np.broadcast_to(_check_directions(directions), (len(amounts),)).tolist()
+        reserve_a, reserve_b = self.token_a_reserve, self.token_b_reserve
+        fees_a = fees_b = 0
+        fee_multiplier = FEE_DENOMINATOR - self.fee_bps
+        amounts_out = [0] * len(amounts)
+        for i, (amount, direction) in enumerate(zip(amounts, directions)):
+            if amount <= 0:
+                continue
+            amount_with_fee = amount * fee_multiplier
+            if direction == SWAP_A_TO_B:
+                amount_out = amount_with_fee * reserve_b // (reserve_a * FEE_DENOMINATOR + amount_with_fee)
+                if amount_out > 0:
+                    reserve_a += amount
+                    reserve_b -= amount_out
+                    fees_a += amount * self.fee_bps // FEE_DENOMINATOR
+                    amounts_out[i] = amount_out
+            else:
+                amount_out = amount_with_fee * reserve_a // (reserve_b * FEE_DENOMINATOR + amount_with_fee)
+                if amount_out > 0:
+                    reserve_b += amount
+                    reserve_a -= amount_out
+                    fees_b += amount * self.fee_bps // FEE_DENOMINATOR
+                    amounts_out[i] = amount_out
+
+        self._update(reserve_a - self.token_a_reserve, reserve_b - self.token_b_reserve, fees_a, fees_b)
+        amounts_out = np.array(amounts_out, dtype=object)
+        return amounts_out, amounts_out > 0
+
+    def get_exchange_rate(self) -> float:
+        """
+        Returns the spot price of token A in token B, as a float.
+
+        Returns:
+            float: The ratio of token B to token A reserves.
+        """
+        return self.token_b_reserve / self.token_a_reserve
+
+    def get_pool_state(self) -> Dict[str, int]:
+        """
+        Retrieves the current state of the pool.
+
+        Returns:
+            Dict[str, int]: The same fields as `LiquidityPool.get_pool_state`, as integers.
+        """
+        return {
+            "token_a_reserve": self.token_a_reserve,
+            "token_b_reserve": self.token_b_reserve,
+            "k": self.k,
+            "total_fees_a": self.total_fees_a,
+            "total_fees_b": self.total_fees_b,
+            "total_lp_tokens": self.total_lp_tokens
+        }
+
+
+class FixedPointBatchResult(NamedTuple):
+    """
+    Outcome of a batch of swaps applied to a `FixedPointPoolArray`.
+
+    Attributes:
+        amounts_out (np.ndarray): The output of each swap in base units, 0 where it was rejected.
+        success (np.ndarray): Boolean mask, False where the output rounded down to zero.
+    """
+    amounts_out: np.ndarray
+    success: np.ndarray
+
+
+class FixedPointPoolArray:
+    """
+    The reserves of many fixed-point pools in NumPy integer columns, for bulk replay.
+
+    Columns are `int64` while every intermediate product provably fits, which makes a batch a few
+    native vectorized operations; as soon as a batch could overflow (e.g. with 18-decimal
+    amounts) they switch to `object` arrays of Python integers, which are still processed
+    vectorized but with exact arbitrary-precision arithmetic. Either way the results are
+    bit-identical to `FixedPointLiquidityPool`.
+
+    Attributes:
+        reserve_a (np.ndarray): Reserve of token A of each pool.
+        reserve_b (np.ndarray): Reserve of token B of each pool.
+        fees_a (np.ndarray): Fees collected in token A by each pool.
+        fees_b (np.ndarray): Fees collected in token B by each pool.
+        fee_bps (np.ndarray): Swap fee of each pool in basis points.
+    """
+
+    def __init__(self, reserves_a, reserves_b, fee_bps=30):
+        """
+        Initializes the columns from the reserves of each pool.
+
+        Args:
+            reserves_a (array-like): The token A reserve of each pool, in base units.
+            reserves_b (array-like): The token B reserve of each pool, in base units.
+            fee_bps (array-like): The fee of each pool in basis points, or one for all (default is 30).
+        """
+        reserves_a = [int(reserve) for reserve in reserves_a]
+        reserves_b = [int(reserve) for reserve in reserves_b]
+        dtype = np.int64 if max(reserves_a + reserves_b, default=0) <= _INT64_MAX else object
+        self.reserve_a = np.array(reserves_a, dtype=dtype)
+        self.reserve_b = np.array(reserves_b, dtype=dtype)
+        self.fees_a = np.zeros(len(reserves_a), dtype=dtype)
+        self.fees_b = np.zeros(len(reserves_a), dtype=dtype)
+        self.fee_bps = np.broadcast_to(np.asarray(fee_bps, dtype=np.int64), (len(reserves_a),)).copy()
+
+    @classmethod
+    def from_pools(cls, pools) -> 'FixedPointPoolArray':
+        """
+        Copies the reserves and fees of fixed-point pools into columns.
+
+        Args:
+            pools (Iterable[FixedPointLiquidityPool]): The pools.
+
+        Returns:
+            FixedPointPoolArray: The columns, one row per pool in iteration order.
+        """
+        pools = list(pools)
+        return cls([pool.token_a_reserve for pool in pools], [pool.token_b_reserve for pool in pools],
+                   [pool.fee_bps for pool in pools])
+
+    def _prepare_amounts(self, amounts) -> np.ndarray:
+        """
+        Converts swap amounts to the column dtype, first switching the columns to Python integers
+        if a batch with these amounts could overflow `int64`.
+        """
+        amounts = np.asarray(amounts)
+        if amounts.dtype.kind not in 'iu':
+            amounts = np.array([int(amount) for amount in amounts.tolist()], dtype=object)
+        if self.reserve_a.dtype == object:
+            return amounts.astype(object)
+        largest_amount = max(int(amounts.max(initial=0)), 1)
+        # No reserve can grow past this during the batch, so the largest intermediate, the numerator
+        # amount * (FEE_DENOMINATOR - fee) * reserve, is bounded by the product below
+        largest_reserve = (max(int(self.reserve_a.max(initial=0)), int(self.reserve_b.max(initial=0))) +
+                           largest_amount * len(amounts))
+        if largest_amount * FEE_DENOMINATOR * largest_reserve <= _INT64_MAX:
+            return amounts.astype(np.int64)
+        logger.debug("Fixed-point pool batch exceeds int64, switching to Python integers")
+        for name in ('reserve_a', 'reserve_b', 'fees_a', 'fees_b'):
+            setattr(self, name, getattr(self, name).astype(object))
+        return amounts.astype(object)
+
+    def apply_swaps(self, pool_indices, amounts, directions) -> FixedPointBatchResult:
+        """
+        Applies swaps to the pools, in order within each pool.
+
+        Swaps are grouped into rounds in which every pool swaps at most once: the first swap of
+        every pool, then the second, and so on. Each round is one vectorized step, so replaying
+        many pools costs as many NumPy passes as the busiest pool has swaps.
+
+        Args:
+            pool_indices (array-like): The row of the pool of each swap.
+            amounts (array-like): The input amount of each swap, in base units.
+            directions (array-like): `SWAP_A_TO_B` or `SWAP_B_TO_A` per swap, or a single value.
+
+        Returns:
+            FixedPointBatchResult: The output and success of each swap, in input order.
+
+        Raises:
+            FixedPointPoolException: If a direction is unknown.
+        """
+        pool_indices = np.asarray(pool_indices, dtype=np.int64)
+        amounts = self._prepare_amounts(amounts)
+        selling_a = np.broadcast_to(_check_directions(directions) == SWAP_A_TO_B, pool_indices.shape)
+        amounts_out = np.zeros(len(pool_indices), dtype=amounts.dtype)
+        if len(pool_indices) == 0:
+            return FixedPointBatchResult(amounts_out, amounts_out > 0)
+
+        # The round of a swap is the number of earlier swaps of the same pool
+        order = np.argsort(pool_indices, kind='stable')
+        sorted_pools = pool_indices[order]
+        group_starts = np.flatnonzero(np.r_[True, sorted_pools[1:] != sorted_pools[:-1]])
+        group_sizes = np.diff(np.r_[group_starts, len(order)])
+        rounds = np.empty(len(order), dtype=np.int64)
+        rounds[order] = np.arange(len(order)) - np.repeat(group_starts, group_sizes)
+
+        round_order = np.argsort(rounds, kind='stable')
+        round_starts = np.searchsorted(rounds[round_order], np.arange(rounds.max() + 2))
+        for start, end in zip(round_starts[:-1], round_starts[1:]):
+            swaps = round_order[start:end]
+            rows = pool_indices[swaps]
+            amount = amounts[swaps]
+            sells_a = selling_a[swaps]
+            reserve_in = np.where(sells_a, self.reserve_a[rows], self.reserve_b[rows])
+            reserve_out = np.where(sells_a, self.reserve_b[rows], self.reserve_a[rows])
+            fee_bps = self.fee_bps[rows]
+            amount_with_fee = amount * (FEE_DENOMINATOR - fee_bps)
+            out = amount_with_fee * reserve_out // (reserve_in * FEE_DENOMINATOR + amount_with_fee)
+            valid = (out > 0) & (amount > 0)
+            out = np.where(valid, out, 0)
+            amount = np.where(valid, amount, 0)
+            fees = amount * fee_bps // FEE_DENOMINATOR
+            self.reserve_a[rows] += np.where(sells_a, amount, -out)
+            self.reserve_b[rows] += np.where(sells_a, -out, amount)
+            self.fees_a[rows] += np.where(sells_a, fees, 0)
+            self.fees_b[rows] += np.where(sells_a, 0, fees)
+            amounts_out[swaps] = out
+        return FixedPointBatchResult(amounts_out, amounts_out > 0)
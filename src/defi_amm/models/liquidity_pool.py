@@ -1,8 +1,17 @@
 import math
-from typing import Dict, Tuple
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
 
+import numpy as np
+
+from defi_amm.models.oracle import PriceOracle
 from defi_amm.utils.logging import logger
 
+SWAP_A_TO_B = 0
+SWAP_B_TO_A = 1
+ADD_LIQUIDITY = 2
+REMOVE_LIQUIDITY = 3
+_EVENT_KINDS = (SWAP_A_TO_B, SWAP_B_TO_A, ADD_LIQUIDITY, REMOVE_LIQUIDITY)
+
 
 class LiquidityPoolException(ValueError):
     """
@@ -26,6 +35,59 @@ class LiquidityPoolException(ValueError):
         logger.warning(f"LiquidityPoolException: {message}")
 
 
+class BatchSwapResult(NamedTuple):
+    """
+    Outcome of a batch of swaps applied sequentially to a single pool.
+
+    Attributes:
+        amounts_out (np.ndarray): The amount received for each swap, NaN where the swap was rejected.
+        success (np.ndarray): Boolean mask, False where the swap was rejected for insufficient liquidity.
+        token_a_reserve (float): The reserve of token A after the whole batch.
+        token_b_reserve (float): The reserve of token B after the whole batch.
+        total_fees_a (float): The total fees collected in token A after the whole batch.
+        total_fees_b (float): The total fees collected in token B after the whole batch.
+    """
+    amounts_out: np.ndarray
+    success: np.ndarray
+    token_a_reserve: float
+    token_b_reserve: float
+    total_fees_a: float
+    total_fees_b: float
+
+
+class EventBatchResult(NamedTuple):
+    """
+    Outcome of a sequence of swaps and liquidity changes applied to a single pool.
+
+    Attributes:
+        results (np.ndarray): A `(n, 2)` array with the swap output, the LP tokens minted, or the
+            token A and B amounts returned by a removal of each event; NaN where unused or rejected.
+        success (np.ndarray): Boolean mask, False where the event was rejected.
+        token_a_reserves (np.ndarray): The reserve of token A after each event.
+        token_b_reserves (np.ndarray): The reserve of token B after each event.
+    """
+    results: np.ndarray
+    success: np.ndarray
+    token_a_reserves: np.ndarray
+    token_b_reserves: np.ndarray
+
+
+class SwapQuote(NamedTuple):
+    """
+    Hypothetical outcome of swapping each of a set of input amounts against the current pool state.
+
+    Attributes:
+        amounts_in (np.ndarray): The quoted input amounts.
+        amounts_out (np.ndarray): The amount that would be received, NaN where the swap would be rejected.
+        effective_prices (np.ndarray): Output received per unit of input for each amount.
+        price_impacts (np.ndarray): Relative shortfall of the effective price against the spot price.
+    """
+    amounts_in: np.ndarray
+    amounts_out: np.ndarray
+    effective_prices: np.ndarray
+    price_impacts: np.ndarray
+
+
 class LiquidityPool:
     """
     Represents a decentralized finance (DeFi) automated market maker (AMM) liquidity pool.
@@ -34,6 +96,9 @@ class LiquidityPool:
     adding/removing liquidity, swapping tokens, and calculating metrics like exchange
     rates and impermanent loss.
 
+    Instances use `__slots__` rather than a per-instance `__dict__`, which keeps simulations with
+    very many pools compact; attributes other than the ones below cannot be added.
+
     Attributes:
         token_a_reserve (float): The current reserve of token A in the pool.
         token_b_reserve (float): The current reserve of token B in the pool.
@@ -42,8 +107,17 @@ class LiquidityPool:
         total_fees_a (float): The total fees collected in token A.
         total_fees_b (float): The total fees collected in token B.
         total_lp_tokens (float): The total amount of liquidity provider (LP) tokens minted.
+        listener (Optional[Callable[[float, float, float, float], None]]): Called after every change
+            of reserves or fees with the deltas `(reserve_a, reserve_b, fees_a, fees_b)`.
+        version (int): Sequence counter, odd while a mutation is in progress and incremented by two
+            per completed mutation; used for lock-free consistent reads.
+        oracle (PriceOracle): Cumulative price accumulators and observations, updated on every
+            change of reserves.
     """
 
+    __slots__ = ('token_a_reserve', 'token_b_reserve', 'k', 'fee', 'total_fees_a', 'total_fees_b', 'total_lp_tokens',
+                 'listener', 'version', 'oracle')
+
     def __init__(self, token_a_reserve: float, token_b_reserve: float, fee: float = 0.003):
         """
         Initializes a LiquidityPool with given reserves and a swap fee.
@@ -63,6 +137,9 @@ class LiquidityPool:
         self.total_fees_a = 0
         self.total_fees_b = 0
         self.total_lp_tokens = math.sqrt(token_a_reserve * token_b_reserve)
+        self.listener: Optional[Callable[[float, float, float, float], None]] = None
+        self.version = 0
+        self.oracle = PriceOracle(token_a_reserve, token_b_reserve)
 
     def add_liquidity(self, token_a_amount: float, token_b_amount: float, tolerance: float = 1e-3) -> float:
         """
@@ -86,10 +163,15 @@ class LiquidityPool:
 
         lp_tokens_minted = (token_a_amount / self.token_a_reserve) * self.total_lp_tokens
 
+        self.version += 1
         self.token_a_reserve += token_a_amount
         self.token_b_reserve += token_b_amount
         self.k = self.token_a_reserve * self.token_b_reserve
         self.total_lp_tokens += lp_tokens_minted
+        self.oracle.update(self.token_a_reserve, self.token_b_reserve)
+        self.version += 1
+        if self.listener is not None:
+            self.listener(token_a_amount, token_b_amount, 0.0, 0.0)
 
         return lp_tokens_minted
 
@@ -113,10 +195,15 @@ class LiquidityPool:
         token_a_amount = share * self.token_a_reserve
         token_b_amount = share * self.token_b_reserve
 
+        self.version += 1
         self.token_a_reserve -= token_a_amount
         self.token_b_reserve -= token_b_amount
         self.k = self.token_a_reserve * self.token_b_reserve
         self.total_lp_tokens -= lp_tokens
+        self.oracle.update(self.token_a_reserve, self.token_b_reserve)
+        self.version += 1
+        if self.listener is not None:
+            self.listener(-token_a_amount, -token_b_amount, 0.0, 0.0)
 
         return token_a_amount, token_b_amount
 
@@ -139,9 +226,15 @@ class LiquidityPool:
         if token_b_amount <= 0:
             raise LiquidityPoolException("Insufficient liquidity for this trade")
 
+        fee_amount = token_a_amount * self.fee
+        self.version += 1
         self.token_a_reserve += token_a_amount
         self.token_b_reserve -= token_b_amount
-        self.total_fees_a += token_a_amount * self.fee
+        self.total_fees_a += fee_amount
+        self.oracle.update(self.token_a_reserve, self.token_b_reserve)
+        self.version += 1
+        if self.listener is not None:
+            self.listener(token_a_amount, -token_b_amount, fee_amount, 0.0)
 
         return token_b_amount
 
@@ -164,12 +257,197 @@ class LiquidityPool:
         if token_a_amount <= 0:
             raise LiquidityPoolException("Insufficient liquidity for this trade")
 
+        fee_amount = token_b_amount * self.fee
+        self.version += 1
         self.token_b_reserve += token_b_amount
         self.token_a_reserve -= token_a_amount
-        self.total_fees_b += token_b_amount * self.fee
+        self.total_fees_b += fee_amount
+        self.oracle.update(self.token_a_reserve, self.token_b_reserve)
+        self.version += 1
+        if self.listener is not None:
+            self.listener(-token_a_amount, token_b_amount, 0.0, fee_amount)
 
         return token_a_amount
 
+    def swap_batch(self, amounts, directions) -> BatchSwapResult:
+        """
+        Applies a sequence of swaps to the pool in a single call.
+
+        Each swap is evaluated against the reserves left by the previous one, using exactly the
+        same arithmetic as `swap_a_to_b` and `swap_b_to_a`, so the outputs, reserves and fee totals
+        are identical to calling those methods one by one. A swap that would be rejected with
+        "Insufficient liquidity" leaves the pool untouched and is reported as NaN in the outputs
+        instead of aborting the batch.
+
+        Args:
+            amounts (array-like): The input amounts, one per swap.
+            directions (array-like): `SWAP_A_TO_B` or `SWAP_B_TO_A` per swap, or a single value
+                applied to every swap.
+
+        Returns:
+            BatchSwapResult: The per-swap outputs and success mask plus the final reserves and fee totals.
+
+        Raises:
+            LiquidityPoolException: If `amounts` is not one-dimensional or a direction is unknown.
+        """
+        amounts = np.asarray(amounts, dtype=float)
+        if amounts.ndim != 1:
+            raise LiquidityPoolException("Batch amounts must be a one-dimensional array")
+        directions = np.asarray(directions)
+        if not np.isin(directions, (SWAP_A_TO_B, SWAP_B_TO_A)).all():
+            raise LiquidityPoolException("Swap directions must be SWAP_A_TO_B or SWAP_B_TO_A")
+        kinds = np.broadcast_to(directions, amounts.shape)
+
+        result = self.apply_events(kinds, amounts, np.zeros_like(amounts))
+        return BatchSwapResult(result.results[:, 0], result.success, self.token_a_reserve, self.token_b_reserve,
+                               self.total_fees_a, self.total_fees_b)
+
+    def apply_events(self, kinds, amounts_a, amounts_b, tolerance: float = 1e-3) -> EventBatchResult:
+        """
+        Applies a sequence of swaps and liquidity changes to the pool in a single call.
+
+        Events are evaluated in order, each against the state left by the previous one, with the
+        same arithmetic and acceptance rules as `swap_a_to_b`, `swap_b_to_a`, `add_liquidity` and
+        `remove_liquidity`: an event is rejected exactly when the corresponding method would raise,
+        be it a `LiquidityPoolException` or a `ZeroDivisionError` on an empty pool or a zero
+        amount. A rejected event leaves the pool untouched and is reported in the success mask
+        instead of raising. The state is written back and the listener notified once.
+
+        Args:
+            kinds (array-like): One of `SWAP_A_TO_B`, `SWAP_B_TO_A`, `ADD_LIQUIDITY` or
+                `REMOVE_LIQUIDITY` per event.
+            amounts_a (array-like): The swap input, the token A amount to add, or the LP tokens to
+                redeem, per event.
+            amounts_b (array-like): The token B amount to add per event; ignored by the other kinds.
+            tolerance (float): The tolerance for the ratio check of added liquidity (default is 1e-3).
+
+        Returns:
+            EventBatchResult: The per-event outcomes and the reserves after each event.
+
+        Raises:
+            LiquidityPoolException: If the inputs are not one-dimensional arrays of the same length or
+                an event kind is unknown.
+        """
+        amounts_a = np.asarray(amounts_a, dtype=float)
+        amounts_b = np.asarray(amounts_b, dtype=float)
+        kinds = np.broadcast_to(np.asarray(kinds), amounts_a.shape)
+        if amounts_a.ndim != 1 or amounts_b.shape != amounts_a.shape:
+            raise LiquidityPoolException("Batch amounts must be one-dimensional arrays of the same length")
+        if not np.isin(kinds, _EVENT_KINDS).all():
+            raise LiquidityPoolException(
+                "Event kinds must be SWAP_A_TO_B, SWAP_B_TO_A, ADD_LIQUIDITY or REMOVE_LIQUIDITY")
+
+        initial_state = (self.token_a_reserve, self.token_b_reserve, self.total_fees_a, self.total_fees_b)
+        token_a_reserve, token_b_reserve, total_fees_a, total_fees_b = initial_state
+        k = self.k
+        total_lp_tokens = self.total_lp_tokens
+        fee = self.fee
+        fee_multiplier = 1 - fee
+
+        count = len(amounts_a)
+        results_a = [math.nan] * count
+        results_b = [math.nan] * count
+        success = [False] * count
+        token_a_reserves = [0.0] * count
+        token_b_reserves = [0.0] * count
+        for i, (kind, amount_a, amount_b) in enumerate(zip(kinds.tolist(), amounts_a.tolist(), amounts_b.tolist())):
+            # Every division happens before the state changes, so a division by zero rejects the event
+            # at the same point at which the single-event methods would raise
+            try:
+                if kind == SWAP_A_TO_B:
+                    amount_out = token_b_reserve - (k / (token_a_reserve + amount_a * fee_multiplier))
+                    if amount_out > 0:
+                        token_a_reserve += amount_a
+                        token_b_reserve -= amount_out
+                        total_fees_a += amount_a * fee
+                        results_a[i] = amount_out
+                        success[i] = True
+                elif kind == SWAP_B_TO_A:
+                    amount_out = token_a_reserve - (k / (token_b_reserve + amount_a * fee_multiplier))
+                    if amount_out > 0:
+                        token_b_reserve += amount_a
+                        token_a_reserve -= amount_out
+                        total_fees_b += amount_a * fee
+                        results_a[i] = amount_out
+                        success[i] = True
+                elif kind == ADD_LIQUIDITY:
+                    if math.isclose(amount_b / amount_a, token_b_reserve / token_a_reserve, rel_tol=tolerance):
+                        lp_tokens_minted = (amount_a / token_a_reserve) * total_lp_tokens
+                        token_a_reserve += amount_a
+                        token_b_reserve += amount_b
+                        k = token_a_reserve * token_b_reserve
+                        total_lp_tokens += lp_tokens_minted
+                        results_a[i] = lp_tokens_minted
+                        success[i] = True
+                elif amount_a <= total_lp_tokens:
+                    share = amount_a / total_lp_tokens
+                    removed_a = share * token_a_reserve
+                    removed_b = share * token_b_reserve
+                    token_a_reserve -= removed_a
+                    token_b_reserve -= removed_b
+                    k = token_a_reserve * token_b_reserve
+                    total_lp_tokens -= amount_a
+                    results_a[i] = removed_a
+                    results_b[i] = removed_b
+                    success[i] = True
+            except ZeroDivisionError:
+                pass
+            token_a_reserves[i] = token_a_reserve
+            token_b_reserves[i] = token_b_reserve
+
+        self.version += 1
+        self.token_a_reserve = token_a_reserve
+        self.token_b_reserve = token_b_reserve
+        self.k = k
+        self.total_fees_a = total_fees_a
+        self.total_fees_b = total_fees_b
+        self.total_lp_tokens = total_lp_tokens
+        self.oracle.update(self.token_a_reserve, self.token_b_reserve)
+        self.version += 1
+        if self.listener is not None:
+            self.listener(token_a_reserve - initial_state[0], token_b_reserve - initial_state[1],
+                          total_fees_a - initial_state[2], total_fees_b - initial_state[3])
+
+        success = np.array(success, dtype=bool)
+        if not success.all():
+            logger.debug(f"Batch rejected {int((~success).sum())} of {count} events")
+        return EventBatchResult(np.column_stack([results_a, results_b]).reshape(count, 2), success,
+                                np.array(token_a_reserves), np.array(token_b_reserves))
+
+    def quote(self, amounts, direction: int = SWAP_A_TO_B) -> SwapQuote:
+        """
+        Quotes swaps of the given sizes without modifying the pool.
+
+        Every amount is priced independently against the current reserves with the same closed-form
+        constant-product expression used by `swap_a_to_b` and `swap_b_to_a`, so a quote matches what
+        the corresponding swap would return if executed next.
+
+        Args:
+            amounts (array-like): The input amounts to quote.
+            direction (int): `SWAP_A_TO_B` to sell token A, `SWAP_B_TO_A` to sell token B.
+
+        Returns:
+            SwapQuote: Outputs, effective prices and price impacts, shaped like `amounts`.
+
+        Raises:
+            LiquidityPoolException: If `direction` is unknown.
+        """
+        amounts = np.asarray(amounts, dtype=float)
+        if direction == SWAP_A_TO_B:
+            reserve_in, reserve_out = self.token_a_reserve, self.token_b_reserve
+        elif direction == SWAP_B_TO_A:
+            reserve_in, reserve_out = self.token_b_reserve, self.token_a_reserve
+        else:
+            raise LiquidityPoolException("Swap direction must be SWAP_A_TO_B or SWAP_B_TO_A")
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            amounts_out = reserve_out - self.k / (reserve_in + amounts * (1 - self.fee))
+            amounts_out = np.where(amounts_out > 0, amounts_out, np.nan)
+            effective_prices = amounts_out / amounts
+            price_impacts = 1 - effective_prices / (reserve_out / reserve_in)
+
+        return SwapQuote(amounts, amounts_out, effective_prices, price_impacts)
+
     def get_exchange_rate(self) -> float:
         """
         Returns the current exchange rate between token A and token B.
@@ -179,6 +457,15 @@ class LiquidityPool:
         """
         return self.token_b_reserve / self.token_a_reserve
 
+    def get_reserves(self) -> Tuple[float, float]:
+        """
+        Returns the current reserves without building the full state dictionary.
+
+        Returns:
+            Tuple[float, float]: The reserves of token A and token B.
+        """
+        return self.token_a_reserve, self.token_b_reserve
+
     def get_pool_state(self) -> Dict[str, float]:
         """
         Retrieves the current state of the liquidity pool.
@@ -195,6 +482,71 @@ class LiquidityPool:
             "total_lp_tokens": self.total_lp_tokens
         }
 
+    def restore_state(self, state: Dict[str, float]) -> None:
+        """
+        Overwrites the pool state with one previously returned by `get_pool_state`.
+
+        The listener is notified of the resulting changes, so running totals kept by the owner of
+        the pool stay in sync.
+
+        Args:
+            state (Dict[str, float]): The reserves, k, fee totals and LP supply to restore.
+        """
+        deltas = (state["token_a_reserve"] - self.token_a_reserve, state["token_b_reserve"] - self.token_b_reserve,
+                  state["total_fees_a"] - self.total_fees_a, state["total_fees_b"] - self.total_fees_b)
+        self.version += 1
+        self.token_a_reserve = state["token_a_reserve"]
+        self.token_b_reserve = state["token_b_reserve"]
+        self.k = state["k"]
+        self.total_fees_a = state["total_fees_a"]
+        self.total_fees_b = state["total_fees_b"]
+        self.total_lp_tokens = state["total_lp_tokens"]
+        self.oracle.update(self.token_a_reserve, self.token_b_reserve)
+        self.version += 1
+        if self.listener is not None:
+            self.listener(*deltas)
+
+    def get_pool_snapshot(self) -> Dict[str, float]:
+        """
+        Returns a consistent copy of the pool state without taking any lock.
+
+        The read is retried until it observes the same even `version` before and after copying the
+        state, so it never mixes values from before and after a concurrent mutation.
+
+        Returns:
+            Dict[str, float]: The same fields as `get_pool_state`.
+        """
+        while True:
+            version = self.version
+            if version % 2 == 0:
+                state = self.get_pool_state()
+                if self.version == version:
+                    return state
+
+    def get_twap(self, window: float) -> Tuple[float, float]:
+        """
+        Returns the time-weighted average exchange rates over the last `window` seconds.
+
+        Like `get_pool_snapshot`, the read takes no lock and is retried until it does not overlap
+        a mutation.
+
+        Args:
+            window (float): The averaging window in seconds.
+
+        Returns:
+            Tuple[float, float]: The TWAP of token B per token A (the average of `get_exchange_rate`)
+            and of token A per token B.
+
+        Raises:
+            PriceOracleException: If the window is not positive or older than the kept observations.
+        """
+        while True:
+            version = self.version
+            if version % 2 == 0:
+                twap = self.oracle.twap(window)
+                if self.version == version:
+                    return twap
+
     # TODO: This formula assumes a 50/50 pool as in Uniswap v2.
     # TODO: For pools with different weights or multiple assets, the formula becomes more complex.
     # TODO: Commission earnings are not included in this calculation and should be considered separately.
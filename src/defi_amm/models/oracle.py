@@ -0,0 +1,173 @@
+import time
+from typing import Callable, Tuple
+
+import numpy as np
+
+from defi_amm.config import ORACLE_OBSERVATIONS
+
+_INITIAL_OBSERVATIONS = 8
+
+
+class PriceOracleException(ValueError):
+    """
+    Raised when a TWAP is requested for a window the oracle cannot answer.
+    """
+
+
+class PriceOracle:
+    """
+    Uniswap-v2-style cumulative price accumulators of a pool, with a ring buffer of observations.
+
+    The accumulators hold the time integral of each spot price: on every reserve change the price
+    in force since the previous change is multiplied by the elapsed time and added, in O(1). Each
+    update that advances the clock also records `(timestamp, cumulatives)` in a fixed-size ring, so
+    the cumulative price at any past moment covered by the ring is found by a binary search and a
+    linear interpolation, and a TWAP over any window is the difference of two such lookups divided
+    by the window. The ring starts small and doubles until it reaches its capacity, so pools that
+    rarely change do not pay for a full ring.
+
+    Attributes:
+        price_a_cumulative (float): Time integral of the price of token A in token B.
+        price_b_cumulative (float): Time integral of the price of token B in token A.
+        last_timestamp (float): The time of the last update.
+        clock (Callable[[], float]): Returns the current time in seconds.
+    """
+
+    __slots__ = ('clock', 'price_a_cumulative', 'price_b_cumulative', 'last_timestamp', '_price_a', '_price_b',
+                 '_capacity', '_timestamps', '_cumulatives', '_next', '_count')
+
+    def __init__(self, reserve_a: float, reserve_b: float, capacity: int = ORACLE_OBSERVATIONS,
+                 clock: Callable[[], float] = time.time):
+        """
+        Initializes the oracle at the pool's initial reserves.
+
+        Args:
+            reserve_a (float): The reserve of token A.
+            reserve_b (float): The reserve of token B.
+            capacity (int): The number of observations kept (default is `ORACLE_OBSERVATIONS`).
+            clock (Callable[[], float]): Returns the current time in seconds (default is `time.time`).
+        """
+        self.clock = clock
+        self.price_a_cumulative = 0.0
+        self.price_b_cumulative = 0.0
+        self.last_timestamp = clock()
+        self._price_a, self._price_b = self._spot_prices(reserve_a, reserve_b)
+        self._capacity = max(capacity, 2)
+        self._timestamps = np.zeros(min(self._capacity, _INITIAL_OBSERVATIONS))
+        self._cumulatives = np.zeros((len(self._timestamps), 2))
+        self._next = 0
+        self._count = 0
+        self._write()
+
+    @staticmethod
+    def _spot_prices(reserve_a: float, reserve_b: float) -> Tuple[float, float]:
+        return (reserve_b / reserve_a if reserve_a > 0 else 0.0,
+                reserve_a / reserve_b if reserve_b > 0 else 0.0)
+
+    def _write(self) -> None:
+        if self._count == len(self._timestamps) < self._capacity:
+            # The ring has not wrapped yet, so its observations are in chronological order from slot 0
+            size = min(2 * self._count, self._capacity)
+            self._timestamps = np.concatenate([self._timestamps, np.zeros(size - self._count)])
+            self._cumulatives = np.concatenate([self._cumulatives, np.zeros((size - self._count, 2))])
+            self._next = self._count
+        self._timestamps[self._next] = self.last_timestamp
+        self._cumulatives[self._next] = (self.price_a_cumulative, self.price_b_cumulative)
+        self._next = (self._next + 1) % len(self._timestamps)
+        self._count = min(self._count + 1, len(self._timestamps))
+
+    def update(self, reserve_a: float, reserve_b: float) -> None:
+        """
+        Accumulates the prices in force since the last update and switches to the new reserves.
+
+        Args:
+            reserve_a (float): The reserve of token A after the change.
+            reserve_b (float): The reserve of token B after the change.
+        """
+        now = self.clock()
+        elapsed = now - self.last_timestamp
+        if elapsed > 0:
+            self.price_a_cumulative += self._price_a * elapsed
+            self.price_b_cumulative += self._price_b * elapsed
+            self.last_timestamp = now
+            self._write()
+        self._price_a, self._price_b = self._spot_prices(reserve_a, reserve_b)
+
+    def cumulative_prices(self, timestamp: float) -> Tuple[float, float]:
+        """
+        Returns the values the accumulators had, or will have without further changes, at `timestamp`.
+
+        Args:
+            timestamp (float): The moment to evaluate.
+
+        Returns:
+            Tuple[float, float]: The cumulative prices of token A and token B.
+
+        Raises:
+            PriceOracleException: If `timestamp` is older than the oldest observation.
+        """
+        if timestamp >= self.last_timestamp:
+            elapsed = timestamp - self.last_timestamp
+            return self.price_a_cumulative + self._price_a * elapsed, self.price_b_cumulative + self._price_b * elapsed
+
+        capacity = len(self._timestamps)
+        oldest = (self._next - self._count) % capacity
+        if timestamp < self._timestamps[oldest]:
+            raise PriceOracleException("Requested time is older than the oldest price observation")
+
+        # Binary search for the last observation at or before `timestamp`, in chronological order
+        low, high = 0, self._count - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self._timestamps[(oldest + middle) % capacity] <= timestamp:
+                low = middle
+            else:
+                high = middle - 1
+        before = (oldest + low) % capacity
+        after = (before + 1) % capacity
+        start_time = self._timestamps[before]
+        # The cumulatives grow linearly between consecutive observations
+        fraction = (timestamp - start_time) / (self._timestamps[after] - start_time)
+        cumulatives = self._cumulatives[before] + fraction * (self._cumulatives[after] - self._cumulatives[before])
+        return float(cumulatives[0]), float(cumulatives[1])
+
+    def twap(self, window: float) -> Tuple[float, float]:
+        """
+        Returns the time-weighted average prices over the last `window` seconds.
+
+        Args:
+            window (float): The averaging window in seconds.
+
+        Returns:
+            Tuple[float, float]: The TWAP of token A in token B and of token B in token A.
+
+        Raises:
+            PriceOracleException: If the window is not positive or reaches past the oldest observation.
+        """
+        if window <= 0:
+            raise PriceOracleException("TWAP window must be positive")
+        now = self.clock()
+        end_a, end_b = self.cumulative_prices(now)
+        start_a, start_b = self.cumulative_prices(now - window)
+        return (end_a - start_a) / window, (end_b - start_b) / window
+
+    def get_state(self) -> tuple:
+        """
+        Returns a copy of the accumulators and observations, to pass to `restore_state`.
+
+        Returns:
+            tuple: An opaque copy of the oracle state.
+        """
+        return (self.price_a_cumulative, self.price_b_cumulative, self.last_timestamp, self._price_a, self._price_b,
+                self._timestamps.copy(), self._cumulatives.copy(), self._next, self._count)
+
+    def restore_state(self, state: tuple) -> None:
+        """
+        Resets the oracle to a state returned by `get_state`, discarding the observations made since.
+
+        Args:
+            state (tuple): The state to restore.
+        """
+        (self.price_a_cumulative, self.price_b_cumulative, self.last_timestamp, self._price_a, self._price_b,
+         timestamps, cumulatives, self._next, self._count) = state
+        self._timestamps, self._cumulatives = timestamps.copy(), cumulatives.copy()
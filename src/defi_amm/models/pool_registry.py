@@ -0,0 +1,199 @@
+import math
+from typing import Dict
+
+import numpy as np
+
+from defi_amm.models.liquidity_pool import LiquidityPool
+from defi_amm.models.oracle import PriceOracle
+from defi_amm.models.token_registry import TokenRegistry
+
+_FLOAT_COLUMNS = ('reserve_a', 'reserve_b', 'k', 'fee', 'fees_a', 'fees_b', 'lp_supply')
+_ID_COLUMNS = ('token_a_ids', 'token_b_ids')
+
+
+class PoolRegistry:
+    """
+    Columnar (struct-of-arrays) storage for the state of many liquidity pools.
+
+    Each pool occupies one row across a set of contiguous NumPy arrays, so aggregates over all
+    pools reduce to single vectorized operations. Rows are addressed by the index returned from
+    `add_pool`; arrays grow geometrically, so appending a pool is amortized O(1).
+
+    Attributes:
+        tokens (TokenRegistry): Maps token symbols to the integer IDs stored in the ID columns.
+        size (int): The number of pools stored.
+        token_a_ids (np.ndarray): Token ID of side A of each pool.
+        token_b_ids (np.ndarray): Token ID of side B of each pool.
+        reserve_a (np.ndarray): Reserve of token A of each pool.
+        reserve_b (np.ndarray): Reserve of token B of each pool.
+        k (np.ndarray): Constant product of each pool.
+        fee (np.ndarray): Swap fee of each pool.
+        fees_a (np.ndarray): Fees collected in token A by each pool.
+        fees_b (np.ndarray): Fees collected in token B by each pool.
+        lp_supply (np.ndarray): Total LP tokens minted by each pool.
+    """
+
+    def __init__(self, capacity: int = 64):
+        """
+        Initializes an empty registry.
+
+        Args:
+            capacity (int): The number of rows to preallocate (default is 64).
+        """
+        self.tokens = TokenRegistry()
+        self.size = 0
+        capacity = max(capacity, 1)
+        for name in _ID_COLUMNS:
+            setattr(self, name, np.zeros(capacity, dtype=np.int64))
+        for name in _FLOAT_COLUMNS:
+            setattr(self, name, np.zeros(capacity, dtype=np.float64))
+
+    @property
+    def capacity(self) -> int:
+        return len(self.reserve_a)
+
+    def _grow(self) -> None:
+        """
+        Doubles the capacity of every column, preserving the stored rows.
+        """
+        new_capacity = self.capacity * 2
+        for name in _ID_COLUMNS + _FLOAT_COLUMNS:
+            column = getattr(self, name)
+            grown = np.zeros(new_capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            setattr(self, name, grown)
+
+    def add_pool(self, token_a: str, token_b: str, token_a_reserve: float, token_b_reserve: float,
+                 fee: float = 0.003) -> int:
+        """
+        Appends a pool with the same initial state a new `LiquidityPool` would have.
+
+        Args:
+            token_a (str): The symbol of token A.
+            token_b (str): The symbol of token B.
+            token_a_reserve (float): Initial reserve of token A.
+            token_b_reserve (float): Initial reserve of token B.
+            fee (float): Swap fee as a decimal (default is 0.003, representing 0.3%).
+
+        Returns:
+            int: The row index of the new pool.
+        """
+        if self.size == self.capacity:
+            self._grow()
+        index = self.size
+        self.token_a_ids[index] = self.tokens.register(token_a)
+        self.token_b_ids[index] = self.tokens.register(token_b)
+        self.reserve_a[index] = token_a_reserve
+        self.reserve_b[index] = token_b_reserve
+        self.k[index] = token_a_reserve * token_b_reserve
+        self.fee[index] = fee
+        self.fees_a[index] = 0
+        self.fees_b[index] = 0
+        self.lp_supply[index] = math.sqrt(token_a_reserve * token_b_reserve)
+        self.size += 1
+        return index
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Returns a live view of the populated part of a column.
+
+        Args:
+            name (str): The column name, e.g. "reserve_a" or "token_b_ids".
+
+        Returns:
+            np.ndarray: A view of the first `size` rows; writes go straight to the registry.
+        """
+        return getattr(self, name)[:self.size]
+
+    def _sum_by_token(self, column_a: str, column_b: str) -> Dict[str, float]:
+        """
+        Sums a pair of per-side columns into per-token totals.
+
+        Args:
+            column_a (str): The column holding the side A amounts.
+            column_b (str): The column holding the side B amounts.
+
+        Returns:
+            Dict[str, float]: The totals keyed by token symbol.
+        """
+        n_tokens = len(self.tokens)
+        totals = (np.bincount(self.column('token_a_ids'), weights=self.column(column_a), minlength=n_tokens) +
+                  np.bincount(self.column('token_b_ids'), weights=self.column(column_b), minlength=n_tokens))
+        return dict(zip(self.tokens.symbols, totals.tolist()))
+
+    def total_value_locked(self) -> Dict[str, float]:
+        """
+        Sums the reserves of every pool per token.
+
+        Returns:
+            Dict[str, float]: The total amount of each token locked across all pools.
+        """
+        return self._sum_by_token('reserve_a', 'reserve_b')
+
+    def fees_earned(self) -> Dict[str, float]:
+        """
+        Sums the collected fees of every pool per token.
+
+        Returns:
+            Dict[str, float]: The total fees earned in each token across all pools.
+        """
+        return self._sum_by_token('fees_a', 'fees_b')
+
+    def create_view(self, index: int) -> 'PoolView':
+        """
+        Returns a `LiquidityPool` view backed by the given row.
+
+        Args:
+            index (int): The row index of the pool.
+
+        Returns:
+            PoolView: A pool object whose state lives in this registry.
+        """
+        return PoolView(self, index)
+
+
+def _column_property(name: str, doc: str) -> property:
+    """
+    Builds a property that reads and writes one registry column at the view's row.
+    """
+
+    def getter(self):
+        return getattr(self._registry, name)[self._index].item()
+
+    def setter(self, value):
+        getattr(self._registry, name)[self._index] = value
+
+    return property(getter, setter, doc=doc)
+
+
+class PoolView(LiquidityPool):
+    """
+    A `LiquidityPool` whose state is stored in a row of a `PoolRegistry`.
+
+    All `LiquidityPool` operations work unchanged; attribute reads and writes are redirected to the
+    registry columns, so vectorized aggregates over the registry always see the current state.
+    """
+
+    __slots__ = ('_registry', '_index')
+
+    token_a_reserve = _column_property('reserve_a', "The current reserve of token A in the pool.")
+    token_b_reserve = _column_property('reserve_b', "The current reserve of token B in the pool.")
+    k = _column_property('k', "The constant product of the reserves.")
+    fee = _column_property('fee', "The fee charged on swaps, expressed as a decimal fraction.")
+    total_fees_a = _column_property('fees_a', "The total fees collected in token A.")
+    total_fees_b = _column_property('fees_b', "The total fees collected in token B.")
+    total_lp_tokens = _column_property('lp_supply', "The total amount of LP tokens minted.")
+
+    def __init__(self, registry: PoolRegistry, index: int):
+        """
+        Initializes a view over an existing registry row.
+
+        Args:
+            registry (PoolRegistry): The registry holding the pool state.
+            index (int): The row index of the pool.
+        """
+        self._registry = registry
+        self._index = index
+        self.listener = None
+        self.version = 0
+        self.oracle = PriceOracle(self.token_a_reserve, self.token_b_reserve)
@@ -1,13 +1,40 @@
 import math
-from typing import Dict, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import numpy as np
 from defi_amm.models.amm import AMM
+from defi_amm.utils.rng import default_rng
 
 
 class RiskManagement:
-    def __init__(self, amm: AMM):
+    def __init__(self, amm: AMM, num_simulations: int = 10000, mean_return: float = 0.0001,
+                 std_return: float = 0.02, correlation: float = 0.5, rng: Optional[np.random.Generator] = None):
+        """
+        Initializes the risk manager for an AMM.
+
+        Args:
+            amm (AMM): The AMM whose pools are assessed.
+            num_simulations (int): Number of Monte Carlo scenarios in the shared shock matrix (default: 10000).
+            mean_return (float): Mean per-period token return of the shock model (default: 0.01%).
+            std_return (float): Per-period token return volatility of the shock model (default: 2%).
+            correlation (float): Pairwise correlation between token returns in the shock model, between 0
+                and 1 (default: 0.5).
+            rng (Optional[np.random.Generator]): The generator for all Monte Carlo draws; a freshly seeded one
+                is created if omitted.
+
+        Raises:
+            ValueError: If `correlation` is outside [0, 1].
+        """
+        if not 0 <= correlation <= 1:
+            raise ValueError("correlation must be between 0 and 1")
         self.amm = amm
+        self.num_simulations = num_simulations
+        self.mean_return = mean_return
+        self.std_return = std_return
+        self.correlation = correlation
+        self.rng = default_rng(rng)
+        self._shocks: Optional[np.ndarray] = None
+        self._shock_tokens: Dict[str, int] = {}
 
     def calculate_total_fees_earned(self) -> Dict[str, float]:
         """
@@ -33,14 +60,14 @@ class RiskManagement:
             float: The percentage return on the initial investment.
         """
         pool = self.amm.get_pool(token_a, token_b)
-        pool_state = pool.get_pool_state()
+        token_a_reserve, token_b_reserve = pool.get_reserves()
 
         # Calculate the share of the pool owned by the LP
-        lp_share = math.sqrt(initial_investment[0] * initial_investment[1]) / pool_state['total_lp_tokens']
+        lp_share = math.sqrt(initial_investment[0] * initial_investment[1]) / pool.total_lp_tokens
 
         # Calculate current value of LP's tokens
-        current_value_a = lp_share * pool_state['token_a_reserve']
-        current_value_b = lp_share * pool_state['token_b_reserve']
+        current_value_a = lp_share * token_a_reserve
+        current_value_b = lp_share * token_b_reserve
 
         # Convert all values to token_a for comparison
         initial_value = initial_investment[0] + initial_investment[1] / current_price_ratio
@@ -65,7 +92,7 @@ class RiskManagement:
             float: The VaR value representing the potential loss at the given confidence level.
         """
         pool = self.amm.get_pool(token_a, token_b)
-        pool_state = pool.get_pool_state()
+        token_a_reserve, token_b_reserve = pool.get_reserves()
 
         # Assume we have historical price data and can calculate daily returns
         # For this example, we'll use a normal distribution with arbitrary mean and std
@@ -73,10 +100,10 @@ class RiskManagement:
         std_return = 0.02  # 2% daily volatility
 
         # Generate random price changes
-        price_changes = np.random.normal(mean_return, std_return, num_simulations)
+        price_changes = self.rng.normal(mean_return, std_return, num_simulations)
 
         # Calculate potential losses
-        initial_value = pool_state['token_a_reserve'] + pool_state['token_b_reserve']
+        initial_value = token_a_reserve + token_b_reserve
         final_values = initial_value * (1 + price_changes)
         losses = initial_value - final_values
 
@@ -85,6 +112,158 @@ class RiskManagement:
 
         return var
 
+    def generate_shocks(self, tokens: List[str]) -> np.ndarray:
+        """
+        Draws a matrix of correlated token returns, one row per Monte Carlo scenario.
+
+        Returns follow a one-factor model: every token loads on a common market shock with weight
+        sqrt(correlation) and on its own idiosyncratic shock with weight sqrt(1 - correlation), so
+        returns are jointly normal with mean `mean_return`, volatility `std_return` and pairwise
+        correlation `correlation`.
+
+        Args:
+            tokens (List[str]): The tokens to draw returns for, in column order.
+
+        Returns:
+            np.ndarray: A `(num_simulations, len(tokens))` matrix of returns.
+        """
+        common = self.rng.standard_normal((self.num_simulations, 1))
+        idiosyncratic = self.rng.standard_normal((self.num_simulations, len(tokens)))
+        standard_normals = math.sqrt(self.correlation) * common + math.sqrt(1 - self.correlation) * idiosyncratic
+        return self.mean_return + self.std_return * standard_normals
+
+    def refresh_shocks(self) -> None:
+        """
+        Discards the shared shock matrix so the next portfolio risk calculation draws a new one.
+        """
+        self._shocks = None
+        self._shock_tokens = {}
+
+    def _get_shocks(self, tokens: List[str]) -> np.ndarray:
+        """
+        Returns the shared shock matrix, drawing it only when tokens not covered by it appear.
+        """
+        if self._shocks is None or any(token not in self._shock_tokens for token in tokens):
+            all_tokens = list(dict.fromkeys([*self._shock_tokens, *tokens]))
+            self._shocks = self.generate_shocks(all_tokens)
+            self._shock_tokens = {token: i for i, token in enumerate(all_tokens)}
+        return self._shocks
+
+    def calculate_portfolio_risk(self, confidence_level: float = 0.95) -> Dict[str, Any]:
+        """
+        Calculates VaR and CVaR for every pool and for the whole AMM in one vectorized pass.
+
+        All pools are revalued under the same pre-generated matrix of correlated token returns, so
+        diversification between pools is reflected in the portfolio figures and repeated calls do
+        not draw new random numbers (see `refresh_shocks`).
+
+        Args:
+            confidence_level (float): The confidence level for VaR and CVaR (default: 0.95).
+
+        Returns:
+            Dict[str, Any]: `pool_var` and `pool_cvar` map each pool key to its VaR and CVaR;
+            `portfolio_var` and `portfolio_cvar` are the figures for all pools combined.
+        """
+        pool_keys = list(self.amm.pools)
+        if not pool_keys:
+            return {'pool_var': {}, 'pool_cvar': {}, 'portfolio_var': 0.0, 'portfolio_cvar': 0.0}
+
+        pool_tokens = [self.amm.get_pool_tokens(pool_key) for pool_key in pool_keys]
+        shocks = self._get_shocks([token for pair in pool_tokens for token in pair])
+        token_a_index = np.array([self._shock_tokens[token_a] for token_a, _ in pool_tokens])
+        token_b_index = np.array([self._shock_tokens[token_b] for _, token_b in pool_tokens])
+        pools = self.amm.pools.values()
+        reserve_a = np.fromiter((pool.token_a_reserve for pool in pools), dtype=float, count=len(pool_keys))
+        reserve_b = np.fromiter((pool.token_b_reserve for pool in pools), dtype=float, count=len(pool_keys))
+
+        # Losses per scenario (rows) and pool (columns)
+        losses = -(shocks[:, token_a_index] * reserve_a + shocks[:, token_b_index] * reserve_b)
+        portfolio_losses = losses.sum(axis=1)
+
+        pool_var = np.percentile(losses, confidence_level * 100, axis=0)
+        tail = losses >= pool_var
+        pool_cvar = (losses * tail).sum(axis=0) / tail.sum(axis=0)
+        portfolio_var = np.percentile(portfolio_losses, confidence_level * 100)
+        portfolio_cvar = portfolio_losses[portfolio_losses >= portfolio_var].mean()
+
+        return {
+            'pool_var': dict(zip(pool_keys, pool_var.tolist())),
+            'pool_cvar': dict(zip(pool_keys, pool_cvar.tolist())),
+            'portfolio_var': float(portfolio_var),
+            'portfolio_cvar': float(portfolio_cvar)
+        }
+
+    def calculate_pool_var(self, token_a: str, token_b: str, confidence_level: float = 0.95) -> float:
+        """
+        Calculates the VaR of a single pool under the shared shock matrix.
+
+        The result equals the pool's entry in `calculate_portfolio_risk()['pool_var']`, but only the
+        two shock columns of the pool are read, so it costs O(num_simulations) regardless of the
+        number of pools. The matrix is drawn for the tokens of every pool when it does not yet cover
+        the pool's tokens, as `calculate_portfolio_risk` would.
+
+        Args:
+            token_a (str): Symbol of the first token in the pair.
+            token_b (str): Symbol of the second token in the pair.
+            confidence_level (float): The confidence level for VaR (default: 0.95).
+
+        Returns:
+            float: The VaR of the pool.
+
+        Raises:
+            AMMException: If the pool for the given token pair does not exist.
+        """
+        pool = self.amm.get_pool(token_a, token_b)
+        token_a, token_b = min(token_a, token_b), max(token_a, token_b)
+        if self._shocks is None or token_a not in self._shock_tokens or token_b not in self._shock_tokens:
+            self._get_shocks([token for pool_key in self.amm.pools for token in self.amm.get_pool_tokens(pool_key)])
+        reserve_a, reserve_b = pool.get_reserves()
+        losses = -(self._shocks[:, self._shock_tokens[token_a]] * reserve_a +
+                   self._shocks[:, self._shock_tokens[token_b]] * reserve_b)
+        return float(np.percentile(losses, confidence_level * 100))
+
+    def pool_var_interpolators(self, confidence_level: float = 0.95,
+                               resolution: int = 256) -> Dict[str, Callable[[np.ndarray, np.ndarray], np.ndarray]]:
+        """
+        Builds, for every pool, a function approximating its `calculate_pool_var` for many reserve pairs at once.
+
+        Under the shared shock matrix a pool's VaR is positively homogeneous in its reserves: scaling
+        both reserves scales the VaR. It is therefore evaluated once on a grid of reserve directions
+        and interpolated by the direction of each reserve pair, times its magnitude, which makes a VaR
+        per simulation step cost O(1) instead of a percentile over every scenario.
+
+        The result is exact on the grid directions and linearly interpolated between them. As a
+        function of the direction angle the VaR is Lipschitz with constant `M`, the largest norm of a
+        pool's pair of shocks over the scenarios, so the error is at most
+        `hypot(reserve_a, reserve_b) * M * pi / (4 * resolution)`. With the default resolution and a
+        daily volatility of a few percent the bound is about 1% of the VaR.
+
+        Args:
+            confidence_level (float): The confidence level for VaR (default: 0.95).
+            resolution (int): The number of direction intervals evaluated exactly (default: 256).
+
+        Returns:
+            Dict[str, Callable[[np.ndarray, np.ndarray], np.ndarray]]: Maps each pool key to a function
+            taking arrays of token A and token B reserves and returning the VaRs.
+        """
+        pool_tokens = {pool_key: self.amm.get_pool_tokens(pool_key) for pool_key in self.amm.pools}
+        shocks = self._get_shocks([token for pair in pool_tokens.values() for token in pair])
+        angles = np.linspace(0, np.pi / 2, resolution + 1)
+        directions = np.stack([np.cos(angles), np.sin(angles)])
+
+        def interpolator(var_curve: np.ndarray) -> Callable[[np.ndarray, np.ndarray], np.ndarray]:
+            def interpolate(reserves_a: np.ndarray, reserves_b: np.ndarray) -> np.ndarray:
+                return np.hypot(reserves_a, reserves_b) * np.interp(np.arctan2(reserves_b, reserves_a), angles,
+                                                                    var_curve)
+            return interpolate
+
+        interpolators = {}
+        for pool_key, (token_a, token_b) in pool_tokens.items():
+            token_shocks = shocks[:, [self._shock_tokens[token_a], self._shock_tokens[token_b]]]
+            var_curve = np.percentile(-(token_shocks @ directions), confidence_level * 100, axis=0)
+            interpolators[pool_key] = interpolator(var_curve)
+        return interpolators
+
     def implement_stop_loss(self, token_a: str, token_b: str, stop_loss_percentage: float,
                             initial_value: float = None) -> bool:
         """
@@ -100,13 +279,13 @@ class RiskManagement:
             implement_stop_loss('token_a', 'token_b', 0.1, 1000)
         """
         pool = self.amm.get_pool(token_a, token_b)
-        pool_state = pool.get_pool_state()
+        token_a_reserve, token_b_reserve = pool.get_reserves()
 
         # Use the provided initial_value or calculate it based on an assumed starting condition
         if initial_value is None:
-            initial_value = pool_state['token_a_reserve'] + pool_state['token_b_reserve']
+            initial_value = token_a_reserve + token_b_reserve
 
-        current_value = pool_state['token_a_reserve'] + pool_state['token_b_reserve']
+        current_value = token_a_reserve + token_b_reserve
 
         if (initial_value - current_value) / initial_value >= stop_loss_percentage:
             # Trigger stop-loss
@@ -128,17 +307,17 @@ class RiskManagement:
             Tuple[float, float]: The suggested position sizes for token_a and token_b.
         """
         pool = self.amm.get_pool(token_a, token_b)
-        pool_state = pool.get_pool_state()
+        token_a_reserve, token_b_reserve = pool.get_reserves()
 
         # Calculate the total value of the pool
-        total_value = pool_state['token_a_reserve'] + pool_state['token_b_reserve']
+        total_value = token_a_reserve + token_b_reserve
 
         # Calculate the risk amount
         risk_amount = total_value * risk_factor
 
         # Calculate the position sizes based on the current ratio in the pool
-        ratio_a = pool_state['token_a_reserve'] / total_value
-        ratio_b = pool_state['token_b_reserve'] / total_value
+        ratio_a = token_a_reserve / total_value
+        ratio_b = token_b_reserve / total_value
 
         position_a = risk_amount * ratio_a
         position_b = risk_amount * ratio_b
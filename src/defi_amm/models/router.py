@@ -0,0 +1,360 @@
+import math
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from defi_amm.config import ROUTER_PATH_CACHE_SIZE
+from defi_amm.models.amm import AMM, AMMException
+
+MAX_HOPS = 4
+
+
+class RouteLeg(NamedTuple):
+    """
+    A single path of a route and the amount sent through it.
+
+    Attributes:
+        path (Tuple[str, ...]): The tokens visited, from the input token to the output token.
+        amount_in (float): The amount of the input token sent along the path.
+        amount_out (float): The amount of the output token received at the end of the path.
+    """
+    path: Tuple[str, ...]
+    amount_in: float
+    amount_out: float
+
+
+class RouteQuote(NamedTuple):
+    """
+    A swap split across one or more paths.
+
+    Attributes:
+        legs (Tuple[RouteLeg, ...]): The paths used and the amounts routed through each of them.
+        amount_in (float): The total amount of the input token.
+        amount_out (float): The total amount of the output token received.
+    """
+    legs: Tuple[RouteLeg, ...]
+    amount_in: float
+    amount_out: float
+
+
+class _PathSet:
+    """
+    Candidate paths between two tokens, compiled into index arrays so they can be quoted together.
+
+    Attributes:
+        paths (List[Tuple[str, ...]]): The candidate paths.
+        hops (List[List[Tuple[str, bool]]]): For each path, the `(pool_key, b_to_a)` of every hop.
+        pool_keys (List[str]): The distinct pools used by any path.
+        pool_index (np.ndarray): Index into `pool_keys` per path and hop.
+        b_to_a (np.ndarray): True where the hop sells token B of its pool.
+        active (np.ndarray): False for the padding hops of paths shorter than the longest one.
+    """
+
+    def __init__(self, paths: List[Tuple[str, ...]], adjacency: Dict[str, Dict[str, str]]):
+        self.paths = paths
+        self.hops = [[(adjacency[token_from][token_to], token_from > token_to)
+                      for token_from, token_to in zip(path, path[1:])] for path in paths]
+
+        positions: Dict[str, int] = {}
+        max_len = max((len(hops) for hops in self.hops), default=0)
+        self.pool_index = np.zeros((len(paths), max_len), dtype=np.int64)
+        self.b_to_a = np.zeros((len(paths), max_len), dtype=bool)
+        self.active = np.zeros((len(paths), max_len), dtype=bool)
+        for i, hops in enumerate(self.hops):
+            for j, (pool_key, b_to_a) in enumerate(hops):
+                self.pool_index[i, j] = positions.setdefault(pool_key, len(positions))
+                self.b_to_a[i, j] = b_to_a
+                self.active[i, j] = True
+        self.pool_keys = list(positions)
+
+
+class SwapRouter:
+    """
+    Finds the best way to swap between two tokens across the pools of an AMM.
+
+    The router keeps an adjacency map of the token graph, updated as pools are created and dropped,
+    and caches the candidate paths between recently routed pairs of tokens; a pool change only
+    drops the cached pairs it can affect. Quotes are computed with the same constant-product
+    expression as `LiquidityPool.quote`, without modifying any pool; all candidate paths of a pair
+    are evaluated together with vectorized NumPy operations.
+
+    Attributes:
+        amm (AMM): The AMM whose pools are routed through.
+        max_hops (int): The default maximum number of pools a path may traverse.
+        path_cache_size (int): The maximum number of token pairs whose candidate paths are cached.
+        adjacency (Dict[str, Dict[str, str]]): For each token, the pool key reaching each neighbor token.
+    """
+
+    def __init__(self, amm: AMM, max_hops: int = 3, path_cache_size: int = ROUTER_PATH_CACHE_SIZE):
+        """
+        Initializes the router from the pools currently in the AMM and subscribes to new pools.
+
+        Args:
+            amm (AMM): The AMM to route through.
+            max_hops (int): The default maximum number of hops, between 1 and 4 (default is 3).
+            path_cache_size (int): The maximum number of cached path sets, the least recently used
+                being dropped first (default is `ROUTER_PATH_CACHE_SIZE`).
+
+        Raises:
+            AMMException: If `max_hops` is out of range.
+        """
+        self.amm = amm
+        self.max_hops = self._validate_max_hops(max_hops)
+        self.path_cache_size = path_cache_size
+        self.adjacency: Dict[str, Dict[str, str]] = {}
+        self._path_cache: "OrderedDict[Tuple[str, str, int], _PathSet]" = OrderedDict()
+
+        for pool_key in amm.pools:
+            self._add_edge(pool_key, *amm.get_pool_tokens(pool_key))
+        amm.pool_listeners.append(self._on_pool_created)
+        amm.pool_removed_listeners.append(self._on_pool_removed)
+
+    @staticmethod
+    def _validate_max_hops(max_hops: int) -> int:
+        if not 1 <= max_hops <= MAX_HOPS:
+            raise AMMException(f"max_hops must be between 1 and {MAX_HOPS}")
+        return max_hops
+
+    def _add_edge(self, pool_key: str, token_a: str, token_b: str) -> None:
+        self.adjacency.setdefault(token_a, {})[token_b] = pool_key
+        self.adjacency.setdefault(token_b, {})[token_a] = pool_key
+
+    def _distances(self, token: str, max_hops: int = MAX_HOPS) -> Dict[str, int]:
+        """
+        Returns the hop distance from `token` to every token less than `max_hops` hops away.
+        """
+        distance = {token: 0}
+        frontier = [token]
+        for depth in range(1, max_hops):
+            next_frontier = []
+            for current in frontier:
+                for neighbor in self.adjacency.get(current, ()):
+                    if neighbor not in distance:
+                        distance[neighbor] = depth
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+        return distance
+
+    def _on_pool_created(self, pool_key: str, token_a: str, token_b: str) -> None:
+        """
+        Adds the new pool to the token graph and drops the cached paths it may extend.
+
+        A path through the new pool goes from `token_in` to one of its tokens, across the pool and on
+        to `token_out`, so only the pairs for which that fits within the hop limit are dropped.
+        """
+        self._add_edge(pool_key, token_a, token_b)
+        from_a, from_b = self._distances(token_a), self._distances(token_b)
+
+        def reachable(token_in: str, token_out: str, max_hops: int) -> bool:
+            return (from_a.get(token_in, MAX_HOPS) + from_b.get(token_out, MAX_HOPS) < max_hops or
+                    from_b.get(token_in, MAX_HOPS) + from_a.get(token_out, MAX_HOPS) < max_hops)
+
+        for cache_key in [cache_key for cache_key in self._path_cache if reachable(*cache_key)]:
+            del self._path_cache[cache_key]
+
+    def _on_pool_removed(self, pool_key: str, token_a: str, token_b: str) -> None:
+        """
+        Removes a dropped pool from the token graph and drops the cached paths that may use it.
+        """
+        for token, other in ((token_a, token_b), (token_b, token_a)):
+            neighbors = self.adjacency.get(token, {})
+            if neighbors.get(other) == pool_key:
+                del neighbors[other]
+                if not neighbors:
+                    del self.adjacency[token]
+        for cache_key in [cache_key for cache_key, path_set in self._path_cache.items()
+                          if pool_key in path_set.pool_keys]:
+            del self._path_cache[cache_key]
+
+    def find_paths(self, token_in: str, token_out: str, max_hops: Optional[int] = None) -> List[Tuple[str, ...]]:
+        """
+        Lists every simple path between two tokens within the hop limit.
+
+        Args:
+            token_in (str): The token being sold.
+            token_out (str): The token being bought.
+            max_hops (Optional[int]): The maximum number of hops, defaults to the router's limit.
+
+        Returns:
+            List[Tuple[str, ...]]: The candidate paths, each starting at `token_in` and ending at `token_out`.
+        """
+        return list(self._get_path_set(token_in, token_out, max_hops).paths)
+
+    def _get_path_set(self, token_in: str, token_out: str, max_hops: Optional[int]) -> _PathSet:
+        max_hops = self.max_hops if max_hops is None else self._validate_max_hops(max_hops)
+        cache_key = (token_in, token_out, max_hops)
+        path_set = self._path_cache.get(cache_key)
+        if path_set is None:
+            path_set = _PathSet(self._enumerate_paths(token_in, token_out, max_hops), self.adjacency)
+            self._path_cache[cache_key] = path_set
+            if len(self._path_cache) > self.path_cache_size:
+                self._path_cache.popitem(last=False)
+        else:
+            self._path_cache.move_to_end(cache_key)
+        return path_set
+
+    def _enumerate_paths(self, token_in: str, token_out: str, max_hops: int) -> List[Tuple[str, ...]]:
+        """
+        Depth-first enumeration of simple paths, pruned by the hop distance to `token_out`.
+        """
+        distance = self._distances(token_out, max_hops)
+        paths = []
+
+        def extend(path: Tuple[str, ...]) -> None:
+            remaining = max_hops - (len(path) - 1)
+            for neighbor in self.adjacency.get(path[-1], ()):
+                if neighbor == token_out:
+                    paths.append(path + (neighbor,))
+                elif neighbor not in path and distance.get(neighbor, max_hops) < remaining:
+                    extend(path + (neighbor,))
+
+        if token_in != token_out and token_in in self.adjacency:
+            extend((token_in,))
+        return paths
+
+    def _quote_path_set(self, path_set: _PathSet, amount: float) -> np.ndarray:
+        """
+        Quotes the same input amount along every path of a path set at once.
+
+        Returns:
+            np.ndarray: The output of each path, NaN where a hop would be rejected.
+        """
+        pools = [self.amm.pools[pool_key] for pool_key in path_set.pool_keys]
+        reserve_a = np.array([pool.token_a_reserve for pool in pools], dtype=float)[path_set.pool_index]
+        reserve_b = np.array([pool.token_b_reserve for pool in pools], dtype=float)[path_set.pool_index]
+        k = np.array([pool.k for pool in pools], dtype=float)[path_set.pool_index]
+        fee = np.array([pool.fee for pool in pools], dtype=float)[path_set.pool_index]
+        reserve_in = np.where(path_set.b_to_a, reserve_b, reserve_a)
+        reserve_out = np.where(path_set.b_to_a, reserve_a, reserve_b)
+
+        amounts = np.full(len(path_set.paths), amount, dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for hop in range(path_set.active.shape[1]):
+                out = reserve_out[:, hop] - k[:, hop] / (reserve_in[:, hop] + amounts * (1 - fee[:, hop]))
+                out = np.where(out > 0, out, np.nan)
+                amounts = np.where(path_set.active[:, hop], out, amounts)
+        return amounts
+
+    def _simulate(self, hops: List[Tuple[str, bool]], amount: float, state: Dict[str, List[float]],
+                  commit: bool) -> float:
+        """
+        Quotes one path against a hypothetical pool state, optionally applying the swaps to it.
+
+        Args:
+            hops (List[Tuple[str, bool]]): The `(pool_key, b_to_a)` of every hop.
+            amount (float): The input amount.
+            state (Dict[str, List[float]]): `[reserve_a, reserve_b, k, fee]` per pool key, filled lazily.
+            commit (bool): If True, the reserves in `state` are updated as the swaps would update the pools.
+
+        Returns:
+            float: The output amount, NaN if any hop would be rejected.
+        """
+        for pool_key, b_to_a in hops:
+            if pool_key not in state:
+                pool = self.amm.pools[pool_key]
+                state[pool_key] = [pool.token_a_reserve, pool.token_b_reserve, pool.k, pool.fee]
+            reserve_a, reserve_b, k, fee = state[pool_key]
+            if b_to_a:
+                out = reserve_a - k / (reserve_b + amount * (1 - fee))
+                new_reserves = (reserve_a - out, reserve_b + amount)
+            else:
+                out = reserve_b - k / (reserve_a + amount * (1 - fee))
+                new_reserves = (reserve_a + amount, reserve_b - out)
+            if not out > 0:
+                return math.nan
+            if commit:
+                state[pool_key][:2] = new_reserves
+            amount = out
+        return amount
+
+    def quote_best_path(self, token_in: str, token_out: str, amount: float,
+                        max_hops: Optional[int] = None) -> RouteQuote:
+        """
+        Quotes the single path that returns the most `token_out` for `amount`.
+
+        Args:
+            token_in (str): The token being sold.
+            token_out (str): The token being bought.
+            amount (float): The amount of `token_in` to sell.
+            max_hops (Optional[int]): The maximum number of hops, defaults to the router's limit.
+
+        Returns:
+            RouteQuote: A quote with a single leg.
+
+        Raises:
+            AMMException: If no path can execute the swap.
+        """
+        path_set = self._get_path_set(token_in, token_out, max_hops)
+        outputs = self._quote_path_set(path_set, amount)
+        if not np.isfinite(outputs).any():
+            raise AMMException("No route found")
+        best = int(np.nanargmax(outputs))
+        leg = RouteLeg(path_set.paths[best], amount, float(outputs[best]))
+        return RouteQuote((leg,), amount, leg.amount_out)
+
+    def quote_split(self, token_in: str, token_out: str, amount: float, max_hops: Optional[int] = None,
+                    max_routes: int = 3, steps: int = 20) -> RouteQuote:
+        """
+        Quotes a swap split across up to `max_routes` paths.
+
+        The best paths for the full amount are selected first; the amount is then allocated to them
+        in `steps` equal chunks, each chunk going to the path with the highest marginal output given
+        the chunks already allocated (paths sharing a pool see each other's impact).
+
+        Args:
+            token_in (str): The token being sold.
+            token_out (str): The token being bought.
+            amount (float): The amount of `token_in` to sell.
+            max_hops (Optional[int]): The maximum number of hops, defaults to the router's limit.
+            max_routes (int): The maximum number of paths to split across (default is 3).
+            steps (int): The number of chunks the amount is allocated in (default is 20).
+
+        Returns:
+            RouteQuote: A quote with one leg per path that received part of the amount.
+
+        Raises:
+            AMMException: If no path can execute the swap.
+        """
+        path_set = self._get_path_set(token_in, token_out, max_hops)
+        outputs = self._quote_path_set(path_set, amount)
+        ranked = [i for i in np.argsort(-np.nan_to_num(outputs, nan=-np.inf))[:max_routes] if np.isfinite(outputs[i])]
+        if not ranked:
+            raise AMMException("No route found")
+
+        chunk = amount / steps
+        allocation = dict.fromkeys(ranked, 0.0)
+        state: Dict[str, List[float]] = {}
+        for _ in range(steps):
+            marginal = {i: self._simulate(path_set.hops[i], chunk, state, commit=False) for i in ranked}
+            best = max(ranked, key=lambda i: -math.inf if math.isnan(marginal[i]) else marginal[i])
+            if math.isnan(marginal[best]):
+                raise AMMException("No route found")
+            self._simulate(path_set.hops[best], chunk, state, commit=True)
+            allocation[best] += chunk
+
+        legs = []
+        state = {}
+        for i in ranked:
+            if allocation[i] > 0:
+                amount_out = self._simulate(path_set.hops[i], allocation[i], state, commit=True)
+                legs.append(RouteLeg(path_set.paths[i], allocation[i], amount_out))
+        return RouteQuote(tuple(legs), amount, sum(leg.amount_out for leg in legs))
+
+    def execute(self, route: RouteQuote) -> float:
+        """
+        Executes a quoted route through `AMM.swap`, leg by leg and hop by hop.
+
+        Args:
+            route (RouteQuote): The route to execute.
+
+        Returns:
+            float: The total amount of the output token received.
+        """
+        total_out = 0.0
+        for leg in route.legs:
+            amount = leg.amount_in
+            for token_from, token_to in zip(leg.path, leg.path[1:]):
+                amount = self.amm.swap(token_from, token_to, amount)
+            total_out += amount
+        return total_out
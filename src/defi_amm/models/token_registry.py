@@ -0,0 +1,70 @@
+from typing import Dict, List, Optional
+
+
+class TokenRegistry:
+    """
+    Assigns small, dense integer IDs to token symbols.
+
+    IDs are handed out in registration order starting at zero, so they can be used directly as
+    indices into NumPy arrays (e.g. with `np.bincount`).
+
+    Attributes:
+        symbols (List[str]): The registered symbols, indexed by their ID.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty registry.
+        """
+        self._ids: Dict[str, int] = {}
+        self.symbols: List[str] = []
+
+    def register(self, symbol: str) -> int:
+        """
+        Returns the ID of a symbol, registering it first if it is new.
+
+        Args:
+            symbol (str): The token symbol.
+
+        Returns:
+            int: The integer ID of the token.
+        """
+        token_id = self._ids.get(symbol)
+        if token_id is None:
+            token_id = len(self.symbols)
+            self._ids[symbol] = token_id
+            self.symbols.append(symbol)
+        return token_id
+
+    def get_id(self, symbol: str) -> int:
+        """
+        Returns the ID of an already registered symbol.
+
+        Args:
+            symbol (str): The token symbol.
+
+        Returns:
+            int: The integer ID of the token.
+
+        Raises:
+            KeyError: If the symbol has not been registered.
+        """
+        return self._ids[symbol]
+
+    def find(self, symbol: str) -> Optional[int]:
+        """
+        Returns the ID of a symbol, or None if it has not been registered.
+
+        Args:
+            symbol (str): The token symbol.
+
+        Returns:
+            Optional[int]: The integer ID of the token, if any.
+        """
+        return self._ids.get(symbol)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._ids
+
+    def __len__(self) -> int:
+        return len(self.symbols)
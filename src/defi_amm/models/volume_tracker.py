@@ -0,0 +1,168 @@
+import copy
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from defi_amm.config import VOLUME_BUCKETS, VOLUME_WINDOWS
+
+
+class _WindowCounter:
+    """
+    Ring of equal-width time buckets whose sum is the volume of the most recent window.
+
+    Buckets that fall out of the window are subtracted from the running total as time advances,
+    so both adding volume and reading the windowed sum take amortized O(1) time. The window is
+    resolved to whole buckets: the sum covers the current bucket and the `num_buckets - 1` before it.
+    """
+
+    def __init__(self, window: float, num_buckets: int):
+        self.bucket_width = window / num_buckets
+        self.buckets: List[float] = [0.0] * num_buckets
+        self.total = 0.0
+        self.current_bucket: Optional[int] = None
+
+    def _advance(self, timestamp: float) -> int:
+        """
+        Expires the buckets older than the window ending at `timestamp` and returns its bucket slot.
+        """
+        bucket = math.floor(timestamp / self.bucket_width)
+        num_buckets = len(self.buckets)
+        if self.current_bucket is None:
+            self.current_bucket = bucket
+        elif bucket > self.current_bucket:
+            if bucket - self.current_bucket >= num_buckets:
+                self.buckets = [0.0] * num_buckets
+                self.total = 0.0
+            else:
+                for expired in range(self.current_bucket + 1, bucket + 1):
+                    slot = expired % num_buckets
+                    self.total -= self.buckets[slot]
+                    self.buckets[slot] = 0.0
+            self.current_bucket = bucket
+        # Timestamps behind the current bucket (a clock going backwards) count towards the current one
+        return self.current_bucket % num_buckets
+
+    def add(self, timestamp: float, volume: float) -> None:
+        slot = self._advance(timestamp)
+        self.buckets[slot] += volume
+        self.total += volume
+
+    def sum(self, timestamp: float) -> float:
+        self._advance(timestamp)
+        return max(self.total, 0.0)
+
+
+class VolumeTracker:
+    """
+    Executed swap volume per pool over sliding time windows.
+
+    Every pool keeps one ring of time buckets per tracked window (by default 1 minute, 1 hour and
+    24 hours), so recording a swap and querying a window are both O(1) regardless of how many swaps
+    happened in it. The tracker is shared by all pools of an AMM, whatever lock guards each pool, so
+    its counters are guarded by a lock of their own.
+
+    Attributes:
+        windows (List[float]): The tracked window lengths in seconds.
+        num_buckets (int): The number of buckets each window is divided into.
+        clock (Callable[[], float]): Returns the current time in seconds.
+    """
+
+    def __init__(self, windows: Iterable[float] = VOLUME_WINDOWS, num_buckets: int = VOLUME_BUCKETS,
+                 clock: Callable[[], float] = time.time):
+        """
+        Initializes an empty tracker.
+
+        Args:
+            windows (Iterable[float]): The window lengths in seconds (default is `VOLUME_WINDOWS`).
+            num_buckets (int): The number of buckets per window; the window is resolved to
+                `window / num_buckets` seconds (default is `VOLUME_BUCKETS`).
+            clock (Callable[[], float]): Returns the current time in seconds (default is `time.time`).
+        """
+        self.windows = list(windows)
+        self.num_buckets = num_buckets
+        self.clock = clock
+        self._counters: Dict[str, Dict[float, _WindowCounter]] = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        # Locks cannot be pickled; a copy starts with a lock of its own
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _pool_counters(self, pool_key: str) -> Dict[float, _WindowCounter]:
+        counters = self._counters.get(pool_key)
+        if counters is None:
+            counters = self._counters.setdefault(
+                pool_key, {window: _WindowCounter(window, self.num_buckets) for window in self.windows})
+        return counters
+
+    def record(self, pool_key: str, volume: float, timestamp: Optional[float] = None) -> None:
+        """
+        Adds the volume of an executed swap to every window of a pool.
+
+        Args:
+            pool_key (str): The key of the pool the swap executed in.
+            volume (float): The swap volume.
+            timestamp (Optional[float]): The time of the swap; the clock's current time if None.
+        """
+        timestamp = self.clock() if timestamp is None else timestamp
+        with self._lock:
+            for counter in self._pool_counters(pool_key).values():
+                counter.add(timestamp, volume)
+
+    def volume(self, pool_key: str, window: float, timestamp: Optional[float] = None) -> float:
+        """
+        Returns the volume a pool traded during the window ending at `timestamp`.
+
+        Args:
+            pool_key (str): The key of the pool.
+            window (float): One of the tracked window lengths, in seconds.
+            timestamp (Optional[float]): The end of the window; the clock's current time if None.
+
+        Returns:
+            float: The recorded volume, 0 for a pool without swaps.
+
+        Raises:
+            ValueError: If `window` is not tracked.
+        """
+        if window not in self.windows:
+            raise ValueError(f"Untracked volume window {window}s, expected one of {self.windows}")
+        timestamp = self.clock() if timestamp is None else timestamp
+        with self._lock:
+            counters = self._counters.get(pool_key)
+            return 0.0 if counters is None else counters[window].sum(timestamp)
+
+    def get_state(self, pool_key: str) -> Optional[Dict[float, _WindowCounter]]:
+        """
+        Returns a copy of the counters of a pool, to pass to `restore_state`.
+
+        Args:
+            pool_key (str): The key of the pool.
+
+        Returns:
+            Optional[Dict[float, _WindowCounter]]: The copied counters, or None for a pool without swaps.
+        """
+        with self._lock:
+            counters = self._counters.get(pool_key)
+            return None if counters is None else copy.deepcopy(counters)
+
+    def restore_state(self, pool_key: str, state: Optional[Dict[float, _WindowCounter]]) -> None:
+        """
+        Resets the counters of a pool to a state returned by `get_state`, discarding the volume recorded since.
+
+        Args:
+            pool_key (str): The key of the pool.
+            state (Optional[Dict[float, _WindowCounter]]): The counters to restore.
+        """
+        state = None if state is None else copy.deepcopy(state)
+        with self._lock:
+            if state is None:
+                self._counters.pop(pool_key, None)
+            else:
+                self._counters[pool_key] = state
@@ -1,71 +1,214 @@
-from defi_amm.main import app, amm, risk_management, transaction_history
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from defi_amm.config import BATCH_MAX_OPERATIONS, HISTORY_PAGE_SIZE, HISTORY_MAX_PAGE_SIZE
+from defi_amm.main import app, amm, risk_management, pool_locks, transaction_history, write_ahead_log
+from defi_amm.models.amm import AMM
+from defi_amm.storage.wal import ADD_LIQUIDITY, REMOVE_LIQUIDITY, SWAP
 from flask import request, jsonify
 
 
-@app.route('/add_liquidity', methods=['POST'])
-def add_liquidity():
-    data = request.json
-    token_a = data['token_a']
-    token_b = data['token_b']
-    amount_a = float(data['amount_a'])
-    amount_b = float(data['amount_b'])
+def _pool_key(token_a: str, token_b: str) -> str:
+    return AMM._get_pool_key(token_a, token_b)
 
-    try:
+
+class _Operation(NamedTuple):
+    type: str
+    tokens: Tuple[str, str]
+    args: Tuple[float, ...]
+
+
+def _parse_operation(data: Dict[str, Any]) -> _Operation:
+    """
+    Validates a swap or liquidity operation and extracts its token pair and numeric arguments.
+    """
+    op_type = data['type']
+    if op_type == 'add_liquidity':
+        return _Operation(op_type, (data['token_a'], data['token_b']),
+                          (float(data['amount_a']), float(data['amount_b'])))
+    if op_type == 'remove_liquidity':
+        return _Operation(op_type, (data['token_a'], data['token_b']), (float(data['lp_tokens']),))
+    if op_type == 'swap':
+        return _Operation(op_type, (data['token_from'], data['token_to']), (float(data['amount']),))
+    raise ValueError(f"Unknown operation type: {op_type}")
+
+
+def _apply_operation(operation: _Operation) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Executes an operation against the AMM; the caller must hold the lock of its pool.
+
+    Returns the response fields and the transaction history record.
+    """
+    token_a, token_b = operation.tokens
+    if operation.type == 'add_liquidity':
+        amount_a, amount_b = operation.args
         lp_tokens = amm.add_liquidity_with_incentive(token_a, token_b, amount_a, amount_b)
-        transaction_history.setdefault(f"{token_a}-{token_b}", []).append({
+        return {"lp_tokens": lp_tokens}, {
             "type": "add_liquidity",
             "token_a": token_a,
             "token_b": token_b,
             "amount_a": amount_a,
             "amount_b": amount_b,
             "lp_tokens": lp_tokens
-        })
-        return jsonify({"success": True, "lp_tokens": lp_tokens}), 200
-    except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 400
-
-
-@app.route('/remove_liquidity', methods=['POST'])
-def remove_liquidity():
-    data = request.json
-    token_a = data['token_a']
-    token_b = data['token_b']
-    lp_tokens = float(data['lp_tokens'])
-
-    try:
+        }
+    if operation.type == 'remove_liquidity':
+        lp_tokens, = operation.args
         amount_a, amount_b = amm.remove_liquidity(token_a, token_b, lp_tokens)
-        transaction_history.setdefault(f"{token_a}-{token_b}", []).append({
+        return {"amount_a": amount_a, "amount_b": amount_b}, {
             "type": "remove_liquidity",
             "token_a": token_a,
             "token_b": token_b,
             "lp_tokens": lp_tokens,
             "amount_a": amount_a,
             "amount_b": amount_b
-        })
-        return jsonify({"success": True, "amount_a": amount_a, "amount_b": amount_b}), 200
+        }
+    amount, = operation.args
+    amount_out = amm.swap(token_a, token_b, amount)
+    return {"amount_out": amount_out}, {
+        "type": "swap",
+        "token_from": token_a,
+        "token_to": token_b,
+        "amount_in": amount,
+        "amount_out": amount_out
+    }
+
+
+_LOG_OPERATIONS = {'add_liquidity': ADD_LIQUIDITY, 'remove_liquidity': REMOVE_LIQUIDITY, 'swap': SWAP}
+
+
+def _log_operation(operation: _Operation) -> Optional[int]:
+    """
+    Appends an applied operation to the write-ahead log; the caller must hold the lock of its pool.
+
+    Returns the LSN to commit, or None if the log is disabled.
+    """
+    if write_ahead_log is None:
+        return None
+    return write_ahead_log.append(_LOG_OPERATIONS[operation.type], *operation.tokens, *operation.args)
+
+
+def _commit(lsn: Optional[int]) -> None:
+    """
+    Waits until the logged operations up to `lsn` are durable, and snapshots the AMM when due.
+
+    Called after releasing the pool locks, so concurrent requests share one fsync.
+    """
+    if write_ahead_log is None or lsn is None:
+        return
+    write_ahead_log.wait_durable(lsn)
+    if write_ahead_log.needs_checkpoint:
+        with pool_locks.lock_all():
+            if write_ahead_log.needs_checkpoint:
+                write_ahead_log.checkpoint(amm)
+
+
+def _single_operation(data: Dict[str, Any]):
+    try:
+        operation = _parse_operation(data)
+        with pool_locks.lock(*operation.tokens):
+            result, record = _apply_operation(operation)
+            transaction_history.append(_pool_key(*operation.tokens), record)
+            lsn = _log_operation(operation)
+        _commit(lsn)
+        return jsonify({"success": True, **result}), 200
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 400
 
 
+@app.route('/add_liquidity', methods=['POST'])
+def add_liquidity():
+    return _single_operation({**request.json, "type": "add_liquidity"})
+
+
+@app.route('/remove_liquidity', methods=['POST'])
+def remove_liquidity():
+    return _single_operation({**request.json, "type": "remove_liquidity"})
+
+
 @app.route('/swap', methods=['POST'])
 def swap():
+    return _single_operation({**request.json, "type": "swap"})
+
+
+def _run_atomic(operations: List[_Operation]):
+    """
+    Executes operations in order, restoring every touched pool if any of them fails.
+
+    A rollback restores the reserves, fee totals and LP supply of the touched pools as well as
+    their price oracles and swap volumes. Returns the JSON payload, status code and LSN to commit;
+    history and the write-ahead log are only written once all operations succeed.
+    """
+    saved_states = {}
+    executed = []
+    for index, operation in enumerate(operations):
+        try:
+            pool_key = _pool_key(*operation.tokens)
+            if pool_key not in saved_states:
+                pool = amm.get_pool(*operation.tokens)
+                saved_states[pool_key] = (pool, pool.get_pool_state(), pool.oracle.get_state(),
+                                          amm.volume_tracker.get_state(pool_key))
+            executed.append((pool_key, *_apply_operation(operation)))
+        except Exception as e:
+            for pool_key, (pool, state, oracle_state, volume_state) in saved_states.items():
+                pool.restore_state(state)
+                pool.oracle.restore_state(oracle_state)
+                amm.volume_tracker.restore_state(pool_key, volume_state)
+            return {"success": False, "error": str(e), "failed_index": index}, 400, None
+
+    for pool_key, _, record in executed:
+        transaction_history.append(pool_key, record)
+    lsn = None
+    for operation in operations:
+        lsn = _log_operation(operation)
+    return {"success": True, "results": [{"success": True, **result} for _, result, _ in executed]}, 200, lsn
+
+
+def _run_sequential(operations: List[Union[_Operation, Exception]]):
+    """
+    Executes operations in order, reporting the outcome of each one independently.
+
+    Returns the JSON payload, status code and LSN to commit.
+    """
+    results = []
+    lsn = None
+    for operation in operations:
+        try:
+            if isinstance(operation, Exception):
+                raise operation
+            result, record = _apply_operation(operation)
+            transaction_history.append(_pool_key(*operation.tokens), record)
+            lsn = _log_operation(operation) or lsn
+            results.append({"success": True, **result})
+        except Exception as e:
+            results.append({"success": False, "error": str(e)})
+    return {"success": True, "results": results}, 200, lsn
+
+
+@app.route('/batch', methods=['POST'])
+def batch():
     data = request.json
-    token_from = data['token_from']
-    token_to = data['token_to']
-    amount = float(data['amount'])
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "error": "The request body must be a JSON object"}), 400
+    atomic = bool(data.get('atomic', False))
+    raw_operations = data.get('operations')
+    if not isinstance(raw_operations, list):
+        return jsonify({"success": False, "error": "operations must be a list"}), 400
+    if len(raw_operations) > BATCH_MAX_OPERATIONS:
+        return jsonify({"success": False, "error": f"At most {BATCH_MAX_OPERATIONS} operations per batch"}), 400
 
-    try:
-        amount_out = amm.swap(token_from, token_to, amount)
-        transaction_history.setdefault(f"{token_from}-{token_to}", []).append({
-            "type": "swap",
-            "token_from": token_from,
-            "token_to": token_to,
-            "amount_in": amount,
-            "amount_out": amount_out
-        })
-        return jsonify({"success": True, "amount_out": amount_out}), 200
-    except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 400
+    operations = []
+    for index, raw_operation in enumerate(raw_operations):
+        try:
+            operations.append(_parse_operation(raw_operation))
+        except Exception as e:
+            if atomic:
+                return jsonify({"success": False, "error": f"Invalid operation: {e}", "failed_index": index}), 400
+            operations.append(ValueError(f"Invalid operation: {e}"))
+
+    pairs = [operation.tokens for operation in operations if isinstance(operation, _Operation)]
+    with pool_locks.lock_many(pairs):
+        payload, status, lsn = _run_atomic(operations) if atomic else _run_sequential(operations)
+    _commit(lsn)
+    return jsonify(payload), status
 
 
 @app.route('/pool_state', methods=['GET'])
@@ -74,20 +217,44 @@ def get_pool_state():
     token_b = request.args.get('token_b')
 
     try:
-        state = amm.get_pool_state(token_a, token_b)
+        state = amm.get_pool_snapshot(token_a, token_b)
         return jsonify({"success": True, "state": state}), 200
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 400
 
 
+@app.route('/twap', methods=['GET'])
+def get_twap():
+    token_a = request.args.get('token_a')
+    token_b = request.args.get('token_b')
+
+    try:
+        window = request.args.get('window', type=float)
+        if window is None:
+            raise ValueError("window is required")
+        twap = amm.get_twap(token_a, token_b, window)
+        return jsonify({"success": True, "twap": twap}), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+
 @app.route('/transaction_history', methods=['GET'])
 def get_transaction_history():
     token_a = request.args.get('token_a')
     token_b = request.args.get('token_b')
 
-    pool_key = f"{min(token_a, token_b)}-{max(token_a, token_b)}"
-    history = transaction_history.get(pool_key, [])
-    return jsonify({"success": True, "history": history}), 200
+    try:
+        cursor = request.args.get('cursor', type=int)
+        limit = request.args.get('limit', HISTORY_PAGE_SIZE, type=int)
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        limit = min(limit, HISTORY_MAX_PAGE_SIZE)
+        since = request.args.get('since', type=float)
+        until = request.args.get('until', type=float)
+        history, next_cursor = transaction_history.query(_pool_key(token_a, token_b), cursor, limit, since, until)
+        return jsonify({"success": True, "history": history, "next_cursor": next_cursor}), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
 
 
 @app.route('/risk_metrics', methods=['GET'])
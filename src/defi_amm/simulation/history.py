@@ -0,0 +1,276 @@
+import math
+from collections.abc import Sequence
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+EVENT_TYPES = ('trade', 'liquidity')
+EVENT_CODES = {event_type: code for code, event_type in enumerate(EVENT_TYPES)}
+
+
+class SimulationHistory:
+    """
+    Columnar record of a market simulation, one row per step.
+
+    Every field lives in a preallocated NumPy array that doubles in size when full, so recording a
+    step is an amortized O(1) write with no per-step dictionaries.
+
+    Attributes:
+        tokens (List[str]): The tokens whose prices are recorded, in column order of `prices`.
+        size (int): The number of recorded steps.
+        steps (np.ndarray): The step number of each row.
+        prices (np.ndarray): Token prices after each step, shaped `(capacity, len(tokens))`.
+        event_types (np.ndarray): Event type code of each step, an index into `EVENT_TYPES`.
+        success (np.ndarray): Whether each step's event succeeded.
+        var (np.ndarray): The VaR recorded at each step, NaN when unavailable.
+        results (np.ndarray): Up to two numbers per step: the amount received by a trade, the LP
+            tokens minted by an added liquidity event, or the token amounts returned by a removal.
+            Unused slots are NaN.
+        errors (Dict[int, str]): Error messages of failed events, keyed by row.
+        final_step (Optional[int]): The step of the final metrics row, if the run completed.
+        final_metrics (Optional[Dict]): The metrics at the end of the run, if the run completed.
+    """
+
+    def __init__(self, tokens: Iterable[str], capacity: int = 1024):
+        """
+        Initializes an empty history.
+
+        :param tokens: The tokens whose prices are recorded.
+        :param capacity: The number of rows to preallocate (default is 1024).
+        """
+        self.tokens: List[str] = list(tokens)
+        self._token_index = {token: i for i, token in enumerate(self.tokens)}
+        self.size = 0
+        self.errors: Dict[int, str] = {}
+        self.final_step: Optional[int] = None
+        self.final_metrics: Optional[Dict] = None
+        self._allocate(max(capacity, 1))
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Allocates columns of the given capacity, carrying over the recorded rows.
+        """
+        old = {name: getattr(self, name) for name in ('steps', 'prices', 'event_types', 'success', 'var', 'results')
+               if hasattr(self, name)}
+        self.steps = np.zeros(capacity, dtype=np.int64)
+        self.prices = np.full((capacity, len(self.tokens)), np.nan)
+        self.event_types = np.zeros(capacity, dtype=np.int8)
+        self.success = np.zeros(capacity, dtype=bool)
+        self.var = np.full(capacity, np.nan)
+        self.results = np.full((capacity, 2), np.nan)
+        for name, column in old.items():
+            getattr(self, name)[:self.size] = column[:self.size]
+
+    @property
+    def capacity(self) -> int:
+        return len(self.steps)
+
+    def reserve(self, num_rows: int) -> None:
+        """
+        Ensures room for at least `num_rows` more rows without reallocating.
+
+        :param num_rows: The number of rows about to be appended.
+        """
+        if self.size + num_rows > self.capacity:
+            self._allocate(self.size + num_rows)
+
+    def append(self, step: int, prices: Dict[str, float], event_type: str, success: bool, result: Any,
+               var: Optional[float]) -> None:
+        """
+        Records one simulation step.
+
+        :param step: The step number.
+        :param prices: The token prices after the step.
+        :param event_type: One of `EVENT_TYPES`.
+        :param success: Whether the event succeeded.
+        :param result: The event outcome: a number, a pair of numbers, or an error message.
+        :param var: The VaR at this step, if available.
+        """
+        if self.size == self.capacity:
+            self._allocate(self.capacity * 2)
+        row = self.size
+        self.steps[row] = step
+        for token, price in prices.items():
+            self.prices[row, self._token_index[token]] = price
+        self.event_types[row] = EVENT_CODES[event_type]
+        self.success[row] = success
+        self.var[row] = np.nan if var is None else var
+        if isinstance(result, str):
+            self.errors[row] = result
+        elif isinstance(result, tuple):
+            self.results[row] = result
+        elif result is not None:
+            self.results[row, 0] = result
+        self.size += 1
+
+    def extend(self, steps: np.ndarray, prices: np.ndarray, event_types: np.ndarray, success: np.ndarray,
+               results: np.ndarray, var: np.ndarray, errors: Optional[Dict[int, str]] = None) -> None:
+        """
+        Records a block of simulation steps with one array write per column.
+
+        :param steps: The step numbers, shape `(n,)`.
+        :param prices: The token prices after each step, shape `(n, len(tokens))` in `tokens` order.
+        :param event_types: The event type codes, indices into `EVENT_TYPES`.
+        :param success: Whether each event succeeded.
+        :param results: The event outcomes, shape `(n, 2)`, NaN where unused.
+        :param var: The VaR at each step, NaN where unavailable.
+        :param errors: Error messages keyed by position within the block.
+        """
+        count = len(steps)
+        if self.size + count > self.capacity:
+            self._allocate(max(self.capacity * 2, self.size + count))
+        rows = slice(self.size, self.size + count)
+        self.steps[rows] = steps
+        self.prices[rows] = prices
+        self.event_types[rows] = event_types
+        self.success[rows] = success
+        self.results[rows] = results
+        self.var[rows] = var
+        for position, message in (errors or {}).items():
+            self.errors[self.size + position] = message
+        self.size += count
+
+    def finalize(self, step: int, final_metrics: Dict) -> None:
+        """
+        Records the metrics at the end of the run.
+
+        :param step: The step number of the final row.
+        :param final_metrics: The latest profitability metrics.
+        """
+        self.final_step = step
+        self.final_metrics = final_metrics
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Returns a view of the recorded rows of a column, without copying.
+
+        :param name: One of "steps", "prices", "event_types", "success", "var" or "results".
+        :return: The first `size` rows of the column.
+        """
+        return getattr(self, name)[:self.size]
+
+    def __len__(self) -> int:
+        return self.size + (self.final_metrics is not None)
+
+    def to_npz(self, path: str) -> None:
+        """
+        Saves the recorded columns to a NumPy `.npz` archive.
+
+        :param path: The destination file.
+        """
+        error_rows = np.array(sorted(self.errors), dtype=np.int64)
+        np.savez(path, tokens=np.array(self.tokens), steps=self.column('steps'), prices=self.column('prices'),
+                 event_types=self.column('event_types'), success=self.column('success'), var=self.column('var'),
+                 results=self.column('results'), error_rows=error_rows,
+                 error_messages=np.array([self.errors[row] for row in error_rows], dtype=str))
+
+    @classmethod
+    def from_npz(cls, path: str) -> 'SimulationHistory':
+        """
+        Loads a history saved with `to_npz`. Final metrics are not part of the archive.
+
+        :param path: The archive to read.
+        :return: The loaded history.
+        """
+        with np.load(path) as archive:
+            history = cls(archive['tokens'].tolist(), capacity=len(archive['steps']))
+            history.size = len(archive['steps'])
+            for name in ('steps', 'prices', 'event_types', 'success', 'var', 'results'):
+                getattr(history, name)[:history.size] = archive[name]
+            history.errors = dict(zip(archive['error_rows'].tolist(), archive['error_messages'].tolist()))
+        return history
+
+    def to_parquet(self, path: str) -> None:
+        """
+        Saves the recorded columns to a Parquet file, one price column per token.
+
+        :param path: The destination file.
+        :raises ImportError: If pyarrow is not installed.
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet export requires pyarrow; install it with `pip install defi_amm[parquet]`") from e
+
+        columns = {
+            'step': self.column('steps'),
+            'event_type': np.array(EVENT_TYPES)[self.column('event_types')],
+            'success': self.column('success'),
+            'var': self.column('var'),
+            'result_a': self.column('results')[:, 0],
+            'result_b': self.column('results')[:, 1],
+            'error': [self.errors.get(row) for row in range(self.size)],
+        }
+        for i, token in enumerate(self.tokens):
+            columns[f'price_{token}'] = self.column('prices')[:, i]
+        pq.write_table(pa.table(columns), path)
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> 'SimulationHistory':
+        """
+        Builds a history from step dictionaries in the format previously kept by `MarketSimulation`.
+
+        :param records: Step records, optionally ending with a final metrics record.
+        :return: The equivalent columnar history.
+        """
+        tokens = list(dict.fromkeys(token for record in records for token in record.get('prices', {})))
+        history = cls(tokens, capacity=len(records))
+        for record in records:
+            if 'final_metrics' in record:
+                history.finalize(record['step'], record['final_metrics'])
+            else:
+                history.append(record['step'], record.get('prices', {}), record.get('event_type', 'trade'),
+                               record.get('success', False), record.get('result'), record.get('var'))
+        return history
+
+
+class SimulationReport(Sequence):
+    """
+    Read-only view presenting a `SimulationHistory` as a list of report dictionaries.
+
+    No data is copied when the report is created; each dictionary is built from the underlying
+    columns only when it is accessed, and `columns` exposes the arrays themselves.
+    """
+
+    def __init__(self, history: SimulationHistory):
+        """
+        Initializes the view.
+
+        :param history: The history to present.
+        """
+        self._history = history
+        self._size = history.size
+        self._has_final = history.final_metrics is not None
+
+    @property
+    def columns(self) -> Dict[str, np.ndarray]:
+        """
+        The recorded columns as zero-copy array views.
+        """
+        return {name: self._history.column(name)[:self._size]
+                for name in ('steps', 'prices', 'event_types', 'success', 'var')}
+
+    def __len__(self) -> int:
+        return self._size + self._has_final
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("report index out of range")
+
+        history = self._history
+        if index == self._size:
+            return {'step': history.final_step, 'final_metrics': history.final_metrics}
+        var = history.var[index].item()
+        return {
+            'step': history.steps[index].item(),
+            'prices': {token: price for token, price in zip(history.tokens, history.prices[index].tolist())
+                       if not math.isnan(price)},
+            'event_type': EVENT_TYPES[history.event_types[index]],
+            'success': history.success[index].item(),
+            'var': None if math.isnan(var) else var
+        }
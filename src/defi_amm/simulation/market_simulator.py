@@ -1,9 +1,37 @@
-import random
-from typing import List, Dict
+import os
+import pickle
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
 
 from defi_amm.models.amm import AMM
+from defi_amm.models.liquidity_pool import SWAP_A_TO_B, SWAP_B_TO_A, ADD_LIQUIDITY, REMOVE_LIQUIDITY
 from defi_amm.models.risk_management import RiskManagement
+from defi_amm.simulation.history import EVENT_CODES, SimulationHistory, SimulationReport
 from defi_amm.simulation.metrics import ProfitabilityMetrics
+from defi_amm.utils.rng import Seed, create_streams, default_rng
+
+_EVENT_ERRORS = {
+    SWAP_A_TO_B: "Insufficient liquidity for this trade",
+    SWAP_B_TO_A: "Insufficient liquidity for this trade",
+    ADD_LIQUIDITY: "Liquidity must be added in the current ratio",
+    REMOVE_LIQUIDITY: "Insufficient LP tokens",
+}
+
+
+class _EventStream(NamedTuple):
+    """
+    Random draws for a block of simulation steps, one row per step.
+    """
+    price_changes: np.ndarray
+    is_trade: np.ndarray
+    first: np.ndarray
+    second: np.ndarray
+    amounts_a: np.ndarray
+    amounts_b: np.ndarray
+    is_add: np.ndarray
 
 
 class MarketSimulation:
@@ -13,14 +41,39 @@ class MarketSimulation:
     :param amm: The Automated Market Maker (AMM) object.
     :param risk_management: The RiskManagement object.
     :param initial_prices: A dictionary containing the initial prices of tokens.
+    :param rng: Random generator for prices and events; a freshly seeded one is used if omitted.
+
+    `lvr` accumulates the profit of the arbitrage trades made by `arbitrage_to_prices`, valued at the
+    external prices, which is what the liquidity providers lose versus rebalancing (LVR).
     """
 
-    def __init__(self, amm: AMM, risk_management: RiskManagement, initial_prices: dict):
+    def __init__(self, amm: AMM, risk_management: RiskManagement, initial_prices: dict,
+                 rng: Optional[np.random.Generator] = None):
         self.amm = amm
         self.risk_management = risk_management
         self.prices = initial_prices
-        self.history = []
+        self.history = SimulationHistory(initial_prices)
         self.metrics = ProfitabilityMetrics(amm)
+        self.plot_thread = None
+        self.rng = default_rng(rng)
+        self.lvr = 0.0
+        self._arbitrage_pools: Optional[Tuple[List[str], List[str], np.ndarray, np.ndarray]] = None
+
+    @property
+    def history(self) -> SimulationHistory:
+        """
+        The columnar record of the simulation steps.
+        """
+        return self._history
+
+    @history.setter
+    def history(self, history: Union[SimulationHistory, List[Dict]]):
+        """
+        Replaces the history; a list of step dictionaries is converted to columnar form.
+
+        :param history: A SimulationHistory, or step dictionaries with the keys of the report entries.
+        """
+        self._history = history if isinstance(history, SimulationHistory) else SimulationHistory.from_records(history)
 
     def simulate_price_change(self, token: str, volatility: float):
         """
@@ -41,7 +94,7 @@ class MarketSimulation:
             The 'prices' dictionary should already exist in the current instance.
 
         """
-        change = random.normalvariate(0, volatility)
+        change = self.rng.normal(0, volatility)
         self.prices[token] *= (1 + change)
 
     def simulate_trade(self, token_in: str, token_out: str, amount: float):
@@ -86,117 +139,372 @@ class MarketSimulation:
         except Exception as e:
             return False, str(e)
 
-    def run_simulation(self, num_steps: int, volatility: float):
+    def _get_arbitrage_pools(self) -> Tuple[List[str], List[str], np.ndarray, np.ndarray]:
+        """
+        Returns the pool keys, the priced tokens, and the token index of side A and B of every pool,
+        -1 for tokens without an external price. Rebuilt only when pools or tokens are added.
+        """
+        if self._arbitrage_pools is None or (len(self._arbitrage_pools[0]), len(self._arbitrage_pools[1])) != (
+                len(self.amm.pools), len(self.prices)):
+            pool_keys = list(self.amm.pools)
+            tokens = list(self.prices)
+            token_index = {token: i for i, token in enumerate(tokens)}
+            pair_tokens = [self.amm.get_pool_tokens(pool_key) for pool_key in pool_keys]
+            self._arbitrage_pools = (pool_keys, tokens,
+                                     np.array([token_index.get(token_a, -1) for token_a, _ in pair_tokens], dtype=int),
+                                     np.array([token_index.get(token_b, -1) for _, token_b in pair_tokens], dtype=int))
+        return self._arbitrage_pools
+
+    def arbitrage_to_prices(self) -> float:
+        """
+        Trades every pool against the external prices, as arbitrageurs would.
+
+        The trade sizes of all pools are computed in one vectorized pass. Selling x of a pool's token A
+        yields `reserve_b - k / (reserve_a + (1 - fee) * x)`, whose marginal rate is
+        `(1 - fee) * k / (reserve_a + (1 - fee) * x) ** 2`; the profit-maximizing trade stops where that
+        rate equals the external price of A in B, at `x = (sqrt((1 - fee) * k / price) - reserve_a) / (1 - fee)`,
+        and symmetrically for selling token B. Without fees this moves each pool's `get_exchange_rate()`
+        exactly to the external price ratio; with fees it stops at the edge of the no-arbitrage band.
+        The trades are executed with `AMM.swap`, so they count as swap volume and collect fees.
+
+        :return: The arbitrage profit of this pass, valued at the external prices; also added to `lvr`.
+        """
+        pool_keys, tokens, token_a_index, token_b_index = self._get_arbitrage_pools()
+        registry = self.amm.registry
+        if registry is not None:
+            reserve_a, reserve_b, k, fee = (registry.column(name) for name in ('reserve_a', 'reserve_b', 'k', 'fee'))
+        else:
+            pools = self.amm.pools.values()
+            reserve_a, reserve_b, k, fee = (
+                np.fromiter((getattr(pool, name) for pool in pools), dtype=float, count=len(pool_keys))
+                for name in ('token_a_reserve', 'token_b_reserve', 'k', 'fee'))
+
+        prices = np.append(np.array([self.prices[token] for token in tokens], dtype=float), np.nan)
+        # Index -1 picks the trailing NaN, which leaves pools with an unpriced token untouched
+        price_a, price_b = prices[token_a_index], prices[token_b_index]
+        fee_multiplier = 1 - fee
+        with np.errstate(invalid='ignore'):
+            sell_a = (np.sqrt(fee_multiplier * k * price_b / price_a) - reserve_a) / fee_multiplier
+            sell_b = (np.sqrt(fee_multiplier * k * price_a / price_b) - reserve_b) / fee_multiplier
+
+        profit = 0.0
+        for i in np.flatnonzero((sell_a > 0) | (sell_b > 0)).tolist():
+            token_a, token_b = self.amm.get_pool_tokens(pool_keys[i])
+            if sell_a[i] > 0:
+                amount_out = self.amm.swap(token_a, token_b, sell_a[i].item())
+                profit += amount_out * price_b[i] - sell_a[i] * price_a[i]
+            else:
+                amount_out = self.amm.swap(token_b, token_a, sell_b[i].item())
+                profit += amount_out * price_a[i] - sell_b[i] * price_b[i]
+        profit = float(profit)
+        self.lvr += profit
+        return profit
+
+    def run_simulation(self, num_steps: int, volatility: float, plot: bool = True, plot_dir: Optional[str] = None,
+                       vectorized: bool = False, chunk_size: int = 1000, arbitrage: bool = False):
         """
         Simulates a financial market by running a simulation with the given number of steps and volatility.
 
         :param num_steps: The number of steps to run the simulation.
         :param volatility: The volatility of the market.
+        :param plot: If False, no metrics are plotted at the end of the run.
+        :param plot_dir: If set, the metric plots are saved to this directory from a background thread
+                         (available as `plot_thread`) instead of being shown in interactive windows.
+        :param vectorized: If True, generate prices and events in bulk and apply them with the batched pool
+                           kernel (see `_run_vectorized`) instead of stepping through the AMM one call at a time.
+        :param chunk_size: The number of steps whose random draws are made at once. In vectorized mode the chunk
+                           is also applied at once, and profitability metrics are sampled once per chunk.
+        :param arbitrage: If True, pools are arbitraged to the external prices with `arbitrage_to_prices` after
+                          every price change (once per chunk in vectorized mode), and the final metrics include
+                          the accumulated `lvr`.
 
         :return: None
         """
-        for step in range(num_steps):
-            # Simulate price changes
-            for token in self.prices:
-                self.simulate_price_change(token, volatility)
-
-            # Simulate a random event (trade or liquidity event)
-            event_type = random.choice(['trade', 'liquidity'])
-            token_a, token_b = random.sample(list(self.prices.keys()), 2)
-            if event_type == 'trade':
-                amount = random.uniform(1, 1000)
-                success, result = self.simulate_trade(token_a, token_b, amount)
-            else:
-                amount_a, amount_b = random.uniform(1, 1000), random.uniform(1, 1000)
-                is_add = random.choice([True, False])
-                success, result = self.simulate_liquidity_event(token_a, token_b, amount_a, amount_b, is_add)
-
-            # Update profitability metrics
-            self.metrics.update_metrics(step)
-
-            # Calculate risk metrics
-            var = self.risk_management.calculate_var(token_a, token_b)
-
-            # Record the event and its outcome
-            self.history.append({
-                'step': step + 1,
-                'prices': self.prices.copy(),
-                'event_type': event_type,
-                'success': success,
-                'result': result,
-                'var': var
-            })
+        self.history.reserve(num_steps)
+        if vectorized:
+            self._run_vectorized(num_steps, volatility, chunk_size, arbitrage)
+        else:
+            self._run_steps(num_steps, volatility, chunk_size, arbitrage)
 
         # After simulation, plot metrics
-        self.metrics.plot_metrics()
+        if plot:
+            self.plot_thread = self.metrics.plot_metrics(output_dir=plot_dir, background=plot_dir is not None)
 
         # Include latest metrics in the final report
         latest_metrics = self.metrics.get_latest_metrics()
-        self.history.append({
-            'step': num_steps,
-            'final_metrics': latest_metrics
-        })
+        if arbitrage:
+            latest_metrics['lvr'] = self.lvr
+        self.history.finalize(num_steps, latest_metrics)
+
+    def _draw_events(self, count: int, volatility: float) -> _EventStream:
+        """
+        Draws the price changes and random events of `count` steps in bulk.
 
-    def generate_report(self) -> List[Dict]:
+        Each step changes every price by a normal return, and picks a trade or a liquidity event
+        with equal probability on a uniformly chosen ordered pair of distinct tokens, with amounts
+        uniform in [1, 1000) and additions and removals equally likely.
+
+        :param count: The number of steps.
+        :param volatility: The volatility of the market.
+        :return: The draws, one row per step.
+        """
+        num_tokens = len(self.prices)
+        first = self.rng.integers(num_tokens, size=count)
+        second = self.rng.integers(num_tokens - 1, size=count)
+        second += second >= first
+        return _EventStream(price_changes=self.rng.normal(0, volatility, (count, num_tokens)),
+                            is_trade=self.rng.random(count) < 0.5,
+                            first=first,
+                            second=second,
+                            amounts_a=self.rng.uniform(1, 1000, count),
+                            amounts_b=self.rng.uniform(1, 1000, count),
+                            is_add=self.rng.random(count) < 0.5)
+
+    def _run_steps(self, num_steps: int, volatility: float, chunk_size: int, arbitrage: bool = False):
+        """
+        Runs the simulation one step at a time through the AMM's public methods.
+
+        The random draws are made in bulk per chunk by `_draw_events`, so for the same generator
+        state this sees exactly the events of `_run_vectorized`.
+
+        :param num_steps: The number of steps to run the simulation.
+        :param volatility: The volatility of the market.
+        :param chunk_size: The number of steps drawn at once.
+        :param arbitrage: If True, arbitrage the pools to the new prices before each step's event.
+        """
+        tokens = list(self.prices)
+        for start in range(0, num_steps, chunk_size):
+            events = self._draw_events(min(chunk_size, num_steps - start), volatility)
+            for offset, price_changes in enumerate(events.price_changes.tolist()):
+                step = start + offset
+
+                # Simulate price changes
+                for token, change in zip(tokens, price_changes):
+                    self.prices[token] *= (1 + change)
+                if arbitrage:
+                    self.arbitrage_to_prices()
+
+                # Simulate a random event (trade or liquidity event)
+                token_a, token_b = tokens[events.first[offset]], tokens[events.second[offset]]
+                amount_a, amount_b = events.amounts_a[offset].item(), events.amounts_b[offset].item()
+                if events.is_trade[offset]:
+                    event_type = 'trade'
+                    success, result = self.simulate_trade(token_a, token_b, amount_a)
+                else:
+                    event_type = 'liquidity'
+                    success, result = self.simulate_liquidity_event(token_a, token_b, amount_a, amount_b,
+                                                                    bool(events.is_add[offset]))
+
+                # Update profitability metrics
+                self.metrics.update_metrics(step)
+
+                # Calculate the VaR of the traded pool from the shared shock matrix
+                var = None
+                if self.amm.find_pool_key(token_a, token_b) is not None:
+                    var = self.risk_management.calculate_pool_var(token_a, token_b)
+
+                # Record the event and its outcome
+                self.history.append(step + 1, self.prices, event_type, success, result, var)
+
+    def _run_vectorized(self, num_steps: int, volatility: float, chunk_size: int, arbitrage: bool = False):
+        """
+        Runs the simulation in chunks of pre-generated prices and events.
+
+        Each chunk uses the same draws as `_run_steps` (see `_draw_events`): every price follows the
+        loop's multiplicative random walk (an Euler-discretized GBM) and each step applies one trade
+        or liquidity event. The events of each pool are then applied in order by
+        `LiquidityPool.apply_events`, its swap volume is recorded in the AMM's `volume_tracker`, and
+        the per-step pool VaR is interpolated from the reserves after each event. Unlike the exact
+        `calculate_pool_var` used by `_run_steps`, that VaR comes from
+        `RiskManagement.pool_var_interpolators` and deviates from it by at most the bound stated there,
+        about 1% of the VaR.
+
+        :param num_steps: The number of steps to run the simulation.
+        :param volatility: The volatility of the market.
+        :param chunk_size: The number of steps generated and applied at once.
+        :param arbitrage: If True, arbitrage the pools to the prices at the end of each chunk.
+        """
+        tokens = list(self.prices)
+        num_tokens = len(tokens)
+        pool_keys = list(self.amm.pools)
+        pool_index = {pool_key: i for i, pool_key in enumerate(pool_keys)}
+
+        # Pool and swap direction of every ordered token pair, -1 where no pool exists
+        pair_pools = np.full((num_tokens, num_tokens), -1)
+        pair_directions = np.zeros((num_tokens, num_tokens), dtype=np.int8)
+        for i, token_a in enumerate(tokens):
+            for j, token_b in enumerate(tokens):
+                if i != j:
+                    pair_pools[i, j] = pool_index.get(self.amm.find_pool_key(token_a, token_b), -1)
+                    pair_directions[i, j] = SWAP_A_TO_B if token_a < token_b else SWAP_B_TO_A
+
+        var_interpolators = self.risk_management.pool_var_interpolators()
+        prices = np.array([self.prices[token] for token in tokens], dtype=float)
+        for start in range(0, num_steps, chunk_size):
+            count = min(chunk_size, num_steps - start)
+            events = self._draw_events(count, volatility)
+
+            # Simulate price changes for the whole chunk
+            price_paths = prices * np.cumprod(1 + events.price_changes, axis=0)
+            prices = price_paths[-1]
+
+            # Resolve the pool and kind of every event
+            pools = pair_pools[events.first, events.second]
+            kinds = np.where(events.is_trade, pair_directions[events.first, events.second],
+                             np.where(events.is_add, ADD_LIQUIDITY, REMOVE_LIQUIDITY))
+            amounts_b = np.where(events.is_trade, 0.0, events.amounts_b)
+
+            # Apply each pool's events in order and value the pool after every one of them
+            success = np.zeros(count, dtype=bool)
+            results = np.full((count, 2), np.nan)
+            var = np.full(count, np.nan)
+            for pool_id in np.unique(pools[pools >= 0]).tolist():
+                rows = np.flatnonzero(pools == pool_id)
+                outcome = self.amm.pools[pool_keys[pool_id]].apply_events(kinds[rows], events.amounts_a[rows],
+                                                                          amounts_b[rows])
+                # Record the executed swap volume in token A units, as `AMM.swap` does
+                volume = np.where(kinds[rows] == SWAP_A_TO_B, events.amounts_a[rows], outcome.results[:, 0])
+                swapped = outcome.success & np.isin(kinds[rows], (SWAP_A_TO_B, SWAP_B_TO_A))
+                if swapped.any():
+                    self.amm.volume_tracker.record(pool_keys[pool_id], float(volume[swapped].sum()))
+                success[rows] = outcome.success
+                results[rows] = outcome.results
+                var[rows] = var_interpolators[pool_keys[pool_id]](outcome.token_a_reserves, outcome.token_b_reserves)
+
+            errors = {position: _EVENT_ERRORS[kinds[position]] if pools[position] >= 0 else "Pool not found"
+                      for position in np.flatnonzero(~success).tolist()}
+            event_types = np.where(events.is_trade, EVENT_CODES['trade'], EVENT_CODES['liquidity'])
+            self.history.extend(np.arange(start + 1, start + count + 1), price_paths, event_types, success, results,
+                                var, errors)
+
+            self.prices.update(zip(tokens, prices.tolist()))
+            if arbitrage:
+                self.arbitrage_to_prices()
+
+            # Update profitability metrics
+            self.metrics.update_metrics(start + count - 1)
+
+    def generate_report(self) -> SimulationReport:
         """
         Generates a report based on the history of steps.
 
-        :return: A list of dictionaries representing the report. Each dictionary contains the step, prices (if available),
-                 event type and success (if available), VaR (if available), and final metrics (if available).
-        :rtype: list[dict]
+        The report is a read-only sequence view over the history columns; entries are materialized as dictionaries
+        only when accessed, and the raw arrays are available through its `columns` attribute.
+
+        :return: A sequence of dictionaries representing the report. Each dictionary contains the step, prices,
+                 event type, success and VaR, except the last one which holds the final metrics (if available).
+        :rtype: SimulationReport
         """
-        report = []
-        for step in self.history:
-            report_step = {
-                'step': step['step']
-            }
+        return SimulationReport(self.history)
 
-            # Add prices if available
-            if 'prices' in step:
-                report_step['prices'] = step['prices']
 
-            # Add event type and success if available
-            if 'event_type' in step:
-                report_step['event_type'] = step['event_type']
-                report_step['success'] = step['success']
+def _scenario_plot_dir(plot_dir: Optional[str], scenario: str) -> Optional[str]:
+    return None if plot_dir is None else os.path.join(plot_dir, scenario)
 
-            # Add VaR if available
-            if 'var' in step:
-                report_step['var'] = step['var']
 
-            # Add final metrics if available
-            if 'final_metrics' in step:
-                report_step['final_metrics'] = step['final_metrics']
+class Scenario(NamedTuple):
+    """
+    Parameters of one market scenario run by `run_scenarios`.
+
+    :param name: Key of the scenario's report.
+    :param num_steps: The number of simulation steps.
+    :param volatility: The volatility of the market.
+    :param large_trade: An optional `(token_in, token_out, amount)` swap executed after the run.
+    :param vectorized: If True, use the vectorized simulation mode.
+    :param arbitrage: If True, arbitrage the pools to the simulated prices (see `MarketSimulation.arbitrage_to_prices`).
+    """
+    name: str
+    num_steps: int = 100
+    volatility: float = 0.02
+    large_trade: Optional[Tuple[str, str, float]] = None
+    vectorized: bool = False
+    arbitrage: bool = False
+
 
-            report.append(report_step)
-        return report
+DEFAULT_SCENARIOS = (
+    Scenario('stable', volatility=0.01),
+    Scenario('volatile', volatility=0.05),
+    Scenario('large_trade', volatility=0.02, large_trade=('TokenA', 'TokenB', 10000)),
+)
 
 
-def run_market_scenarios(amm: AMM, risk_management: RiskManagement, initial_prices: dict):
+def _run_scenario(state: bytes, initial_prices: dict, scenario: Scenario, seed: np.random.SeedSequence,
+                  plot_dir: Optional[str]) -> SimulationReport:
+    """
+    Runs one scenario on its own copy of the AMM and risk manager; executed in a worker process.
+
+    Every component draws from its own stream spawned from `seed`, so the result does not depend on
+    which worker runs the scenario or what it ran before.
     """
-    Run market scenarios using the given parameters.
+    amm, risk_management = pickle.loads(state)
+    streams = create_streams(seed)
+    risk_management.rng = streams.risk
+    simulation = MarketSimulation(amm, risk_management, dict(initial_prices), rng=streams.simulation)
+    simulation.run_simulation(num_steps=scenario.num_steps, volatility=scenario.volatility, plot=False,
+                              vectorized=scenario.vectorized, arbitrage=scenario.arbitrage)
+    if plot_dir is not None:
+        simulation.metrics.plot_metrics(output_dir=_scenario_plot_dir(plot_dir, scenario.name))
+    if scenario.large_trade is not None:
+        simulation.simulate_trade(*scenario.large_trade)
+    return simulation.generate_report()
+
+
+def run_scenarios(amm: AMM, risk_management: RiskManagement, initial_prices: dict,
+                  scenarios: Sequence[Scenario] = DEFAULT_SCENARIOS, seed: Seed = None,
+                  max_workers: Optional[int] = None, plot_dir: Optional[str] = None) -> Dict[str, SimulationReport]:
+    """
+    Runs market scenarios in parallel worker processes, each on an isolated copy of the initial state.
+
+    The AMM and risk manager are serialized once and every scenario starts from its own copy, so
+    scenarios never see each other's trades and the caller's AMM is left untouched. Each scenario
+    draws from an independent stream spawned from `seed`, which makes a run reproducible regardless
+    of the number of workers.
+
+    :param amm: The AMM whose pools every scenario starts from.
+    :param risk_management: The risk manager used by every scenario; its shock matrix is shared as of the call.
+    :param initial_prices: A dictionary containing the initial prices of tokens in the market.
+    :param scenarios: The scenarios to run, with unique names (default: stable, volatile and large trade).
+    :param seed: Root seed (or `SeedSequence`) of the per-scenario streams; fresh entropy is used if omitted.
+    :param max_workers: The number of worker processes (default: one per CPU).
+    :param plot_dir: If set, each scenario's plots are saved to a subdirectory of it.
+
+    :return: The report of each scenario, keyed by scenario name, in the order of `scenarios`.
+    :raises ValueError: If two scenarios share a name.
+    """
+    names = [scenario.name for scenario in scenarios]
+    if len(set(names)) != len(names):
+        raise ValueError("Scenario names must be unique")
+
+    state = pickle.dumps((amm, risk_management))
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    seeds = root.spawn(len(scenarios))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_run_scenario, state, initial_prices, scenario, scenario_seed, plot_dir)
+                   for scenario, scenario_seed in zip(scenarios, seeds)]
+        return {name: future.result() for name, future in zip(names, futures)}
+
+
+def run_market_scenarios(amm: AMM, risk_management: RiskManagement, initial_prices: dict, plot: bool = True,
+                         plot_dir: Optional[str] = None, seed: Seed = None):
+    """
+    Run the default stable, volatile and large trade market scenarios.
+
+    .. deprecated::
+        Use `run_scenarios` with `DEFAULT_SCENARIOS`, which this delegates to. Every scenario now starts
+        from its own copy of `amm`, the large trade is executed after the run as `Scenario.large_trade`
+        describes, and plots can only be saved to `plot_dir`, not shown in interactive windows.
 
     :param amm: An instance of the AMM class representing the automated market maker.
     :param risk_management: An instance of the RiskManagement class representing the risk management system.
     :param initial_prices: A dictionary containing the initial prices of tokens in the market.
+    :param plot: If False, no metrics are plotted.
+    :param plot_dir: If set (and `plot` is True), each scenario's plots are saved to a subdirectory of it.
+    :param seed: Root seed (or `SeedSequence`) of the scenarios' random streams; fresh entropy is used if omitted.
 
     :return: A tuple containing the reports generated for each market scenario.
     """
-    # Scenario 1: Stable market
-    stable_sim = MarketSimulation(amm, risk_management, initial_prices.copy())
-    stable_sim.run_simulation(num_steps=100, volatility=0.01)
-    stable_report = stable_sim.generate_report()
-
-    # Scenario 2: High volatility market
-    volatile_sim = MarketSimulation(amm, risk_management, initial_prices.copy())
-    volatile_sim.run_simulation(num_steps=100, volatility=0.05)
-    volatile_report = volatile_sim.generate_report()
-
-    # Scenario 3: Market with sudden large trades
-    large_trade_sim = MarketSimulation(amm, risk_management, initial_prices.copy())
-    large_trade_sim.run_simulation(num_steps=100, volatility=0.02)
-    # Inject a large trade at step 50
-    large_trade_sim.simulate_trade('TokenA', 'TokenB', 10000)
-    large_trade_report = large_trade_sim.generate_report()
-
-    return stable_report, volatile_report, large_trade_report
+    warnings.warn("run_market_scenarios is deprecated, use run_scenarios instead", DeprecationWarning,
+                  stacklevel=2)
+    reports = run_scenarios(amm, risk_management, initial_prices, DEFAULT_SCENARIOS, seed=seed,
+                            plot_dir=plot_dir if plot else None)
+    return tuple(reports.values())
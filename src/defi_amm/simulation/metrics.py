@@ -1,10 +1,32 @@
-from typing import Dict, List
+import os
+import threading
+from typing import Dict, List, NamedTuple, Optional
 
-import matplotlib.pyplot as plt
 from defi_amm.models.amm import AMM
 from defi_amm.models.liquidity_pool import LiquidityPool
 
 
+class _PlotSpec(NamedTuple):
+    name: str
+    title: str
+    ylabel: str
+    series: Dict[str, List[float]]
+
+
+def _require_matplotlib():
+    """
+    Imports matplotlib on first use, so importing this module stays cheap on headless nodes.
+
+    :return: The matplotlib module.
+    :raises ImportError: If matplotlib is not installed.
+    """
+    try:
+        import matplotlib
+    except ImportError as e:
+        raise ImportError("Plotting requires matplotlib; install it with `pip install defi_amm[plot]`") from e
+    return matplotlib
+
+
 class ProfitabilityMetrics:
     """
     ProfitabilityMetrics
@@ -34,8 +56,8 @@ class ProfitabilityMetrics:
         _update_impermanent_loss()
             Update impermanent loss for each pool.
 
-        plot_metrics()
-            Plot all metrics over time.
+        plot_metrics(output_dir: Optional[str] = None, file_format: str = 'png', background: bool = False)
+            Plot all metrics over time, interactively or to image files.
 
         _plot_total_fees()
             Plot total fees earned over time for each token.
@@ -88,7 +110,6 @@ class ProfitabilityMetrics:
         :return: None
         """
         for pool_key, pool in self.amm.pools.items():
-            token_a, token_b = pool_key.split('-')
             returns = self._calculate_lp_returns(pool)
             if pool_key not in self.lp_returns:
                 self.lp_returns[pool_key] = []
@@ -115,7 +136,6 @@ class ProfitabilityMetrics:
         :return: None
         """
         for pool_key, pool in self.amm.pools.items():
-            token_a, token_b = pool_key.split('-')
             # Assume we have a method to get the current price ratio
             current_price_ratio = pool.get_exchange_rate()
             il = pool.calculate_impermanent_loss(current_price_ratio)
@@ -123,15 +143,103 @@ class ProfitabilityMetrics:
                 self.impermanent_loss[pool_key] = []
             self.impermanent_loss[pool_key].append(il)
 
-    def plot_metrics(self):
+    def plot_metrics(self, output_dir: Optional[str] = None, file_format: str = 'png',
+                     background: bool = False) -> Optional[threading.Thread]:
         """
         This method plots various metrics related to total fees, LP returns, and impermanent loss.
 
+        Without `output_dir` the plots are shown in interactive windows. With `output_dir` they are
+        rendered off-screen with the Agg canvas and saved as `total_fees`, `lp_returns` and
+        `impermanent_loss` files, optionally from a background thread.
+
+        :param output_dir: Directory to save the plots to instead of showing them.
+        :param file_format: Image format of the saved plots, e.g. 'png' or 'svg'.
+        :param background: If True (and `output_dir` is set), render in a background thread.
+        :return: The rendering thread when `background` is True, otherwise None.
+        """
+        if output_dir is None:
+            self._plot_total_fees()
+            self._plot_lp_returns()
+            self._plot_impermanent_loss()
+            return None
+
+        specs = [self._total_fees_spec(), self._lp_returns_spec(), self._impermanent_loss_spec()]
+        time_steps = list(self.time_steps)
+        if not background:
+            self._save_plots(specs, time_steps, output_dir, file_format)
+            return None
+        thread = threading.Thread(target=self._save_plots, args=(specs, time_steps, output_dir, file_format),
+                                  name='metrics-plotter')
+        thread.start()
+        return thread
+
+    def _total_fees_spec(self) -> _PlotSpec:
+        return _PlotSpec('total_fees', 'Total Fees Earned Over Time', 'Total Fees',
+                         {f'{token} Fees': list(fees) for token, fees in self.total_fees.items()})
+
+    def _lp_returns_spec(self) -> _PlotSpec:
+        return _PlotSpec('lp_returns', 'Liquidity Provider Returns Over Time', 'Returns',
+                         {f'{pool_key} Returns': list(returns) for pool_key, returns in self.lp_returns.items()})
+
+    def _impermanent_loss_spec(self) -> _PlotSpec:
+        return _PlotSpec('impermanent_loss', 'Impermanent Loss Over Time', 'Impermanent Loss',
+                         {f'{pool_key} IL': list(loss) for pool_key, loss in self.impermanent_loss.items()})
+
+    @staticmethod
+    def _draw(ax, spec: _PlotSpec, time_steps: List[int]):
+        """
+        Draw one metric on the given axes.
+
+        :param ax: The matplotlib axes to draw on.
+        :param spec: The metric series and labels.
+        :param time_steps: The x values shared by all series.
+        :return: None
+        """
+        for label, values in spec.series.items():
+            ax.plot(time_steps, values, label=label)
+        ax.set_title(spec.title)
+        ax.set_xlabel('Time Step')
+        ax.set_ylabel(spec.ylabel)
+        ax.legend()
+        ax.grid(True)
+
+    def _show(self, spec: _PlotSpec):
+        """
+        Show one metric in an interactive window.
+
+        :param spec: The metric series and labels.
         :return: None
         """
-        self._plot_total_fees()
-        self._plot_lp_returns()
-        self._plot_impermanent_loss()
+        _require_matplotlib()
+        import matplotlib.pyplot as plt
+
+        plt.figure(figsize=(10, 6))
+        self._draw(plt.gca(), spec, self.time_steps)
+        plt.show()
+
+    def _save_plots(self, specs: List[_PlotSpec], time_steps: List[int], output_dir: str, file_format: str):
+        """
+        Render metrics off-screen and save them to files.
+
+        Figures are created with the Agg canvas directly rather than through pyplot, so rendering
+        does not touch global GUI state and is safe outside the main thread.
+
+        :param specs: The metrics to render.
+        :param time_steps: The x values shared by all series.
+        :param output_dir: Directory to save the plots to, created if missing.
+        :param file_format: Image format of the saved plots.
+        :return: None
+        """
+        _require_matplotlib()
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        os.makedirs(output_dir, exist_ok=True)
+        for spec in specs:
+            figure = Figure(figsize=(10, 6))
+            FigureCanvasAgg(figure)
+            self._draw(figure.add_subplot(), spec, time_steps)
+            figure.savefig(os.path.join(output_dir, f'{spec.name}.{file_format}'), format=file_format)
 
     def _plot_total_fees(self):
         """
@@ -139,15 +247,7 @@ class ProfitabilityMetrics:
 
         :return: None
         """
-        plt.figure(figsize=(10, 6))
-        for token, fees in self.total_fees.items():
-            plt.plot(self.time_steps, fees, label=f'{token} Fees')
-        plt.title('Total Fees Earned Over Time')
-        plt.xlabel('Time Step')
-        plt.ylabel('Total Fees')
-        plt.legend()
-        plt.grid(True)
-        plt.show()
+        self._show(self._total_fees_spec())
 
     def _plot_lp_returns(self):
         """
@@ -155,15 +255,7 @@ class ProfitabilityMetrics:
 
         :return: None
         """
-        plt.figure(figsize=(10, 6))
-        for pool_key, returns in self.lp_returns.items():
-            plt.plot(self.time_steps, returns, label=f'{pool_key} Returns')
-        plt.title('Liquidity Provider Returns Over Time')
-        plt.xlabel('Time Step')
-        plt.ylabel('Returns')
-        plt.legend()
-        plt.grid(True)
-        plt.show()
+        self._show(self._lp_returns_spec())
 
     def _plot_impermanent_loss(self):
         """
@@ -171,15 +263,7 @@ class ProfitabilityMetrics:
 
         :return: None
         """
-        plt.figure(figsize=(10, 6))
-        for pool_key, loss in self.impermanent_loss.items():
-            plt.plot(self.time_steps, loss, label=f'{pool_key} IL')
-        plt.title('Impermanent Loss Over Time')
-        plt.xlabel('Time Step')
-        plt.ylabel('Impermanent Loss')
-        plt.legend()
-        plt.grid(True)
-        plt.show()
+        self._show(self._impermanent_loss_spec())
 
     def get_latest_metrics(self) -> Dict[str, Dict[str, float]]:
         """
@@ -0,0 +1,287 @@
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from defi_amm.utils.logging import logger
+
+HistoryPage = Tuple[List[Dict[str, Any]], Optional[int]]
+
+
+class HistoryStoreException(ValueError):
+    """
+    Custom exception for errors related to the transaction history stores.
+
+    Attributes:
+        message (str): Explanation of the error that occurred.
+    """
+
+    def __init__(self, message):
+        """
+        Initializes the HistoryStoreException with a given message.
+
+        Args:
+            message (str): The error message to be logged and stored in the exception.
+        """
+        super().__init__(message)
+        logger.warning(f"HistoryStoreException: {message}")
+
+
+class TransactionHistoryStore(ABC):
+    """
+    Append-only store of executed transactions, indexed by pool and time.
+
+    Every appended record receives an `id`, increasing across the whole store, and a `timestamp`.
+    Reads are paginated with the `id` of the last record of the previous page as the cursor, so a
+    page costs the same regardless of how much history precedes it.
+    """
+
+    @abstractmethod
+    def append(self, pool_key: str, record: Dict[str, Any]) -> int:
+        """
+        Appends a transaction to the history of a pool.
+
+        Args:
+            pool_key (str): The canonical key of the pool.
+            record (Dict[str, Any]): The JSON-serializable transaction details.
+
+        Returns:
+            int: The ID assigned to the record.
+        """
+
+    @abstractmethod
+    def query(self, pool_key: str, cursor: Optional[int] = None, limit: int = 100, since: Optional[float] = None,
+              until: Optional[float] = None) -> HistoryPage:
+        """
+        Returns a page of the history of a pool, oldest first.
+
+        Args:
+            pool_key (str): The canonical key of the pool.
+            cursor (Optional[int]): Only records with an ID greater than this are returned.
+            limit (int): The maximum number of records to return (default is 100).
+            since (Optional[float]): Only records with a timestamp at or after this are returned.
+            until (Optional[float]): Only records with a timestamp before this are returned.
+
+        Returns:
+            HistoryPage: The records, each including its `id` and `timestamp`, and the cursor of the
+            next page, or None if there are no more records.
+        """
+
+    def close(self) -> None:
+        """
+        Releases any resources held by the store.
+        """
+
+
+class _Ring:
+    """
+    Fixed-capacity circular buffer of one pool's records, ordered by ID and timestamp.
+
+    The buffer grows with the records until it holds `capacity` of them and only then starts
+    overwriting the oldest, so pools with few swaps stay small.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.ids: List[int] = []
+        self.timestamps: List[float] = []
+        self.records: List[Dict[str, Any]] = []
+        self.start = 0
+
+    @property
+    def count(self) -> int:
+        return len(self.ids)
+
+    def append(self, record_id: int, timestamp: float, record: Dict[str, Any]) -> None:
+        if len(self.ids) < self.capacity:
+            self.ids.append(record_id)
+            self.timestamps.append(timestamp)
+            self.records.append(record)
+            return
+        slot = self.start
+        self.start = (self.start + 1) % self.capacity
+        self.ids[slot] = record_id
+        self.timestamps[slot] = timestamp
+        self.records[slot] = record
+
+    def bisect_right(self, column: List, value) -> int:
+        """
+        Returns the first logical position whose value in `column` is greater than `value`.
+        """
+        capacity = len(column)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if column[(self.start + middle) % capacity] <= value:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def bisect_left(self, column: List, value) -> int:
+        """
+        Returns the first logical position whose value in `column` is not less than `value`.
+        """
+        capacity = len(column)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if column[(self.start + middle) % capacity] < value:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def get(self, position: int) -> Tuple[int, float, Dict[str, Any]]:
+        slot = (self.start + position) % len(self.ids)
+        return self.ids[slot], self.timestamps[slot], self.records[slot]
+
+
+class RingBufferHistoryStore(TransactionHistoryStore):
+    """
+    In-memory history store keeping only the most recent records of each pool.
+
+    Each pool has a fixed-size ring buffer, so memory is bounded by the number of pools times
+    `max_records_per_pool`. Cursor and time lookups are binary searches over the ring.
+    """
+
+    def __init__(self, max_records_per_pool: int = 10000, clock: Callable[[], float] = time.time):
+        """
+        Initializes an empty store.
+
+        Args:
+            max_records_per_pool (int): The number of records retained per pool (default is 10000).
+            clock (Callable[[], float]): The source of record timestamps (default is `time.time`).
+
+        Raises:
+            HistoryStoreException: If `max_records_per_pool` is not positive.
+        """
+        if max_records_per_pool <= 0:
+            raise HistoryStoreException("max_records_per_pool must be positive")
+        self.max_records_per_pool = max_records_per_pool
+        self.clock = clock
+        self._rings: Dict[str, _Ring] = {}
+        self._next_id = 1
+        self._last_timestamp = float('-inf')
+        self._lock = threading.Lock()
+
+    def append(self, pool_key: str, record: Dict[str, Any]) -> int:
+        with self._lock:
+            record_id = self._next_id
+            self._next_id += 1
+            # Keep timestamps monotonic so they stay sorted within every ring
+            timestamp = self._last_timestamp = max(self.clock(), self._last_timestamp)
+            ring = self._rings.get(pool_key)
+            if ring is None:
+                ring = self._rings[pool_key] = _Ring(self.max_records_per_pool)
+            ring.append(record_id, timestamp, record)
+        return record_id
+
+    def query(self, pool_key: str, cursor: Optional[int] = None, limit: int = 100, since: Optional[float] = None,
+              until: Optional[float] = None) -> HistoryPage:
+        with self._lock:
+            ring = self._rings.get(pool_key)
+            if ring is None:
+                return [], None
+            position = 0
+            if cursor is not None:
+                position = ring.bisect_right(ring.ids, cursor)
+            if since is not None:
+                position = max(position, ring.bisect_left(ring.timestamps, since))
+            end = ring.count if until is None else ring.bisect_left(ring.timestamps, until)
+            page = [ring.get(i) for i in range(position, min(end, position + limit))]
+
+        records = [{"id": record_id, "timestamp": timestamp, **record} for record_id, timestamp, record in page]
+        next_cursor = records[-1]["id"] if records and position + limit < end else None
+        return records, next_cursor
+
+
+class SQLiteHistoryStore(TransactionHistoryStore):
+    """
+    Persistent, append-only history store backed by an SQLite database.
+
+    Records survive restarts and are indexed by `(pool_key, id)` and `(pool_key, timestamp)`, so
+    paginated reads only touch the rows they return.
+    """
+
+    def __init__(self, path: str, clock: Callable[[], float] = time.time):
+        """
+        Opens (creating if needed) the database at `path`.
+
+        Args:
+            path (str): The database file path, or ":memory:".
+            clock (Callable[[], float]): The source of record timestamps (default is `time.time`).
+        """
+        self.path = path
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS transactions ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, pool_key TEXT NOT NULL, "
+                "timestamp REAL NOT NULL, payload TEXT NOT NULL)")
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS transactions_pool_id ON transactions (pool_key, id)")
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS transactions_pool_time ON transactions (pool_key, timestamp)")
+
+    def append(self, pool_key: str, record: Dict[str, Any]) -> int:
+        payload = json.dumps(record)
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                "INSERT INTO transactions (pool_key, timestamp, payload) VALUES (?, ?, ?)",
+                (pool_key, self.clock(), payload))
+        return cursor.lastrowid
+
+    def query(self, pool_key: str, cursor: Optional[int] = None, limit: int = 100, since: Optional[float] = None,
+              until: Optional[float] = None) -> HistoryPage:
+        sql = "SELECT id, timestamp, payload FROM transactions WHERE pool_key = ? AND id > ?"
+        params: List[Any] = [pool_key, cursor or 0]
+        if since is not None:
+            sql += " AND timestamp >= ?"
+            params.append(since)
+        if until is not None:
+            sql += " AND timestamp < ?"
+            params.append(until)
+        sql += " ORDER BY id LIMIT ?"
+        params.append(limit + 1)
+        with self._lock:
+            rows = self._connection.execute(sql, params).fetchall()
+
+        records = [{"id": record_id, "timestamp": timestamp, **json.loads(payload)}
+                   for record_id, timestamp, payload in rows[:limit]]
+        next_cursor = records[-1]["id"] if len(rows) > limit else None
+        return records, next_cursor
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+def create_history_store(backend: str = "memory", path: Optional[str] = None,
+                         max_records_per_pool: int = 10000) -> TransactionHistoryStore:
+    """
+    Builds a history store from configuration values.
+
+    Args:
+        backend (str): "memory" for a `RingBufferHistoryStore`, "sqlite" for a `SQLiteHistoryStore`.
+        path (Optional[str]): The database path, required for the "sqlite" backend.
+        max_records_per_pool (int): The retention of the "memory" backend (default is 10000).
+
+    Returns:
+        TransactionHistoryStore: The configured store.
+
+    Raises:
+        HistoryStoreException: If the backend is unknown or a required setting is missing.
+    """
+    if backend == "memory":
+        return RingBufferHistoryStore(max_records_per_pool)
+    if backend == "sqlite":
+        if not path:
+            raise HistoryStoreException("The sqlite history backend requires a database path")
+        return SQLiteHistoryStore(path)
+    raise HistoryStoreException(f"Unknown history backend: {backend}")
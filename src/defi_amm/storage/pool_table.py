@@ -0,0 +1,388 @@
+import os
+import tempfile
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from defi_amm.config import POOL_TABLE_CAPACITY
+from defi_amm.models.amm import AMM, AMMSnapshot, PoolState
+from defi_amm.models.liquidity_pool import LiquidityPool
+from defi_amm.utils.logging import logger
+
+_MAGIC = b'AMMPOOLS'
+_LAYOUT_VERSION = 1
+SYMBOL_SIZE = 32
+# The header is padded to a cache line so the rows start aligned
+HEADER_DTYPE = np.dtype([('magic', 'S8'), ('layout_version', '<u4'), ('capacity', '<u4'), ('count', '<u8')])
+_HEADER_SIZE = 64
+_FLOAT_COLUMNS = ('reserve_a', 'reserve_b', 'k', 'fee', 'fees_a', 'fees_b', 'lp_supply')
+ROW_DTYPE = np.dtype([('sequence', '<u8'), ('token_a', f'S{SYMBOL_SIZE}'), ('token_b', f'S{SYMBOL_SIZE}')] +
+                     [(name, '<f8') for name in _FLOAT_COLUMNS])
+
+
+class PoolTableException(ValueError):
+    """
+    Custom exception for errors related to the memory-mapped pool table.
+
+    Attributes:
+        message (str): Explanation of the error that occurred.
+    """
+
+    def __init__(self, message):
+        """
+        Initializes the PoolTableException with a given message.
+
+        Args:
+            message (str): The error message to be logged and stored in the exception.
+        """
+        super().__init__(message)
+        logger.warning(f"PoolTableException: {message}")
+
+
+class MappedPoolTable:
+    """
+    Fixed-layout table of pool states in a memory-mapped file, shared between processes.
+
+    One process owns the table and mirrors the pools of its AMM into it; any number of read-only
+    processes map the same file and read the pools without copying, locking or talking to the
+    writer. The file is a 64-byte header (`HEADER_DTYPE`) followed by `capacity` rows of
+    `ROW_DTYPE`, whose columns match those of `PoolRegistry`.
+
+    Every row starts with a sequence counter used as a seqlock: the writer makes it odd before
+    changing the row and even again afterwards, and readers retry rows whose counter was odd or
+    changed while they copied them. Rows are appended in pool creation order and the header
+    `count` is raised only once a row is complete. The row of a pool dropped by `AMM.restore` is
+    cleared to empty symbols and reused by the next new pool; `read` skips cleared rows.
+
+    Attributes:
+        path (str): The path of the mapped file.
+        writable (bool): Whether this process owns the table.
+        header (np.ndarray): The mapped header record.
+        rows (np.ndarray): The mapped rows, a structured array of `ROW_DTYPE`.
+    """
+
+    def __init__(self, path: str, writable: bool = False, capacity: int = POOL_TABLE_CAPACITY):
+        """
+        Maps a pool table file; use `create` or `open` rather than calling this directly.
+
+        Args:
+            path (str): The path of the file.
+            writable (bool): If True the file is (re)created and owned by this process. An existing
+                file is replaced, not truncated, so readers still mapping it are unaffected.
+            capacity (int): The number of rows of a created file (default is `POOL_TABLE_CAPACITY`).
+
+        Raises:
+            PoolTableException: If an opened file is not a pool table of this layout.
+        """
+        self.path = path
+        self.writable = writable
+        if writable:
+            # The table is built in a temporary file and moved into place, so that processes which
+            # still map a previous table at this path keep reading it instead of a truncated file
+            descriptor, mapped_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.",
+                                                       dir=os.path.dirname(os.path.abspath(path)))
+            with os.fdopen(descriptor, 'wb') as file:
+                file.truncate(_HEADER_SIZE + capacity * ROW_DTYPE.itemsize)
+        else:
+            mapped_path = path
+        mode = 'r+' if writable else 'r'
+        try:
+            self.header = np.memmap(mapped_path, dtype=HEADER_DTYPE, mode=mode, shape=(1,))
+            if writable:
+                self.header[0] = (_MAGIC, _LAYOUT_VERSION, capacity, 0)
+                self.header.flush()
+                os.replace(mapped_path, path)
+            elif self.header['magic'][0] != _MAGIC or self.header['layout_version'][0] != _LAYOUT_VERSION:
+                raise PoolTableException(f"{path} is not a pool table of layout version {_LAYOUT_VERSION}")
+        except BaseException:
+            if writable and os.path.exists(mapped_path):
+                os.remove(mapped_path)
+            raise
+        capacity = int(self.header['capacity'][0])
+        self.rows = np.memmap(path, dtype=ROW_DTYPE, mode=mode, offset=_HEADER_SIZE, shape=(capacity,))
+        self._sequences = self.rows['sequence']
+        # The float columns are contiguous in each row, so one strided view writes them all at once
+        self._values = np.ndarray((capacity, len(_FLOAT_COLUMNS)), dtype='<f8', buffer=self.rows,
+                                  offset=ROW_DTYPE.fields['reserve_a'][1], strides=(ROW_DTYPE.itemsize, 8))
+        self._index: Dict[str, int] = {}
+        self._indexed = 0
+        self._free: List[int] = []
+
+    @classmethod
+    def create(cls, path: str, capacity: int = POOL_TABLE_CAPACITY) -> 'MappedPoolTable':
+        """
+        Creates (or replaces) a table file owned by this process.
+
+        Args:
+            path (str): The path of the file.
+            capacity (int): The maximum number of pools (default is `POOL_TABLE_CAPACITY`).
+
+        Returns:
+            MappedPoolTable: The writable table.
+        """
+        return cls(path, writable=True, capacity=capacity)
+
+    @classmethod
+    def open(cls, path: str) -> 'MappedPoolTable':
+        """
+        Maps an existing table file read-only.
+
+        Args:
+            path (str): The path of the file.
+
+        Returns:
+            MappedPoolTable: The read-only table.
+        """
+        if not os.path.exists(path):
+            raise PoolTableException(f"Pool table {path} does not exist")
+        return cls(path)
+
+    @property
+    def capacity(self) -> int:
+        return len(self.rows)
+
+    def __len__(self) -> int:
+        return int(self.header['count'][0])
+
+    def _row_values(self, pool: LiquidityPool):
+        return (pool.token_a_reserve, pool.token_b_reserve, pool.k, pool.fee, pool.total_fees_a, pool.total_fees_b,
+                pool.total_lp_tokens)
+
+    def write_row(self, index: int, pool: LiquidityPool) -> None:
+        """
+        Copies the state of a pool into its row under the row's seqlock.
+
+        Args:
+            index (int): The row of the pool.
+            pool (LiquidityPool): The pool to copy.
+        """
+        self._sequences[index] += 1
+        self._values[index] = self._row_values(pool)
+        self._sequences[index] += 1
+
+    def add_pool(self, token_a: str, token_b: str, pool: LiquidityPool) -> int:
+        """
+        Appends a row for a pool, or returns its existing row.
+
+        Args:
+            token_a (str): The symbol of the pool's token A, the smaller symbol of the pair.
+            token_b (str): The symbol of the pool's token B.
+            pool (LiquidityPool): The pool.
+
+        Returns:
+            int: The row index of the pool.
+
+        Raises:
+            PoolTableException: If the table is read-only or full, or a symbol is too long.
+        """
+        if not self.writable:
+            raise PoolTableException("The pool table is read-only")
+        pool_key = AMM._get_pool_key(token_a, token_b)
+        index = self._index.get(pool_key)
+        if index is not None:
+            self.write_row(index, pool)
+            return index
+        self.check_pool(token_a, token_b)
+        symbol_a, symbol_b = token_a.encode(), token_b.encode()
+        if self._free:
+            index = self._free.pop()
+            self._write_symbols(index, symbol_a, symbol_b, self._row_values(pool))
+        else:
+            index = len(self)
+            self.rows[index] = (0, symbol_a, symbol_b) + self._row_values(pool)
+            self.header['count'] = index + 1
+        self._index[pool_key] = index
+        return index
+
+    def check_pool(self, token_a: str, token_b: str) -> None:
+        """
+        Checks that a new pool fits in the table.
+
+        Args:
+            token_a (str): The symbol of the pool's token A.
+            token_b (str): The symbol of the pool's token B.
+
+        Raises:
+            PoolTableException: If the table is full or a symbol is too long.
+        """
+        if not self._free and len(self) == self.capacity:
+            raise PoolTableException(f"The pool table is full ({self.capacity} pools)")
+        if max(len(token_a.encode()), len(token_b.encode())) > SYMBOL_SIZE:
+            raise PoolTableException(f"Token symbols are limited to {SYMBOL_SIZE} bytes in the pool table")
+
+    def remove_pool(self, token_a: str, token_b: str) -> None:
+        """
+        Clears the row of a pool so that readers stop seeing it; the row is reused by the next new pool.
+
+        Args:
+            token_a (str): The symbol for token A.
+            token_b (str): The symbol for token B.
+
+        Raises:
+            PoolTableException: If the table is read-only.
+        """
+        if not self.writable:
+            raise PoolTableException("The pool table is read-only")
+        index = self._index.pop(AMM._get_pool_key(token_a, token_b), None)
+        if index is not None:
+            self._write_symbols(index, b'', b'', (0.0,) * len(_FLOAT_COLUMNS))
+            self._free.append(index)
+
+    def _write_symbols(self, index: int, symbol_a: bytes, symbol_b: bytes, values) -> None:
+        self._sequences[index] += 1
+        self.rows['token_a'][index] = symbol_a
+        self.rows['token_b'][index] = symbol_b
+        self._values[index] = values
+        self._sequences[index] += 1
+
+    def attach(self, amm: AMM) -> None:
+        """
+        Mirrors every current and future pool of an AMM into the table.
+
+        Each pool's listener is wrapped so that its row is rewritten after every change of
+        reserves or fees, and the rows of pools dropped by `AMM.restore` are cleared. New pools are
+        checked by `check_pool` before the AMM creates them, so a pool that does not fit in the
+        table is rejected rather than created without a row. Fee rate changes that do not touch the reserves, such as `adjust_fee`,
+        appear with the next change of the pool or on the next `publish`.
+
+        Args:
+            amm (AMM): The AMM to mirror.
+        """
+        for pool_key, state in amm.snapshot().pools.items():
+            self._attach_pool(amm.pools[pool_key], state.token_a, state.token_b)
+        amm.pool_validators.append(self.check_pool)
+        amm.pool_listeners.append(lambda pool_key, token_a, token_b: self._attach_pool(
+            amm.pools[pool_key], token_a, token_b))
+        amm.pool_removed_listeners.append(lambda pool_key, token_a, token_b: self.remove_pool(token_a, token_b))
+
+    def _attach_pool(self, pool: LiquidityPool, token_a: str, token_b: str) -> None:
+        index = self.add_pool(token_a, token_b, pool)
+        listener = pool.listener
+
+        def mirror(delta_reserve_a: float, delta_reserve_b: float, delta_fees_a: float, delta_fees_b: float) -> None:
+            if listener is not None:
+                listener(delta_reserve_a, delta_reserve_b, delta_fees_a, delta_fees_b)
+            self.write_row(index, pool)
+
+        pool.listener = mirror
+
+    def publish(self, amm: AMM) -> None:
+        """
+        Rewrites the rows of every pool of an AMM, adding rows for new pools.
+
+        Args:
+            amm (AMM): The AMM to copy.
+        """
+        for pool_key, state in amm.snapshot().pools.items():
+            self.add_pool(state.token_a, state.token_b, amm.pools[pool_key])
+
+    def read(self) -> np.ndarray:
+        """
+        Returns a consistent copy of every row in use.
+
+        All rows are copied at once; rows that were being written during the copy are copied
+        again until their sequence counter is even and unchanged. Cleared rows are left out.
+
+        Returns:
+            np.ndarray: A structured array of `ROW_DTYPE` with one row per pool.
+        """
+        count = len(self)
+        sequences = self._sequences[:count].copy()
+        rows = np.array(self.rows[:count])
+        retry = np.flatnonzero((sequences % 2 == 1) | (rows['sequence'] != sequences) |
+                               (self._sequences[:count] != sequences))
+        for index in retry:
+            rows[index] = self.read_row(index)
+        return rows[rows['token_a'] != b'']
+
+    def read_row(self, index: int) -> np.void:
+        """
+        Returns a consistent copy of one row, retrying while it is being written.
+
+        Args:
+            index (int): The row index.
+
+        Returns:
+            np.void: The row record.
+        """
+        while True:
+            sequence = self._sequences[index]
+            if sequence % 2 == 0:
+                row = self.rows[index].copy()
+                if self._sequences[index] == sequence:
+                    return row
+
+    def get_pool_state(self, token_a: str, token_b: str) -> Dict[str, float]:
+        """
+        Reads the state of one pool.
+
+        Args:
+            token_a (str): The symbol for token A.
+            token_b (str): The symbol for token B.
+
+        Returns:
+            Dict[str, float]: The same fields as `LiquidityPool.get_pool_state`, plus the `fee` rate.
+
+        Raises:
+            PoolTableException: If the pool is not in the table.
+        """
+        pool_key = AMM._get_pool_key(token_a, token_b)
+        row = self.read_row(self._find(pool_key))
+        if AMM._get_pool_key(row['token_a'].decode(), row['token_b'].decode()) != pool_key:
+            # The row was cleared or reused since it was indexed
+            self._index.clear()
+            self._index_rows(0)
+            row = self.read_row(self._find(pool_key))
+        return {
+            "token_a_reserve": float(row['reserve_a']),
+            "token_b_reserve": float(row['reserve_b']),
+            "k": float(row['k']),
+            "total_fees_a": float(row['fees_a']),
+            "total_fees_b": float(row['fees_b']),
+            "total_lp_tokens": float(row['lp_supply']),
+            "fee": float(row['fee'])
+        }
+
+    def _find(self, pool_key: str) -> int:
+        index: Optional[int] = self._index.get(pool_key)
+        if index is None:
+            # Index the rows appended since the last lookup, then every row in case a cleared row was reused
+            self._index_rows(self._indexed)
+            index = self._index.get(pool_key)
+            if index is None and self._indexed:
+                self._index.clear()
+                self._index_rows(0)
+                index = self._index.get(pool_key)
+            if index is None:
+                raise PoolTableException(f"Pool {pool_key} is not in the pool table")
+        return index
+
+    def _index_rows(self, start: int) -> None:
+        count = len(self)
+        symbols = zip(self.rows['token_a'][start:count].tolist(), self.rows['token_b'][start:count].tolist())
+        for row, (token_a, token_b) in enumerate(symbols, start):
+            if token_a:
+                self._index[AMM._get_pool_key(token_a.decode(), token_b.decode())] = row
+        self._indexed = count
+
+    def to_snapshot(self) -> AMMSnapshot:
+        """
+        Converts the table into an AMM snapshot, e.g. to start an AMM with `AMM.from_snapshot`.
+
+        Returns:
+            AMMSnapshot: The pool states, with TVL and fee totals summed from them.
+        """
+        rows = self.read()
+        columns = [rows[name].tolist() for name in _FLOAT_COLUMNS]
+        return AMMSnapshot.from_pool_states(
+            PoolState(token_a.decode(), token_b.decode(), *values)
+            for token_a, token_b, *values in zip(rows['token_a'].tolist(), rows['token_b'].tolist(), *columns))
+
+    def close(self) -> None:
+        """
+        Flushes a writable table and unmaps the file.
+        """
+        if self.writable:
+            self.rows.flush()
+            self.header.flush()
+        self._values = self._sequences = self.rows = self.header = None
@@ -0,0 +1,454 @@
+import os
+import struct
+import threading
+import zlib
+from typing import List, Optional, Tuple
+
+from defi_amm.config import WAL_SNAPSHOT_INTERVAL
+from defi_amm.models.amm import AMM, AMMSnapshot, PoolState
+from defi_amm.utils.logging import logger
+
+CREATE_POOL = 0
+ADD_LIQUIDITY = 1
+REMOVE_LIQUIDITY = 2
+SWAP = 3
+
+# Numeric arguments of each operation, after its two token symbols
+_AMOUNTS = {
+    CREATE_POOL: struct.Struct('<dd'),  # initial_a, initial_b
+    ADD_LIQUIDITY: struct.Struct('<dd'),  # amount_a, amount_b
+    REMOVE_LIQUIDITY: struct.Struct('<d'),  # lp_tokens
+    SWAP: struct.Struct('<d'),  # amount
+}
+_RECORD_HEADER = struct.Struct('<II')  # body length, CRC-32 of the body
+_RECORD_PREFIX = struct.Struct('<QBHH')  # LSN, operation, lengths of the two token symbols
+_SNAPSHOT_HEADER = struct.Struct('<8sQI')  # magic, LSN, number of pools
+_SNAPSHOT_POOL = struct.Struct('<HH7d')  # token symbol lengths, then the PoolState numbers
+_SNAPSHOT_CRC = struct.Struct('<I')
+_SNAPSHOT_MAGIC = b'AMMSNAP1'
+
+LogRecord = Tuple[int, int, str, str, Tuple[float, ...]]
+
+
+class WriteAheadLogException(ValueError):
+    """
+    Custom exception for errors related to the write-ahead log.
+
+    Attributes:
+        message (str): Explanation of the error that occurred.
+    """
+
+    def __init__(self, message):
+        """
+        Initializes the WriteAheadLogException with a given message.
+
+        Args:
+            message (str): The error message to be logged and stored in the exception.
+        """
+        super().__init__(message)
+        logger.critical(f"WriteAheadLogException: {message}")
+
+
+def encode_record(lsn: int, operation: int, token_a: str, token_b: str, amounts: Tuple[float, ...]) -> bytes:
+    """
+    Serializes one operation as a length-prefixed, checksummed log record.
+
+    Args:
+        lsn (int): The log sequence number of the record.
+        operation (int): `CREATE_POOL`, `ADD_LIQUIDITY`, `REMOVE_LIQUIDITY` or `SWAP`.
+        token_a (str): The first token symbol, as passed to the AMM method.
+        token_b (str): The second token symbol, as passed to the AMM method.
+        amounts (Tuple[float, ...]): The numeric arguments of the operation.
+
+    Returns:
+        bytes: The encoded record.
+    """
+    symbol_a, symbol_b = token_a.encode(), token_b.encode()
+    body = b''.join((_RECORD_PREFIX.pack(lsn, operation, len(symbol_a), len(symbol_b)), symbol_a, symbol_b,
+                     _AMOUNTS[operation].pack(*amounts)))
+    return _RECORD_HEADER.pack(len(body), zlib.crc32(body)) + body
+
+
+def decode_records(data: bytes) -> Tuple[List[LogRecord], int]:
+    """
+    Parses consecutive log records, stopping at the first truncated or corrupted one.
+
+    Args:
+        data (bytes): The contents of a log segment.
+
+    Returns:
+        Tuple[List[LogRecord], int]: The `(lsn, operation, token_a, token_b, amounts)` of every
+        valid record, and the offset where the valid records end.
+    """
+    records = []
+    offset = 0
+    view = memoryview(data)
+    while offset + _RECORD_HEADER.size <= len(data):
+        length, checksum = _RECORD_HEADER.unpack_from(data, offset)
+        start = offset + _RECORD_HEADER.size
+        end = start + length
+        if length < _RECORD_PREFIX.size or end > len(data) or zlib.crc32(view[start:end]) != checksum:
+            break
+        lsn, operation, length_a, length_b = _RECORD_PREFIX.unpack_from(data, start)
+        amounts = _AMOUNTS.get(operation)
+        position = start + _RECORD_PREFIX.size
+        if amounts is None or position + length_a + length_b + amounts.size != end:
+            break
+        token_a = bytes(view[position:position + length_a]).decode()
+        token_b = bytes(view[position + length_a:position + length_a + length_b]).decode()
+        records.append((lsn, operation, token_a, token_b, amounts.unpack_from(data, position + length_a + length_b)))
+        offset = end
+    return records, offset
+
+
+def encode_snapshot(snapshot: AMMSnapshot, lsn: int) -> bytes:
+    """
+    Serializes the pool states of an AMM snapshot into a compact, checksummed binary image.
+
+    Args:
+        snapshot (AMMSnapshot): The snapshot to encode.
+        lsn (int): The sequence number of the last log record the snapshot includes.
+
+    Returns:
+        bytes: The encoded snapshot.
+    """
+    parts = [_SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, lsn, len(snapshot.pools))]
+    for state in snapshot.pools.values():
+        symbol_a, symbol_b = state.token_a.encode(), state.token_b.encode()
+        parts.extend((_SNAPSHOT_POOL.pack(len(symbol_a), len(symbol_b), *state[2:]), symbol_a, symbol_b))
+    body = b''.join(parts)
+    return body + _SNAPSHOT_CRC.pack(zlib.crc32(body))
+
+
+def decode_snapshot(data: bytes) -> Tuple[AMMSnapshot, int]:
+    """
+    Parses a snapshot image written by `encode_snapshot`.
+
+    Args:
+        data (bytes): The encoded snapshot.
+
+    Returns:
+        Tuple[AMMSnapshot, int]: The snapshot, with TVL and fee totals summed from its pools, and
+        the sequence number of the last log record it includes.
+
+    Raises:
+        WriteAheadLogException: If the image is truncated or corrupted.
+    """
+    body_end = len(data) - _SNAPSHOT_CRC.size
+    if body_end < _SNAPSHOT_HEADER.size or _SNAPSHOT_CRC.unpack_from(data, body_end)[0] != zlib.crc32(
+            memoryview(data)[:body_end]):
+        raise WriteAheadLogException("Corrupted AMM snapshot")
+    magic, lsn, count = _SNAPSHOT_HEADER.unpack_from(data)
+    if magic != _SNAPSHOT_MAGIC:
+        raise WriteAheadLogException("Not an AMM snapshot")
+
+    states = []
+    offset = _SNAPSHOT_HEADER.size
+    for _ in range(count):
+        length_a, length_b, *numbers = _SNAPSHOT_POOL.unpack_from(data, offset)
+        offset += _SNAPSHOT_POOL.size
+        token_a = data[offset:offset + length_a].decode()
+        token_b = data[offset + length_a:offset + length_a + length_b].decode()
+        offset += length_a + length_b
+        states.append(PoolState(token_a, token_b, *numbers))
+    return AMMSnapshot.from_pool_states(states), lsn
+
+
+class WriteAheadLog:
+    """
+    Append-only binary log of AMM operations with group commit, snapshots and crash recovery.
+
+    Every successful `create_pool`, `add_liquidity`, `remove_liquidity` and `swap` is appended as a
+    checksummed record with an increasing log sequence number (LSN). Appending only buffers the
+    record; `wait_durable` writes and fsyncs the buffer. Threads waiting at the same time share a
+    single write and fsync: the first one flushes everything buffered so far while the others wait
+    for it, so throughput grows with concurrency instead of being bound by the fsync latency.
+
+    The log is split into segments named after their first LSN. `checkpoint` writes the whole AMM
+    state as a compact snapshot, starts a new segment and deletes the files the snapshot replaces,
+    so `recover` loads the latest snapshot and replays at most `snapshot_interval` records.
+
+    Attributes:
+        directory (str): The directory holding the segments and snapshots.
+        snapshot_interval (int): The number of records after which `needs_checkpoint` becomes True.
+        sync (bool): If False, records are written without fsync (for tests and benchmarks).
+    """
+
+    def __init__(self, directory: str, snapshot_interval: int = WAL_SNAPSHOT_INTERVAL, sync: bool = True):
+        """
+        Initializes the log over a directory, creating it if needed.
+
+        `recover` must be called before appending, even for an empty directory.
+
+        Args:
+            directory (str): The directory holding the segments and snapshots.
+            snapshot_interval (int): Records between snapshots (default is `WAL_SNAPSHOT_INTERVAL`).
+            sync (bool): Whether to fsync on commit (default is True).
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.snapshot_interval = snapshot_interval
+        self.sync = sync
+        self._condition = threading.Condition()
+        self._buffer = bytearray()
+        self._file = None
+        self._next_lsn = 1
+        self._buffered_lsn = 0
+        self._durable_lsn = 0
+        self._snapshot_lsn = 0
+        self._flushing = False
+
+    @property
+    def last_lsn(self) -> int:
+        """
+        The LSN of the last appended record, 0 if there is none.
+        """
+        return self._next_lsn - 1
+
+    @property
+    def needs_checkpoint(self) -> bool:
+        """
+        Whether `snapshot_interval` records were appended since the last snapshot.
+        """
+        return self._next_lsn - 1 - self._snapshot_lsn >= self.snapshot_interval
+
+    def _files(self, prefix: str, suffix: str) -> List[Tuple[int, str]]:
+        """
+        Lists the files named `<prefix><lsn><suffix>` in the directory, ordered by LSN.
+        """
+        files = []
+        for name in os.listdir(self.directory):
+            if name.startswith(prefix) and name.endswith(suffix):
+                number = name[len(prefix):len(name) - len(suffix)]
+                if number.isdigit():
+                    files.append((int(number), os.path.join(self.directory, name)))
+        return sorted(files)
+
+    def _fsync_directory(self) -> None:
+        if self.sync and hasattr(os, 'O_DIRECTORY'):
+            descriptor = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(descriptor)
+            finally:
+                os.close(descriptor)
+
+    def _open_segment(self, first_lsn: int) -> None:
+        if self._file is not None:
+            self._file.close()
+        self._file = open(os.path.join(self.directory, f"wal-{first_lsn:020d}.log"), 'ab')
+        self._fsync_directory()
+
+    def recover(self, amm: AMM) -> int:
+        """
+        Rebuilds the AMM state from the latest snapshot and the records logged after it.
+
+        A truncated or corrupted record at the end of a segment, left by a crash during a write, is
+        discarded and cut from the file. Replayed swaps are applied to the pools directly, so they
+        are not counted as recent volume.
+
+        Args:
+            amm (AMM): An AMM without pools, which receives the recovered state.
+
+        Returns:
+            int: The number of records replayed on top of the snapshot.
+
+        Raises:
+            WriteAheadLogException: If the AMM already has pools, the log has a gap, a snapshot is
+                corrupted, or a record cannot be replayed.
+        """
+        if len(amm.pools):
+            raise WriteAheadLogException("Recovery requires an AMM without pools")
+
+        snapshots = self._files('snapshot-', '.snap')
+        last_lsn = 0
+        if snapshots:
+            with open(snapshots[-1][1], 'rb') as file:
+                snapshot, last_lsn = decode_snapshot(file.read())
+            amm.restore(snapshot)
+        snapshot_lsn = last_lsn
+
+        replayed = 0
+        for _, path in self._files('wal-', '.log'):
+            with open(path, 'r+b') as file:
+                data = file.read()
+                records, valid_end = decode_records(data)
+                if valid_end < len(data):
+                    logger.warning(f"Discarding {len(data) - valid_end} bytes of incomplete log records in {path}")
+                    file.truncate(valid_end)
+            for lsn, operation, token_a, token_b, amounts in records:
+                if lsn <= last_lsn:
+                    continue
+                if lsn != last_lsn + 1:
+                    raise WriteAheadLogException(f"Log records {last_lsn + 1} to {lsn - 1} are missing")
+                try:
+                    self._replay(amm, operation, token_a, token_b, amounts)
+                except Exception as e:
+                    raise WriteAheadLogException(f"Cannot replay log record {lsn}: {e}") from e
+                last_lsn = lsn
+                replayed += 1
+
+        with self._condition:
+            self._next_lsn = last_lsn + 1
+            self._buffered_lsn = self._durable_lsn = last_lsn
+            self._snapshot_lsn = snapshot_lsn
+            self._open_segment(last_lsn + 1)
+        logger.info(f"Recovered {len(amm.pools)} pools at LSN {last_lsn}, replaying {replayed} records")
+        return replayed
+
+    @staticmethod
+    def _replay(amm: AMM, operation: int, token_a: str, token_b: str, amounts: Tuple[float, ...]) -> None:
+        if operation == CREATE_POOL:
+            amm.create_pool(token_a, token_b, *amounts)
+        elif operation == ADD_LIQUIDITY:
+            amm.add_liquidity(token_a, token_b, *amounts)
+        elif operation == REMOVE_LIQUIDITY:
+            amm.remove_liquidity(token_a, token_b, *amounts)
+        else:
+            pool = amm.get_pool(token_a, token_b)
+            if token_a < token_b:
+                pool.swap_a_to_b(*amounts)
+            else:
+                pool.swap_b_to_a(*amounts)
+
+    def append(self, operation: int, token_a: str, token_b: str, *amounts: float) -> int:
+        """
+        Buffers a record of an operation that was applied to the AMM.
+
+        Records of the same pool must be appended in the order the operations were applied, i.e.
+        while holding the pool's lock. The record is durable only after `wait_durable` returns.
+
+        Args:
+            operation (int): `CREATE_POOL`, `ADD_LIQUIDITY`, `REMOVE_LIQUIDITY` or `SWAP`.
+            token_a (str): The first token symbol, as passed to the AMM method.
+            token_b (str): The second token symbol, as passed to the AMM method.
+            *amounts (float): The numeric arguments of the AMM method.
+
+        Returns:
+            int: The LSN of the record.
+
+        Raises:
+            WriteAheadLogException: If the log was not recovered yet.
+        """
+        with self._condition:
+            if self._file is None:
+                raise WriteAheadLogException("The log must be recovered before appending")
+            lsn = self._next_lsn
+            self._buffer += encode_record(lsn, operation, token_a, token_b, amounts)
+            self._next_lsn = lsn + 1
+            self._buffered_lsn = lsn
+        return lsn
+
+    def _write(self, data: bytes) -> None:
+        self._file.write(data)
+        self._file.flush()
+        if self.sync:
+            os.fsync(self._file.fileno())
+
+    def wait_durable(self, lsn: int) -> None:
+        """
+        Blocks until the record `lsn` and every record before it are written to disk.
+
+        If no flush is in progress the caller writes and fsyncs everything buffered so far,
+        committing the records of all concurrent callers at once; otherwise it waits for the
+        running flush and repeats.
+
+        Args:
+            lsn (int): The LSN returned by `append`.
+        """
+        while True:
+            with self._condition:
+                while self._flushing and self._durable_lsn < lsn:
+                    self._condition.wait()
+                if self._durable_lsn >= lsn:
+                    return
+                self._flushing = True
+                data, self._buffer = self._buffer, bytearray()
+                target = self._buffered_lsn
+            try:
+                self._write(data)
+            except BaseException:
+                with self._condition:
+                    self._buffer[:0] = data
+                    self._flushing = False
+                    self._condition.notify_all()
+                raise
+            with self._condition:
+                self._durable_lsn = target
+                self._flushing = False
+                self._condition.notify_all()
+
+    def flush(self) -> None:
+        """
+        Makes every appended record durable.
+        """
+        self.wait_durable(self.last_lsn)
+
+    def checkpoint(self, amm: AMM) -> int:
+        """
+        Writes a snapshot of the AMM, starts a new segment and deletes the files it supersedes.
+
+        The caller must stop all operations on the AMM for the duration, e.g. by holding
+        `PoolLockManager.lock_all`, so that the snapshot reflects exactly the logged records. The
+        snapshot is written to a temporary file and renamed, so a crash never leaves a partial one.
+
+        Args:
+            amm (AMM): The AMM whose state the log describes.
+
+        Returns:
+            int: The LSN of the last record included in the snapshot.
+        """
+        self.flush()
+        with self._condition:
+            while self._flushing:
+                self._condition.wait()
+            lsn = self._next_lsn - 1
+            path = os.path.join(self.directory, f"snapshot-{lsn:020d}.snap")
+            temporary_path = path + '.tmp'
+            with open(temporary_path, 'wb') as file:
+                file.write(encode_snapshot(amm.snapshot(), lsn))
+                file.flush()
+                if self.sync:
+                    os.fsync(file.fileno())
+            os.replace(temporary_path, path)
+            self._open_segment(lsn + 1)
+            self._snapshot_lsn = lsn
+
+        for first_lsn, segment in self._files('wal-', '.log'):
+            if first_lsn <= lsn:
+                os.remove(segment)
+        for snapshot_lsn, snapshot in self._files('snapshot-', '.snap'):
+            if snapshot_lsn < lsn:
+                os.remove(snapshot)
+        logger.info(f"Checkpointed {len(amm.pools)} pools at LSN {lsn}")
+        return lsn
+
+    def close(self) -> None:
+        """
+        Flushes the buffered records and closes the current segment.
+        """
+        if self._file is not None:
+            self.flush()
+            with self._condition:
+                self._file.close()
+                self._file = None
+
+
+def open_write_ahead_log(directory: Optional[str], amm: AMM, snapshot_interval: int = WAL_SNAPSHOT_INTERVAL,
+                         sync: bool = True) -> Optional[WriteAheadLog]:
+    """
+    Opens the log of a directory and recovers its state into the AMM.
+
+    Args:
+        directory (Optional[str]): The log directory; logging is disabled if None or empty.
+        amm (AMM): An AMM without pools, which receives the recovered state.
+        snapshot_interval (int): Records between snapshots (default is `WAL_SNAPSHOT_INTERVAL`).
+        sync (bool): Whether to fsync on commit (default is True).
+
+    Returns:
+        Optional[WriteAheadLog]: The recovered log, or None if logging is disabled.
+    """
+    if not directory:
+        return None
+    write_ahead_log = WriteAheadLog(directory, snapshot_interval, sync)
+    write_ahead_log.recover(amm)
+    return write_ahead_log
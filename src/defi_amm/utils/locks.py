@@ -0,0 +1,85 @@
+import threading
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Tuple
+
+
+class PoolLockManager:
+    """
+    Striped locks guarding the pools of an AMM shared between threads.
+
+    Each pool maps to one of a fixed number of locks by the hash of its canonical key, so
+    operations on different pools usually proceed in parallel while operations on the same pool
+    are serialized. Locks for several pools are always acquired in stripe order, which keeps
+    multi-pool operations free of deadlocks.
+
+    Attributes:
+        stripes (List[threading.Lock]): The underlying locks.
+    """
+
+    def __init__(self, num_stripes: int = 64):
+        """
+        Initializes the manager with a fixed number of lock stripes.
+
+        Args:
+            num_stripes (int): The number of locks to distribute pools over (default is 64).
+        """
+        self.stripes: List[threading.Lock] = [threading.Lock() for _ in range(max(num_stripes, 1))]
+
+    def stripe_index(self, token_a: str, token_b: str) -> int:
+        """
+        Returns the index of the lock guarding the pool of a token pair, regardless of token order.
+
+        Args:
+            token_a (str): The symbol for token A.
+            token_b (str): The symbol for token B.
+
+        Returns:
+            int: The stripe index.
+        """
+        return hash((min(token_a, token_b), max(token_a, token_b))) % len(self.stripes)
+
+    @contextmanager
+    def lock(self, token_a: str, token_b: str) -> Iterator[None]:
+        """
+        Holds the lock of a single pool for the duration of the `with` block.
+
+        Args:
+            token_a (str): The symbol for token A.
+            token_b (str): The symbol for token B.
+        """
+        with self.stripes[self.stripe_index(token_a, token_b)]:
+            yield
+
+    @contextmanager
+    def lock_many(self, pairs: Iterable[Tuple[str, str]]) -> Iterator[None]:
+        """
+        Holds the locks of several pools for the duration of the `with` block.
+
+        Args:
+            pairs (Iterable[Tuple[str, str]]): The token pairs identifying the pools.
+        """
+        with self._hold(sorted({self.stripe_index(token_a, token_b) for token_a, token_b in pairs})):
+            yield
+
+    @contextmanager
+    def lock_all(self) -> Iterator[None]:
+        """
+        Holds the locks of every pool for the duration of the `with` block, stopping all operations.
+        """
+        with self._hold(range(len(self.stripes))):
+            yield
+
+    @contextmanager
+    def _hold(self, indexes: Iterable[int]) -> Iterator[None]:
+        """
+        Acquires the given stripes in increasing order and releases them in reverse.
+        """
+        acquired = []
+        try:
+            for index in indexes:
+                self.stripes[index].acquire()
+                acquired.append(index)
+            yield
+        finally:
+            for index in reversed(acquired):
+                self.stripes[index].release()
@@ -0,0 +1,42 @@
+from typing import NamedTuple, Optional, Union
+
+import numpy as np
+
+Seed = Union[None, int, np.random.SeedSequence]
+
+
+class RandomStreams(NamedTuple):
+    """
+    Independent random generators for the components of one simulation run.
+
+    Attributes:
+        simulation (np.random.Generator): Prices and events of `MarketSimulation`.
+        risk (np.random.Generator): Monte Carlo scenarios of `RiskManagement`.
+    """
+    simulation: np.random.Generator
+    risk: np.random.Generator
+
+
+def create_streams(seed: Seed = None) -> RandomStreams:
+    """
+    Spawns one generator per component from a single seed.
+
+    The generators come from children of the same `SeedSequence`, so they are statistically
+    independent of each other, and the whole set is reproducible from `seed`. Passing a child of
+    another `SeedSequence` gives a parallel worker its own independent set.
+
+    Args:
+        seed (Optional[Union[int, np.random.SeedSequence]]): The root seed; fresh entropy is used if None.
+
+    Returns:
+        RandomStreams: The generators for the simulation and the risk manager.
+    """
+    seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    return RandomStreams(*(np.random.default_rng(child) for child in seed_sequence.spawn(len(RandomStreams._fields))))
+
+
+def default_rng(rng: Optional[np.random.Generator]) -> np.random.Generator:
+    """
+    Returns the given generator, or a freshly seeded one if None.
+    """
+    return rng if rng is not None else np.random.default_rng()
@@ -32,6 +32,30 @@ class TestAMM(unittest.TestCase):
         eth_received = self.amm.swap("USDC", "ETH", 100)
         self.assertAlmostEqual(eth_received, 990.0695, delta=0.0001)
 
+    def test_swap_records_volume(self):
+        eth_received = self.amm.swap("USDC", "ETH", 100)
+        self.amm.swap("ETH", "USDC", 2)
+        # Volume is denominated in the pool's token A, ETH
+        self.assertAlmostEqual(self.amm.calculate_recent_volume("USDC", "ETH", 60), eth_received + 2)
+        self.assertEqual(self.amm.calculate_recent_volume("DAI", "USDT", 3600), 0)
+
+    def test_adjust_fee_uses_tracked_volume(self):
+        self.amm.create_pool("DAI", "USDT", 1000, 1000)
+        self.amm.adjust_fee("DAI", "USDT")
+        self.assertAlmostEqual(self.amm.get_pool("DAI", "USDT").fee, 0.003)
+
+        self.amm.volume_tracker.record("DAI-USDT", 2000000)
+        self.amm.adjust_fee("DAI", "USDT")
+        self.assertAlmostEqual(self.amm.get_pool("DAI", "USDT").fee, 0.006)
+
+    def test_quote(self):
+        state = self.amm.get_pool_state("USDC", "ETH")
+        quote = self.amm.quote("USDC", "ETH", [100, 200])
+        self.assertEqual(self.amm.get_pool_state("USDC", "ETH"), state)
+        self.assertAlmostEqual(quote.amounts_out[0], 990.0695, delta=0.0001)
+        self.assertGreater(quote.price_impacts[1], quote.price_impacts[0])
+        self.assertEqual(quote.amounts_out[1], self.amm.swap("USDC", "ETH", 200))
+
     def test_get_exchange_rate(self):
         rate = self.amm.get_exchange_rate("USDC", "ETH")
         self.assertAlmostEqual(rate, 0.001, delta=0.0001)
@@ -56,10 +80,83 @@ class TestAMM(unittest.TestCase):
         self.assertIn("USDC", fees)
         self.assertGreater(fees["USDC"], 0)
 
+    def test_accumulators_track_pool_mutations(self):
+        amm = AMM(check_consistency=True)
+        amm.create_pool("USDC", "ETH", 1000, 1)
+        amm.create_pool("ETH", "DAI", 1, 1000)
+        amm.add_liquidity("USDC", "ETH", 100, 0.1)
+        amm.swap("USDC", "ETH", 100)
+        amm.swap("DAI", "ETH", 0.5)
+        amm.remove_liquidity("DAI", "ETH", 3)
+        amm.get_pool("USDC", "ETH").swap_batch([0.1, 5, 0.2], [0, 1, 0])
+        self.assertEqual(amm.get_total_value_locked().keys(), {"USDC", "ETH", "DAI"})
+        self.assertGreater(amm.calculate_fees_earned()["DAI"], 0)
+
+    def test_accumulators_detect_untracked_writes(self):
+        self.amm.get_pool("USDC", "ETH").token_a_reserve += 1
+        with self.assertRaises(AMMException):
+            self.amm.verify_accumulators()
+
     def test_nonexistent_pool(self):
         with self.assertRaises(AMMException):
             self.amm.get_pool("BTC", "LTC")
 
+    def test_tokens_with_dashes(self):
+        amm = AMM(check_consistency=True)
+        amm.create_pool("DAI-X", "USDC", 1000, 1000)
+        self.assertEqual(amm.get_pool_tokens("DAI\\-X-USDC"), ("DAI-X", "USDC"))
+        received = amm.swap("USDC", "DAI-X", 10)
+        self.assertGreater(received, 0)
+        self.assertEqual(amm.calculate_recent_volume("DAI-X", "USDC", 60), received)
+        with self.assertRaises(AMMException):
+            amm.get_pool("DAI", "X-USDC")
+
+        # Another split of the same symbols is a different pair with its own key
+        amm.create_pool("DAI", "X-USDC", 500, 500)
+        self.assertEqual(amm.find_pool_key("X-USDC", "DAI"), "DAI-X\\-USDC")
+        self.assertEqual(amm.calculate_recent_volume("DAI", "X-USDC", 60), 0)
+        self.assertEqual(amm.get_pool("DAI", "X-USDC").token_a_reserve, 500)
+        self.assertEqual(amm.get_total_value_locked()["USDC"], amm.get_pool("DAI-X", "USDC").token_b_reserve)
+        with self.assertRaises(AMMException):
+            amm.create_pool("X-USDC", "DAI", 1, 1)
+
+    def test_fork_looks_up_pools_by_token_ids(self):
+        self.amm.create_pool("DAI", "USDC", 1000, 1000)
+        fork = self.amm.fork()
+        self.assertEqual(fork.get_pool_tokens("DAI-USDC"), ("DAI", "USDC"))
+        fork.swap("DAI", "USDC", 10)
+        self.assertIs(fork.get_pool("USDC", "DAI"), fork.pools["DAI-USDC"])
+        self.assertEqual(self.amm.pools["DAI-USDC"].token_a_reserve, 1000)
+        with self.assertRaises(AMMException):
+            fork.get_pool("DAI", "ETH")
+
+    def test_token_pools_index(self):
+        amm = AMM(check_consistency=True)
+        amm.create_pool("USDC", "ETH", 2000, 1)
+        amm.create_pool("DAI", "USDC", 500, 500)
+        amm.create_pool("DAI", "ETH", 300, 3)
+        self.assertCountEqual(amm.get_token_pools("USDC"), ["ETH-USDC", "DAI-USDC"])
+        self.assertEqual(amm.get_token_pools("BTC"), [])
+        amm.swap("USDC", "DAI", 10)
+        exposure = amm.get_token_exposure("USDC")
+        self.assertEqual(exposure, {"ETH-USDC": amm.pools["ETH-USDC"].token_b_reserve,
+                                    "DAI-USDC": amm.pools["DAI-USDC"].token_b_reserve})
+        self.assertAlmostEqual(amm.get_token_value_locked("USDC"), amm.get_total_value_locked()["USDC"])
+        self.assertEqual(amm.get_token_value_locked("BTC"), 0)
+
+    def test_token_pools_follow_restore_and_fork(self):
+        snapshot = self.amm.snapshot()
+        self.amm.create_pool("DAI", "USDC", 500, 500)
+        fork = self.amm.fork()
+        fork.create_pool("DAI", "ETH", 300, 3)
+        self.assertCountEqual(fork.get_token_pools("DAI"), ["DAI-USDC", "DAI-ETH"])
+        self.assertEqual(fork.get_token_exposure("DAI"), {"DAI-USDC": 500, "DAI-ETH": 300})
+        self.amm.restore(snapshot)
+        self.assertEqual(self.amm.get_token_pools("DAI"), [])
+        self.assertEqual(self.amm.get_token_pools("USDC"), ["ETH-USDC"])
+        fork.restore(snapshot)
+        self.assertEqual(fork.get_token_pools("DAI"), [])
+
     def test_duplicate_pool_creation(self):
         with self.assertRaises(AMMException):
             self.amm.create_pool("USDC", "ETH", 1000, 1)
@@ -72,26 +169,17 @@ class TestAMMExtend(unittest.TestCase):
         self.amm.get_pool = MagicMock()
 
         self.mock_pool = MagicMock()
-        self.mock_pool.get_pool_state.return_value = {
-            'token_a_reserve': 1000,
-            'token_b_reserve': 2000,
-            'fee': 0.003
-        }
+        self.mock_pool.get_reserves.return_value = (1000, 2000)
+        self.mock_pool.fee = 0.003
         self.amm.get_pool.return_value = self.mock_pool
 
     def test_calculate_rebalancing_incentive_balanced_pool(self):
-        self.mock_pool.get_pool_state.return_value = {
-            'token_a_reserve': 1000,
-            'token_b_reserve': 1000
-        }
+        self.mock_pool.get_reserves.return_value = (1000, 1000)
         incentive = self.amm.calculate_rebalancing_incentive('token_a', 'token_b', 100, 100)
         self.assertEqual(incentive, 0.0)
 
     def test_calculate_rebalancing_incentive_unbalanced_pool(self):
-        self.mock_pool.get_pool_state.return_value = {
-            'token_a_reserve': 1000,
-            'token_b_reserve': 2000
-        }
+        self.mock_pool.get_reserves.return_value = (1000, 2000)
         incentive = self.amm.calculate_rebalancing_incentive('token_a', 'token_b', 1000, 500)
         self.assertGreater(incentive, 0.0)
 
@@ -103,5 +191,88 @@ class TestAMMExtend(unittest.TestCase):
         self.assertEqual(lp_tokens, 101)  # 100 LP tokens + 1% incentive
 
 
+class TestAMMSnapshots(unittest.TestCase):
+    def setUp(self):
+        self.amm = AMM(check_consistency=True)
+        self.amm.create_pool("USDC", "ETH", 2000, 1)
+        self.amm.create_pool("DAI", "USDC", 1000, 1000)
+
+    def test_restore_undoes_changes(self):
+        snapshot = self.amm.snapshot()
+        state = self.amm.get_pool_state("DAI", "USDC")
+        pool = self.amm.get_pool("DAI", "USDC")
+        self.amm.swap("DAI", "USDC", 100)
+        self.amm.create_pool("DAI", "ETH", 2000, 1)
+
+        self.amm.restore(snapshot)
+        self.assertIs(self.amm.get_pool("DAI", "USDC"), pool)
+        self.assertEqual(self.amm.get_pool_state("DAI", "USDC"), state)
+        self.assertNotIn("DAI-ETH", self.amm.pools)
+        self.assertEqual(self.amm.get_total_value_locked(), snapshot.total_value_locked)
+        self.assertEqual(self.amm.calculate_fees_earned(), snapshot.fees_earned)
+
+    def test_restore_recreates_pools(self):
+        self.amm.create_pool("DAI", "ETH", 2000, 1)
+        with_pool = self.amm.snapshot()
+        created = []
+        self.amm.restore(AMM().snapshot())
+        self.assertEqual(len(self.amm.pools), 0)
+        self.amm.pool_listeners.append(lambda *args: created.append(args))
+        self.amm.restore(with_pool)
+        self.assertEqual(len(created), 3)
+        self.assertEqual(self.amm.get_pool_state("DAI", "ETH")["token_b_reserve"], 1)
+        self.amm.verify_accumulators()
+
+    def test_snapshot_is_cached_until_a_change(self):
+        snapshot = self.amm.snapshot()
+        self.assertIs(self.amm.snapshot(), snapshot)
+        self.amm.adjust_fee("DAI", "USDC")
+        self.assertIsNot(self.amm.snapshot(), snapshot)
+        snapshot = self.amm.snapshot()
+        self.amm.swap("USDC", "ETH", 10)
+        self.assertIsNot(self.amm.snapshot(), snapshot)
+
+    def test_fork_is_independent(self):
+        fork = self.amm.fork()
+        fork.swap("DAI", "USDC", 100)
+        fork.create_pool("DAI", "ETH", 2000, 1)
+        self.amm.swap("USDC", "DAI", 50)
+
+        self.assertEqual(fork.get_pool_state("DAI", "USDC")["token_a_reserve"], 1100)
+        self.assertLess(self.amm.get_pool_state("DAI", "USDC")["token_a_reserve"], 1000)
+        self.assertNotIn("DAI-ETH", self.amm.pools)
+        self.assertEqual(len(fork.pools), 3)
+        fork.verify_accumulators()
+        self.amm.verify_accumulators()
+
+    def test_fork_copies_only_touched_pools(self):
+        fork = self.amm.fork()
+        fork.swap("DAI", "USDC", 100)
+        self.assertEqual(list(fork.pools.materialized), ["DAI-USDC"])
+        self.assertIs(fork.snapshot().pools["ETH-USDC"], self.amm.snapshot().pools["ETH-USDC"])
+        self.assertIsNot(fork.get_pool("DAI", "USDC"), self.amm.get_pool("DAI", "USDC"))
+
+    def test_fork_restore(self):
+        fork = self.amm.fork()
+        snapshot = fork.snapshot()
+        fork.swap("DAI", "USDC", 100)
+        fork.create_pool("DAI", "ETH", 2000, 1)
+        fork.restore(snapshot)
+        self.assertEqual(fork.get_pool_state("DAI", "USDC"), self.amm.get_pool_state("DAI", "USDC"))
+        self.assertNotIn("DAI-ETH", fork.pools)
+        fork.verify_accumulators()
+
+    def test_columnar_restore_cannot_drop_pools(self):
+        amm = AMM(columnar=True)
+        amm.create_pool("DAI", "USDC", 1000, 1000)
+        snapshot = amm.snapshot()
+        amm.swap("DAI", "USDC", 100)
+        amm.restore(snapshot)
+        self.assertEqual(amm.get_pool_state("DAI", "USDC")["token_a_reserve"], 1000)
+        amm.create_pool("DAI", "ETH", 2000, 1)
+        with self.assertRaises(AMMException):
+            amm.restore(snapshot)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+from src.defi_amm.models.amm import AMM
+from src.defi_amm.models.arbitrage import ArbitrageDetector
+
+
+class TestArbitrageDetector(unittest.TestCase):
+
+    def setUp(self):
+        self.amm = AMM()
+        self.amm.create_pool("A", "B", 1000, 1000)
+        self.amm.create_pool("B", "C", 1000, 1000)
+        self.amm.create_pool("A", "C", 1000, 1200)
+        self.detector = ArbitrageDetector(self.amm)
+
+    def test_finds_profitable_cycle(self):
+        opportunities = self.detector.find_opportunities()
+        self.assertEqual(len(opportunities), 1)
+        opportunity = opportunities[0]
+        self.assertEqual(set(opportunity.path), {"A", "B", "C"})
+        self.assertEqual(opportunity.path[0], opportunity.path[-1])
+        self.assertGreater(opportunity.profit, 0)
+
+    def test_closed_form_matches_execution_and_is_optimal(self):
+        opportunity = self.detector.find_opportunities()[0]
+        for scale in (0.9, 1.1):
+            fork = self.amm.fork()
+            amount = opportunity.amount_in * scale
+            for token_from, token_to in zip(opportunity.path, opportunity.path[1:]):
+                amount = fork.swap(token_from, token_to, amount)
+            self.assertLess(amount - opportunity.amount_in * scale, opportunity.profit)
+        profit = self.detector.execute(opportunity)
+        self.assertAlmostEqual(profit, opportunity.profit, delta=opportunity.profit * 1e-9)
+        self.assertEqual(self.detector.find_opportunities(), [])
+
+    def test_balanced_pools_have_no_opportunity(self):
+        amm = AMM()
+        amm.create_pool("A", "B", 1000, 2000)
+        amm.create_pool("B", "C", 1000, 1000)
+        amm.create_pool("A", "C", 1000, 2000)
+        self.assertEqual(ArbitrageDetector(amm).find_opportunities(), [])
+
+    def test_rechecks_only_changed_pools(self):
+        self.detector.execute(self.detector.find_opportunities()[0])
+        self.assertEqual(self.detector.find_opportunities(), [])
+        self.amm.create_pool("D", "E", 1000, 1000)
+        self.amm.create_pool("E", "F", 1000, 1000)
+        self.amm.create_pool("D", "F", 1000, 1000)
+        self.assertEqual(self.detector.find_opportunities(), [])
+        self.amm.swap("D", "E", 200)
+        self.assertEqual(self.detector._dirty, {"D-E"})
+        opportunities = self.detector.find_opportunities()
+        self.assertEqual(len(opportunities), 1)
+        self.assertEqual(set(opportunities[0].path), {"D", "E", "F"})
+        self.assertEqual(self.detector._dirty, set())
+
+    def test_rebuilds_after_restore_drops_pools(self):
+        snapshot = self.amm.snapshot()
+        self.amm.create_pool("C", "D", 1000, 1000)
+        self.detector.find_opportunities()
+        self.amm.restore(snapshot)
+        self.assertEqual(len(self.detector.find_opportunities()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import math
+import unittest
+
+import numpy as np
+
+from src.defi_amm.models.fixed_point_pool import (FixedPointLiquidityPool, FixedPointPoolArray,
+                                                  FixedPointPoolException, MINIMUM_LIQUIDITY, WEI, from_wei,
+                                                  get_amount_out, to_wei)
+from src.defi_amm.models.liquidity_pool import SWAP_A_TO_B, SWAP_B_TO_A
+
+
+def uniswap_v2_amount_out(amount_in, reserve_in, reserve_out):
+    amount_in_with_fee = amount_in * 997
+    return amount_in_with_fee * reserve_out // (reserve_in * 1000 + amount_in_with_fee)
+
+
+class TestFixedPointLiquidityPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = FixedPointLiquidityPool(1000 * WEI, 2_000_000 * WEI)
+
+    def test_matches_uniswap_v2_rounding(self):
+        for amount_in, reserve_in, reserve_out in ((WEI, 1000 * WEI, 2_000_000 * WEI), (7, 1001, 999),
+                                                  (123456789, 10 ** 30, 3 * 10 ** 24)):
+            self.assertEqual(get_amount_out(amount_in, reserve_in, reserve_out),
+                             uniswap_v2_amount_out(amount_in, reserve_in, reserve_out))
+
+    def test_swaps_are_exact_and_never_decrease_k(self):
+        k = self.pool.k
+        expected_b = uniswap_v2_amount_out(WEI, 1000 * WEI, 2_000_000 * WEI)
+        self.assertEqual(self.pool.swap_a_to_b(WEI), expected_b)
+        self.assertEqual(self.pool.token_b_reserve, 2_000_000 * WEI - expected_b)
+        self.assertGreaterEqual(self.pool.k, k)
+        k = self.pool.k
+        self.pool.swap_b_to_a(5000 * WEI)
+        self.assertGreaterEqual(self.pool.k, k)
+        self.assertEqual(self.pool.total_fees_a, 3 * WEI // 1000)
+        self.assertEqual(self.pool.total_fees_b, 15 * WEI)
+
+    def test_dust_swap_is_rejected(self):
+        pool = FixedPointLiquidityPool(10 ** 6, 10 ** 6)
+        with self.assertRaises(FixedPointPoolException):
+            pool.swap_a_to_b(1)
+        with self.assertRaises(FixedPointPoolException):
+            pool.swap_a_to_b(1.5)
+
+    def test_liquidity_follows_uniswap_v2(self):
+        self.assertEqual(self.pool.total_lp_tokens, math.isqrt(2_000_000_000 * WEI * WEI))
+        supply = self.pool.total_lp_tokens
+        minted = self.pool.add_liquidity(10 * WEI, 30_000 * WEI)  # Excess token B is donated
+        self.assertEqual(minted, 10 * WEI * supply // (1000 * WEI))
+        supply = self.pool.total_lp_tokens
+        amount_a, amount_b = self.pool.remove_liquidity(minted)
+        self.assertEqual(amount_a, minted * (1010 * WEI) // supply)
+        self.assertEqual(amount_b, minted * (2_030_000 * WEI) // supply)
+        self.assertLessEqual(amount_a, 10 * WEI)
+        with self.assertRaises(FixedPointPoolException):
+            self.pool.remove_liquidity(self.pool.total_lp_tokens - MINIMUM_LIQUIDITY + 1)
+
+    def test_swap_batch_matches_single_swaps(self):
+        reference = FixedPointLiquidityPool(1000 * WEI, 2_000_000 * WEI)
+        amounts = [WEI, 3000 * WEI, 1, 5 * WEI // 2]
+        directions = [SWAP_A_TO_B, SWAP_B_TO_A, SWAP_B_TO_A, SWAP_A_TO_B]
+        amounts_out, success = self.pool.swap_batch(amounts, directions)
+        expected = [reference.swap_a_to_b(amounts[0]), reference.swap_b_to_a(amounts[1]), 0,
+                    reference.swap_a_to_b(amounts[3])]  # 1 wei of token B buys less than 1 wei of token A
+        self.assertEqual(amounts_out.tolist(), expected)
+        self.assertEqual(success.tolist(), [True, True, False, True])
+        self.assertEqual(self.pool.get_pool_state(), reference.get_pool_state())
+
+    def test_swap_batch_rejects_unknown_directions(self):
+        state = self.pool.get_pool_state()
+        with self.assertRaises(FixedPointPoolException):
+            self.pool.swap_batch([WEI, WEI], [SWAP_A_TO_B, 2])
+        self.assertEqual(self.pool.get_pool_state(), state)
+        array = FixedPointPoolArray.from_pools([self.pool])
+        with self.assertRaises(FixedPointPoolException):
+            array.apply_swaps([0], [WEI], 5)
+
+    def test_wei_conversion(self):
+        self.assertEqual(to_wei(0.1), 10 ** 17)
+        self.assertEqual(to_wei("1.5", decimals=6), 1_500_000)
+        self.assertEqual(from_wei(25 * 10 ** 17), 2.5)
+
+
+class TestFixedPointPoolArray(unittest.TestCase):
+    def replay(self, reserves, swaps):
+        pools = [FixedPointLiquidityPool(reserve_a, reserve_b) for reserve_a, reserve_b in reserves]
+        array = FixedPointPoolArray.from_pools(pools)
+        indices, amounts, directions = zip(*swaps)
+        result = array.apply_swaps(indices, amounts, directions)
+
+        expected = []
+        for index, amount, direction in swaps:
+            pool = pools[index]
+            try:
+                expected.append(pool.swap_a_to_b(amount) if direction == SWAP_A_TO_B else pool.swap_b_to_a(amount))
+            except FixedPointPoolException:
+                expected.append(0)
+        self.assertEqual([int(amount) for amount in result.amounts_out], expected)
+        self.assertEqual([int(reserve) for reserve in array.reserve_a], [pool.token_a_reserve for pool in pools])
+        self.assertEqual([int(reserve) for reserve in array.reserve_b], [pool.token_b_reserve for pool in pools])
+        self.assertEqual([int(fees) for fees in array.fees_a], [pool.total_fees_a for pool in pools])
+        return array
+
+    def test_int64_replay(self):
+        swaps = [(0, 500, SWAP_A_TO_B), (1, 20, SWAP_B_TO_A), (0, 300, SWAP_B_TO_A), (2, 1, SWAP_A_TO_B),
+                 (0, 1000, SWAP_A_TO_B), (1, 7000, SWAP_A_TO_B)]
+        array = self.replay([(10 ** 6, 2 * 10 ** 6), (50_000, 40_000), (10 ** 5, 10 ** 5)], swaps)
+        self.assertEqual(array.reserve_a.dtype, np.int64)
+
+    def test_wei_scale_replay_switches_to_python_integers(self):
+        rng = np.random.default_rng(3)
+        swaps = [(int(rng.integers(3)), int(rng.integers(1, 10 ** 4)) * WEI, int(rng.integers(2)))
+                 for _ in range(50)]
+        array = self.replay([(1000 * WEI, 2_000_000 * WEI), (10 ** 6 * WEI, 10 ** 6 * WEI), (WEI, 3 * WEI)], swaps)
+        self.assertEqual(array.reserve_a.dtype, object)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+from itertools import count
+
+from src.defi_amm.storage.history import (HistoryStoreException, RingBufferHistoryStore, SQLiteHistoryStore,
+                                          create_history_store)
+
+
+class HistoryStoreTests:
+    def make_store(self, clock):
+        raise NotImplementedError
+
+    def setUp(self):
+        ticks = count()
+        self.store = self.make_store(lambda: float(next(ticks)))
+        for i in range(10):
+            self.store.append("ETH-USDC", {"type": "swap", "amount_in": i})
+            self.store.append("DAI-USDC", {"type": "swap", "amount_in": i})
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_cursor_pagination(self):
+        page, cursor = self.store.query("ETH-USDC", limit=4)
+        self.assertEqual([record["amount_in"] for record in page], [0, 1, 2, 3])
+        seen = list(page)
+        while cursor is not None:
+            page, cursor = self.store.query("ETH-USDC", cursor=cursor, limit=4)
+            seen.extend(page)
+        self.assertEqual([record["amount_in"] for record in seen], list(range(10)))
+        self.assertEqual(len({record["id"] for record in seen}), 10)
+
+    def test_time_filter(self):
+        page, cursor = self.store.query("DAI-USDC", since=4, until=12)
+        self.assertEqual([record["timestamp"] for record in page], [5.0, 7.0, 9.0, 11.0])
+        self.assertIsNone(cursor)
+
+    def test_unknown_pool(self):
+        self.assertEqual(self.store.query("BTC-ETH"), ([], None))
+
+
+class TestRingBufferHistoryStore(HistoryStoreTests, unittest.TestCase):
+    def make_store(self, clock):
+        return RingBufferHistoryStore(max_records_per_pool=16, clock=clock)
+
+    def test_bounded_retention(self):
+        for i in range(10, 30):
+            self.store.append("ETH-USDC", {"type": "swap", "amount_in": i})
+        page, cursor = self.store.query("ETH-USDC", limit=100)
+        self.assertEqual([record["amount_in"] for record in page], list(range(14, 30)))
+        self.assertIsNone(cursor)
+        page, _ = self.store.query("ETH-USDC", cursor=page[5]["id"], limit=2)
+        self.assertEqual([record["amount_in"] for record in page], [20, 21])
+
+    def test_buffers_grow_with_records(self):
+        self.store.max_records_per_pool = 1_000_000
+        self.store.append("BTC-ETH", {"type": "swap", "amount_in": 0})
+        self.assertEqual(len(self.store._rings["BTC-ETH"].records), 1)
+        self.assertEqual(len(self.store._rings["ETH-USDC"].records), 10)
+
+
+class TestSQLiteHistoryStore(HistoryStoreTests, unittest.TestCase):
+    def make_store(self, clock):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "history.db")
+        return SQLiteHistoryStore(self.path, clock=clock)
+
+    def tearDown(self):
+        super().tearDown()
+        self.directory.cleanup()
+
+    def test_persistence(self):
+        self.store.close()
+        self.store = SQLiteHistoryStore(self.path)
+        page, _ = self.store.query("ETH-USDC", limit=100)
+        self.assertEqual(len(page), 10)
+
+
+class TestCreateHistoryStore(unittest.TestCase):
+    def test_unknown_backend(self):
+        with self.assertRaises(HistoryStoreException):
+            create_history_store("redis")
+
+    def test_sqlite_requires_path(self):
+        with self.assertRaises(HistoryStoreException):
+            create_history_store("sqlite")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,10 @@
+import math
 import unittest
 
-from src.defi_amm.models.liquidity_pool import LiquidityPool, LiquidityPoolException
+import numpy as np
+
+from src.defi_amm.models.liquidity_pool import LiquidityPool, LiquidityPoolException, SWAP_A_TO_B, SWAP_B_TO_A, \
+    ADD_LIQUIDITY, REMOVE_LIQUIDITY
 
 
 class TestLiquidityPool(unittest.TestCase):
@@ -44,5 +48,143 @@ class TestLiquidityPool(unittest.TestCase):
             self.pool.remove_liquidity(2000)
 
 
+    def test_pool_is_slotted(self):
+        self.assertFalse(hasattr(self.pool, '__dict__'))
+        with self.assertRaises(AttributeError):
+            self.pool.unknown = 1
+
+    def test_get_reserves_matches_pool_state(self):
+        self.pool.swap_a_to_b(100)
+        state = self.pool.get_pool_state()
+        self.assertEqual(self.pool.get_reserves(), (state['token_a_reserve'], state['token_b_reserve']))
+
+    def test_swap_batch_matches_sequential_swaps(self):
+        amounts = np.array([0, 100, 250.5, -50, 10, 400, 1e-3])
+        directions = np.array([SWAP_A_TO_B, SWAP_A_TO_B, SWAP_B_TO_A, SWAP_B_TO_A, SWAP_A_TO_B, SWAP_B_TO_A,
+                               SWAP_A_TO_B])
+
+        reference = LiquidityPool(1000, 1000)
+        expected = []
+        for amount, direction in zip(amounts.tolist(), directions.tolist()):
+            swap = reference.swap_a_to_b if direction == SWAP_A_TO_B else reference.swap_b_to_a
+            try:
+                expected.append(swap(amount))
+            except LiquidityPoolException:
+                expected.append(math.nan)
+
+        result = self.pool.swap_batch(amounts, directions)
+        np.testing.assert_array_equal(result.amounts_out, np.array(expected))
+        np.testing.assert_array_equal(result.success, [False, True, True, False, True, True, True])
+        self.assertEqual(self.pool.get_pool_state(), reference.get_pool_state())
+        self.assertEqual(result.token_a_reserve, reference.token_a_reserve)
+        self.assertEqual(result.total_fees_b, reference.total_fees_b)
+
+    def test_swap_batch_scalar_direction(self):
+        result = self.pool.swap_batch([100, 100], SWAP_B_TO_A)
+        self.assertAlmostEqual(result.amounts_out[0], 90.661, delta=0.001)
+        self.assertEqual(self.pool.total_fees_a, 0)
+        self.assertAlmostEqual(self.pool.total_fees_b, 0.6)
+
+    def test_swap_batch_invalid_shape(self):
+        with self.assertRaises(LiquidityPoolException):
+            self.pool.swap_batch([[1, 2]], SWAP_A_TO_B)
+
+    def test_swap_batch_invalid_direction(self):
+        state = self.pool.get_pool_state()
+        for directions in ([SWAP_A_TO_B, 7], ADD_LIQUIDITY):
+            with self.assertRaises(LiquidityPoolException):
+                self.pool.swap_batch([1, 2], directions)
+        self.assertEqual(self.pool.get_pool_state(), state)
+
+    def test_apply_events_matches_sequential_calls(self):
+        reference = LiquidityPool(1000, 1000)
+        kinds, amounts_a, amounts_b, expected = [], [], [], []
+
+        def record(kind, amount_a, amount_b, call):
+            kinds.append(kind)
+            amounts_a.append(amount_a)
+            amounts_b.append(amount_b)
+            try:
+                expected.append(call())
+            except LiquidityPoolException:
+                expected.append(None)
+
+        record(SWAP_A_TO_B, 100, 0, lambda: reference.swap_a_to_b(100))
+        record(ADD_LIQUIDITY, 50, 50, lambda: reference.add_liquidity(50, 50))
+        ratio = reference.get_exchange_rate()
+        record(ADD_LIQUIDITY, 100, 100 * ratio, lambda: reference.add_liquidity(100, 100 * ratio))
+        record(REMOVE_LIQUIDITY, 300, 0, lambda: reference.remove_liquidity(300))
+        record(SWAP_B_TO_A, 80, 0, lambda: reference.swap_b_to_a(80))
+        record(REMOVE_LIQUIDITY, 5000, 0, lambda: reference.remove_liquidity(5000))
+
+        result = self.pool.apply_events(kinds, amounts_a, amounts_b)
+        np.testing.assert_array_equal(result.success, [outcome is not None for outcome in expected])
+        self.assertEqual(result.results[0, 0], expected[0])
+        self.assertEqual(result.results[2, 0], expected[2])
+        self.assertEqual(tuple(result.results[3]), expected[3])
+        self.assertEqual(result.results[4, 0], expected[4])
+        self.assertTrue(np.isnan(result.results[[1, 5]]).all())
+        self.assertEqual(self.pool.get_pool_state(), reference.get_pool_state())
+        self.assertEqual(result.token_a_reserves[-1], reference.token_a_reserve)
+
+
+    def test_apply_events_rejects_what_the_methods_raise(self):
+        rng = np.random.default_rng(5)
+        # Zero and negative amounts, exact-ratio additions, and removals that drain the pool
+        kinds = rng.choice(4, size=400).tolist()
+        amounts_a = rng.choice([0.0, -5.0, 1.0, 50.0, 1e4], size=400).tolist()
+        kinds[380:383], amounts_a[380:383] = [REMOVE_LIQUIDITY] * 3, [1e9, 0.0, 0.0]
+        reference = LiquidityPool(1000, 1000)
+        calls = {SWAP_A_TO_B: reference.swap_a_to_b, SWAP_B_TO_A: reference.swap_b_to_a,
+                 REMOVE_LIQUIDITY: reference.remove_liquidity}
+        amounts_b, expected, reserves = [], [], []
+        for i, (kind, amount_a) in enumerate(zip(kinds, amounts_a)):
+            if i == 380:
+                amounts_a[i] = reference.total_lp_tokens
+            amount_b = amount_a * reference.token_b_reserve / reference.token_a_reserve \
+                if kind == ADD_LIQUIDITY and reference.token_a_reserve else amount_a
+            amounts_b.append(amount_b)
+            try:
+                if kind == ADD_LIQUIDITY:
+                    reference.add_liquidity(amounts_a[i], amount_b)
+                else:
+                    calls[kind](amounts_a[i])
+                expected.append(True)
+            except (LiquidityPoolException, ZeroDivisionError):
+                expected.append(False)
+            reserves.append(reference.get_reserves())
+
+        result = self.pool.apply_events(kinds, amounts_a, amounts_b)
+        np.testing.assert_array_equal(result.success, expected)
+        self.assertFalse(any(expected[381:383]))
+        np.testing.assert_allclose(np.column_stack([result.token_a_reserves, result.token_b_reserves]), reserves,
+                                   rtol=1e-12)
+        self.assertEqual(self.pool.total_lp_tokens, reference.total_lp_tokens)
+
+    def test_apply_events_invalid_kind(self):
+        state = self.pool.get_pool_state()
+        with self.assertRaises(LiquidityPoolException):
+            self.pool.apply_events([REMOVE_LIQUIDITY, 4], [1, 1], [0, 0])
+        self.assertEqual(self.pool.get_pool_state(), state)
+
+    def test_quote_does_not_mutate(self):
+        state = self.pool.get_pool_state()
+        quote = self.pool.quote([100, 0, -10], SWAP_A_TO_B)
+        self.assertEqual(self.pool.get_pool_state(), state)
+        self.assertAlmostEqual(quote.amounts_out[0], 90.661, delta=0.001)
+        self.assertAlmostEqual(quote.effective_prices[0], 0.90661, delta=0.00001)
+        self.assertAlmostEqual(quote.price_impacts[0], 0.09339, delta=0.00001)
+        self.assertTrue(np.isnan(quote.amounts_out[1:]).all())
+
+    def test_quote_matches_swap(self):
+        self.pool.swap_a_to_b(300)
+        quote = self.pool.quote(np.array([50.0]), SWAP_B_TO_A)
+        self.assertEqual(quote.amounts_out[0], self.pool.swap_b_to_a(50.0))
+
+    def test_quote_rejects_unknown_direction(self):
+        with self.assertRaises(LiquidityPoolException):
+            self.pool.quote([100], ADD_LIQUIDITY)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,9 +1,11 @@
 import unittest
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock
+
+import numpy as np
 
 from src.defi_amm.models.amm import AMM
 from src.defi_amm.models.risk_management import RiskManagement
-from src.defi_amm.simulation.market_simulator import MarketSimulation, run_market_scenarios
+from src.defi_amm.simulation.market_simulator import MarketSimulation, Scenario, run_market_scenarios, run_scenarios
 
 
 class TestMarketSimulation(unittest.TestCase):
@@ -14,10 +16,12 @@ class TestMarketSimulation(unittest.TestCase):
         self.initial_prices = {'TokenA': 100, 'TokenB': 1, 'TokenC': 10}
         self.simulation = MarketSimulation(self.amm, self.risk_management, self.initial_prices.copy())
 
-    @patch('random.normalvariate', return_value=0.01)
-    def test_simulate_price_change(self, mock_normalvariate):
+    def test_simulate_price_change(self):
+        self.simulation.rng = MagicMock()
+        self.simulation.rng.normal.return_value = 0.01
         self.simulation.simulate_price_change('TokenA', volatility=0.02)
         self.assertAlmostEqual(self.simulation.prices['TokenA'], 101.0)
+        self.simulation.rng.normal.assert_called_once_with(0, 0.02)
 
     def test_simulate_trade_success(self):
         self.amm.swap.return_value = 1000
@@ -58,17 +62,189 @@ class TestMarketSimulation(unittest.TestCase):
         self.assertEqual(report[0]['step'], 1)
         self.assertEqual(report[1]['step'], 2)
 
-    @patch('src.defi_amm.simulation.market_simulator.MarketSimulation.simulate_trade')
-    @patch('src.defi_amm.simulation.market_simulator.MarketSimulation.run_simulation')
-    def test_run_market_scenarios(self, mock_run_simulation, mock_simulate_trade):
-        stable_report, volatile_report, large_trade_report = run_market_scenarios(self.amm, self.risk_management,
-                                                                                  self.initial_prices)
-
-        self.assertEqual(len(stable_report), 0)
-        self.assertEqual(len(volatile_report), 0)
-        self.assertEqual(len(large_trade_report), 0)
-        mock_run_simulation.assert_called()
-        mock_simulate_trade.assert_called_once_with('TokenA', 'TokenB', 10000)
+
+class TestVectorizedSimulation(unittest.TestCase):
+
+    def setUp(self):
+        self.amm = AMM(check_consistency=True)
+        self.amm.create_pool('TokenA', 'TokenB', 1000, 2000)
+        self.amm.create_pool('TokenB', 'TokenC', 100, 1000)
+        self.risk_management = RiskManagement(self.amm, num_simulations=1000)
+        self.initial_prices = {'TokenA': 100, 'TokenB': 1, 'TokenC': 10}
+        self.simulation = MarketSimulation(self.amm, self.risk_management, self.initial_prices.copy())
+
+    def test_run_vectorized_records_every_step(self):
+        self.simulation.run_simulation(num_steps=2500, volatility=0.01, plot=False, vectorized=True,
+                                       chunk_size=1000)
+        history = self.simulation.history
+
+        self.assertEqual(history.size, 2500)
+        np.testing.assert_array_equal(history.column('steps'), np.arange(1, 2501))
+        self.assertEqual(self.simulation.metrics.time_steps, [999, 1999, 2499])
+        self.assertEqual(self.simulation.prices, dict(zip(history.tokens, history.column('prices')[-1])))
+        self.assertIn('final_metrics', self.simulation.generate_report()[-1])
+        # The running totals fed by the batched pool updates must match a full scan
+        self.amm.get_total_value_locked()
+
+        # Steps on the missing TokenA-TokenC pool fail and have no VaR
+        failed = ~history.column('success')
+        self.assertEqual(set(history.errors), set(np.flatnonzero(failed).tolist()))
+        self.assertIn("Pool not found", history.errors.values())
+        self.assertFalse(np.isnan(history.column('var')[history.column('success')]).any())
+
+    def test_same_seed_gives_loop_and_vectorized_the_same_events(self):
+        amm = AMM()
+        amm.create_pool('TokenA', 'TokenB', 1000, 2000)
+        amm.create_pool('TokenB', 'TokenC', 100, 1000)
+        loop = MarketSimulation(amm, RiskManagement(amm, num_simulations=500, rng=np.random.default_rng(0)),
+                                self.initial_prices.copy(), rng=np.random.default_rng(11))
+        loop.run_simulation(num_steps=300, volatility=0.02, plot=False, chunk_size=100)
+
+        risk_management = RiskManagement(self.amm, num_simulations=500, rng=np.random.default_rng(0))
+        vectorized = MarketSimulation(self.amm, risk_management, self.initial_prices.copy(),
+                                      rng=np.random.default_rng(11))
+        vectorized.run_simulation(num_steps=300, volatility=0.02, plot=False, vectorized=True, chunk_size=100)
+
+        for name in ('event_types', 'success'):
+            np.testing.assert_array_equal(loop.history.column(name), vectorized.history.column(name))
+        np.testing.assert_allclose(loop.history.column('prices'), vectorized.history.column('prices'), rtol=1e-9)
+        np.testing.assert_allclose(loop.history.column('results'), vectorized.history.column('results'),
+                                   rtol=1e-9)
+        for pool_key, pool in amm.pools.items():
+            self.assertAlmostEqual(pool.token_a_reserve, self.amm.pools[pool_key].token_a_reserve, places=6)
+            volume = amm.volume_tracker.volume(pool_key, 86400)
+            self.assertGreater(volume, 0)
+            self.assertAlmostEqual(self.amm.volume_tracker.volume(pool_key, 86400), volume, places=6)
+        np.testing.assert_allclose(loop.history.column('var'), vectorized.history.column('var'), rtol=1e-2)
+
+    def test_run_vectorized_matches_loop_distributions(self):
+        self.simulation.run_simulation(num_steps=20000, volatility=0.02, plot=False, vectorized=True)
+        history = self.simulation.history
+
+        log_returns = np.diff(np.log(history.column('prices')), axis=0)
+        np.testing.assert_allclose(log_returns.std(axis=0), 0.02, rtol=0.05)
+        self.assertAlmostEqual((history.column('event_types') == 0).mean(), 0.5, delta=0.02)
+        trades = history.column('event_types') == 0
+        # A third of the ordered pairs have no pool; the rest of the trades are small enough to succeed
+        self.assertAlmostEqual(history.column('success')[trades].mean(), 2 / 3, delta=0.03)
+
+
+class TestArbitrageToPrices(unittest.TestCase):
+
+    def setUp(self):
+        self.amm = AMM(check_consistency=True)
+        self.amm.create_pool('TokenA', 'TokenB', 1000, 2000)
+        self.amm.create_pool('TokenB', 'TokenC', 100, 1000)
+        self.amm.create_pool('TokenC', 'TokenD', 100, 100)
+        self.risk_management = RiskManagement(self.amm, num_simulations=500)
+        self.prices = {'TokenA': 100, 'TokenB': 1, 'TokenC': 10}
+        self.simulation = MarketSimulation(self.amm, self.risk_management, self.prices.copy(),
+                                           rng=np.random.default_rng(3))
+
+    def marginal_rate(self, token_from, token_to):
+        # The difference of two quotes leaves out the constant part of the output
+        amounts_out = self.amm.quote(token_from, token_to, [1e-3, 2e-3]).amounts_out
+        return (amounts_out[1] - amounts_out[0]) / 1e-3
+
+    def assertNoArbitrageLeft(self):
+        for token_a, token_b in (('TokenA', 'TokenB'), ('TokenB', 'TokenC')):
+            ratio = self.simulation.prices[token_a] / self.simulation.prices[token_b]
+            self.assertLessEqual(self.marginal_rate(token_a, token_b), ratio * (1 + 1e-6))
+            self.assertLessEqual(self.marginal_rate(token_b, token_a), (1 + 1e-6) / ratio)
+
+    def test_without_fees_pools_move_to_external_prices(self):
+        for pool in self.amm.pools.values():
+            pool.fee = 0
+        profit = self.simulation.arbitrage_to_prices()
+        self.assertGreater(profit, 0)
+        self.assertEqual(self.simulation.lvr, profit)
+        self.assertAlmostEqual(self.amm.get_exchange_rate('TokenA', 'TokenB'), 100)
+        self.assertAlmostEqual(self.amm.get_exchange_rate('TokenB', 'TokenC'), 0.1)
+        # The pool with an unpriced token is left alone
+        self.assertEqual(self.amm.get_pool_state('TokenC', 'TokenD')['token_a_reserve'], 100)
+
+    def test_arbitrage_stops_at_the_no_arbitrage_band(self):
+        self.simulation.arbitrage_to_prices()
+        self.assertNoArbitrageLeft()
+        self.assertEqual(self.simulation.arbitrage_to_prices(), 0.0)
+
+    def test_run_simulation_with_arbitrage(self):
+        self.simulation.run_simulation(num_steps=200, volatility=0.02, plot=False, arbitrage=True)
+        self.assertGreater(self.simulation.lvr, 0)
+        self.assertEqual(self.simulation.generate_report()[-1]['final_metrics']['lvr'], self.simulation.lvr)
+        self.simulation.arbitrage_to_prices()
+        self.assertNoArbitrageLeft()
+
+    def test_run_vectorized_with_arbitrage(self):
+        self.simulation.run_simulation(num_steps=500, volatility=0.02, plot=False, vectorized=True, chunk_size=100,
+                                       arbitrage=True)
+        self.assertGreater(self.simulation.lvr, 0)
+        self.amm.get_total_value_locked()
+
+
+class TestRunScenarios(unittest.TestCase):
+
+    def setUp(self):
+        self.amm = AMM()
+        self.amm.create_pool('TokenA', 'TokenB', 1000, 2000)
+        self.amm.create_pool('TokenB', 'TokenC', 100, 1000)
+        self.amm.create_pool('TokenA', 'TokenC', 500, 500)
+        self.risk_management = RiskManagement(self.amm, num_simulations=500)
+        self.initial_prices = {'TokenA': 100, 'TokenB': 1, 'TokenC': 10}
+        self.scenarios = [Scenario('loop', num_steps=30, volatility=0.01),
+                          Scenario('vectorized', num_steps=500, volatility=0.05, vectorized=True),
+                          Scenario('large_trade', num_steps=30, large_trade=('TokenA', 'TokenB', 10000))]
+
+    def test_scenarios_are_isolated_and_reproducible(self):
+        state = self.amm.get_pool_state('TokenA', 'TokenB')
+        reports = run_scenarios(self.amm, self.risk_management, self.initial_prices, self.scenarios, seed=7,
+                                max_workers=2)
+        again = run_scenarios(self.amm, self.risk_management, self.initial_prices, self.scenarios, seed=7,
+                              max_workers=3)
+
+        self.assertEqual(list(reports), ['loop', 'vectorized', 'large_trade'])
+        self.assertEqual(len(reports['loop']), 31)
+        self.assertEqual(len(reports['vectorized']), 501)
+        self.assertEqual(self.amm.get_pool_state('TokenA', 'TokenB'), state)
+        for name, report in reports.items():
+            self.assertEqual(list(report), list(again[name]))
+            for column, values in report.columns.items():
+                np.testing.assert_array_equal(values, again[name].columns[column])
+
+    def test_run_market_scenarios(self):
+        state = self.amm.get_pool_state('TokenA', 'TokenB')
+        with self.assertWarns(DeprecationWarning):
+            reports = run_market_scenarios(self.amm, self.risk_management, self.initial_prices, plot=False, seed=5)
+
+        self.assertEqual([len(report) for report in reports], [101, 101, 101])
+        # Every scenario starts from the caller's pools, which are left untouched
+        self.assertEqual(self.amm.get_pool_state('TokenA', 'TokenB'), state)
+        expected = run_scenarios(self.amm, self.risk_management, self.initial_prices, seed=5)
+        for report, again in zip(reports, expected.values()):
+            for column, values in report.columns.items():
+                np.testing.assert_array_equal(values, again.columns[column])
+
+    def test_run_market_scenarios_seed(self):
+        amm = AMM()
+        amm.create_pool('TokenA', 'TokenB', 1000, 2000)
+        risk_management = RiskManagement(amm, num_simulations=200)
+        with self.assertWarns(DeprecationWarning):
+            first = run_market_scenarios(amm, risk_management, self.initial_prices, plot=False, seed=3)
+            second = run_market_scenarios(amm, risk_management, self.initial_prices, plot=False, seed=3)
+        for report, again in zip(first, second):
+            np.testing.assert_array_equal(report.columns['prices'], again.columns['prices'])
+            np.testing.assert_array_equal(report.columns['event_types'], again.columns['event_types'])
+
+    def test_different_seeds_differ(self):
+        first = run_scenarios(self.amm, self.risk_management, self.initial_prices, self.scenarios[1:2], seed=1)
+        second = run_scenarios(self.amm, self.risk_management, self.initial_prices, self.scenarios[1:2], seed=2)
+        self.assertFalse(np.array_equal(first['vectorized'].columns['prices'],
+                                        second['vectorized'].columns['prices']))
+
+    def test_duplicate_names(self):
+        with self.assertRaises(ValueError):
+            run_scenarios(self.amm, self.risk_management, self.initial_prices,
+                          [Scenario('same'), Scenario('same')])
 
 
 if __name__ == '__main__':
@@ -0,0 +1,49 @@
+import importlib.util
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from src.defi_amm.models.amm import AMM
+from src.defi_amm.models.risk_management import RiskManagement
+from src.defi_amm.simulation.market_simulator import MarketSimulation
+from src.defi_amm.simulation.metrics import ProfitabilityMetrics
+
+
+class TestProfitabilityMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.amm = AMM()
+        self.amm.create_pool('TokenA', 'TokenB', 1000, 2000)
+        self.metrics = ProfitabilityMetrics(self.amm)
+        for step in range(3):
+            self.amm.swap('TokenA', 'TokenB', 10)
+            self.metrics.update_metrics(step)
+
+    def test_import_does_not_load_matplotlib(self):
+        code = "import sys; import defi_amm.simulation.metrics; print('matplotlib' in sys.modules)"
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, env=env, check=True)
+        self.assertEqual(output.stdout.strip(), 'False')
+
+    @unittest.skipUnless(importlib.util.find_spec('matplotlib'), 'matplotlib is not installed')
+    def test_plot_to_files_in_background(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            thread = self.metrics.plot_metrics(output_dir=output_dir, file_format='svg', background=True)
+            thread.join()
+            self.assertEqual(sorted(os.listdir(output_dir)),
+                             ['impermanent_loss.svg', 'lp_returns.svg', 'total_fees.svg'])
+
+    def test_simulation_can_skip_plotting(self):
+        simulation = MarketSimulation(self.amm, RiskManagement(self.amm, num_simulations=100),
+                                      {'TokenA': 100, 'TokenB': 1})
+        simulation.metrics.plot_metrics = MagicMock()
+        simulation.run_simulation(num_steps=2, volatility=0.01, plot=False)
+        simulation.metrics.plot_metrics.assert_not_called()
+        self.assertIsNone(simulation.plot_thread)
+
+
+if __name__ == '__main__':
+    unittest.main()
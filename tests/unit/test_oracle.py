@@ -0,0 +1,105 @@
+import unittest
+
+from src.defi_amm.models.amm import AMM
+from src.defi_amm.models.liquidity_pool import LiquidityPool
+from defi_amm.models.oracle import PriceOracle, PriceOracleException
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestPriceOracle(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock(1000.0)
+        self.oracle = PriceOracle(1000, 2000, capacity=4, clock=self.clock)
+
+    def test_twap_of_constant_price(self):
+        self.clock.now += 10
+        self.assertEqual(self.oracle.twap(10), (2.0, 0.5))
+
+    def test_twap_weights_prices_by_time(self):
+        self.clock.now += 30
+        self.oracle.update(1000, 4000)  # Price of A was 2 for 30s
+        self.clock.now += 10
+        self.oracle.update(1000, 1000)  # then 4 for 10s
+        self.clock.now += 20             # and is 1 for the last 20s
+        self.assertAlmostEqual(self.oracle.twap(60)[0], (2 * 30 + 4 * 10 + 1 * 20) / 60)
+        self.assertAlmostEqual(self.oracle.twap(25)[0], (4 * 5 + 1 * 20) / 25)
+        self.assertAlmostEqual(self.oracle.twap(15)[0], 1.0)
+
+    def test_restore_state_discards_later_observations(self):
+        self.clock.now += 10
+        state = self.oracle.get_state()
+        for _ in range(5):
+            self.clock.now += 10
+            self.oracle.update(1000, 8000)
+        self.oracle.restore_state(state)
+        self.assertEqual(self.oracle.twap(10), (2.0, 0.5))
+        self.clock.now += 50
+        self.assertEqual(self.oracle.twap(60), (2.0, 0.5))
+
+    def test_updates_at_the_same_time_keep_last_price(self):
+        self.clock.now += 10
+        self.oracle.update(1000, 3000)
+        self.oracle.update(1000, 5000)
+        self.clock.now += 10
+        self.assertAlmostEqual(self.oracle.twap(20)[0], (2 * 10 + 5 * 10) / 20)
+
+    def test_ring_overwrites_oldest_observations(self):
+        for _ in range(5):
+            self.clock.now += 10
+            self.oracle.update(1000, 2000)
+        self.assertEqual(self.oracle.twap(30), (2.0, 0.5))
+        with self.assertRaises(PriceOracleException):
+            self.oracle.twap(50)
+
+    def test_ring_grows_up_to_capacity(self):
+        oracle = PriceOracle(1000, 1000, capacity=20, clock=self.clock)
+        for price in range(1, 31):
+            self.clock.now += 10
+            oracle.update(1000, 1000 * price)  # The price of A was price - 1 for the last 10s
+        self.clock.now += 10
+        self.assertEqual(len(oracle._timestamps), 20)
+        expected = sum(range(12, 31)) * 10 / 190
+        self.assertAlmostEqual(oracle.twap(190)[0], expected)
+        with self.assertRaises(PriceOracleException):
+            oracle.twap(210)
+
+    def test_invalid_window(self):
+        with self.assertRaises(PriceOracleException):
+            self.oracle.twap(0)
+
+
+class TestPoolTwap(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock(1000.0)
+
+    def test_pool_swaps_feed_oracle(self):
+        pool = LiquidityPool(1000, 1000)
+        pool.oracle = PriceOracle(1000, 1000, clock=self.clock)
+        self.clock.now += 10
+        pool.swap_a_to_b(100)
+        rate = pool.get_exchange_rate()
+        self.clock.now += 10
+        twap_a, _ = pool.get_twap(20)
+        self.assertAlmostEqual(twap_a, (1.0 * 10 + rate * 10) / 20)
+
+    def test_amm_twap_is_oriented(self):
+        amm = AMM()
+        amm.create_pool("ETH", "USDC", 10, 20000)
+        pool = amm.get_pool("ETH", "USDC")
+        pool.oracle = PriceOracle(10, 20000, clock=self.clock)
+        self.clock.now += 60
+        self.assertAlmostEqual(amm.get_twap("ETH", "USDC", 60), 2000)
+        self.assertAlmostEqual(amm.get_twap("USDC", "ETH", 60), 0.0005)
+
+
+if __name__ == '__main__':
+    unittest.main()
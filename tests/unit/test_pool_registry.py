@@ -0,0 +1,69 @@
+import unittest
+
+import numpy as np
+
+from src.defi_amm.models.amm import AMM
+from src.defi_amm.models.liquidity_pool import LiquidityPool
+from defi_amm.models.pool_registry import PoolRegistry, PoolView
+
+
+class TestPoolRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = PoolRegistry(capacity=2)
+
+    def test_add_pool_grows_columns(self):
+        for i in range(5):
+            self.registry.add_pool(f"T{i}", f"T{i + 1}", 100.0 * (i + 1), 100.0)
+        self.assertEqual(self.registry.size, 5)
+        self.assertGreaterEqual(self.registry.capacity, 5)
+        np.testing.assert_array_equal(self.registry.column('reserve_a'), [100, 200, 300, 400, 500])
+        np.testing.assert_array_equal(self.registry.column('token_b_ids'), [1, 2, 3, 4, 5])
+
+    def test_view_matches_liquidity_pool(self):
+        view = self.registry.create_view(self.registry.add_pool("A", "B", 1000, 1000))
+        pool = LiquidityPool(1000, 1000)
+        self.assertIsInstance(view, PoolView)
+        self.assertEqual(view.swap_a_to_b(100), pool.swap_a_to_b(100))
+        self.assertEqual(view.add_liquidity(110, 90.661, tolerance=1e-2), pool.add_liquidity(110, 90.661, tolerance=1e-2))
+        self.assertEqual(view.get_pool_state(), pool.get_pool_state())
+        self.assertEqual(self.registry.column('fees_a')[0], pool.total_fees_a)
+
+    def test_view_survives_growth(self):
+        view = self.registry.create_view(self.registry.add_pool("A", "B", 1000, 1000))
+        for i in range(4):
+            self.registry.add_pool("A", f"C{i}", 10, 10)
+        view.swap_b_to_a(100)
+        self.assertEqual(self.registry.reserve_b[0], 1100)
+
+
+class TestColumnarAMM(unittest.TestCase):
+    def setUp(self):
+        self.columnar = AMM(columnar=True)
+        self.default = AMM()
+        for amm in (self.columnar, self.default):
+            amm.create_pool("USDC", "ETH", 1000, 1)
+            amm.create_pool("ETH", "DAI", 1, 1000)
+            amm.create_pool("DAI", "USDC", 1000, 1000)
+            amm.swap("USDC", "ETH", 100)
+            amm.swap("DAI", "ETH", 50)
+            amm.swap("USDC", "DAI", 10)
+
+    def test_pools_are_views(self):
+        self.assertIsInstance(self.columnar.get_pool("USDC", "ETH"), PoolView)
+
+    def test_total_value_locked(self):
+        expected = self.default.get_total_value_locked()
+        tvl = self.columnar.get_total_value_locked()
+        self.assertEqual(tvl.keys(), expected.keys())
+        for token, value in expected.items():
+            self.assertAlmostEqual(tvl[token], value)
+
+    def test_calculate_fees_earned(self):
+        expected = self.default.calculate_fees_earned()
+        fees = self.columnar.calculate_fees_earned()
+        for token, value in expected.items():
+            self.assertAlmostEqual(fees[token], value)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from src.defi_amm.models.amm import AMM
+from src.defi_amm.storage.pool_table import MappedPoolTable, PoolTableException
+
+
+class TestMappedPoolTable(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "pools.bin")
+        self.amm = AMM()
+        self.amm.create_pool("USDC", "ETH", 2000, 1)
+        self.writer = MappedPoolTable.create(self.path, capacity=4)
+        self.writer.attach(self.amm)
+        self.reader = MappedPoolTable.open(self.path)
+        self.addCleanup(self.reader.close)
+        self.addCleanup(self.writer.close)
+
+    def test_reader_sees_live_changes(self):
+        self.amm.swap("USDC", "ETH", 100)
+        self.amm.add_liquidity("ETH", "USDC", 0.1, 0.1 * self.amm.get_exchange_rate("ETH", "USDC"))
+        state = self.reader.get_pool_state("ETH", "USDC")
+        self.assertEqual(state.pop("fee"), 0.003)
+        self.assertEqual(state, self.amm.get_pool_state("ETH", "USDC"))
+
+    def test_new_pools_are_appended(self):
+        self.amm.create_pool("DAI", "USDC", 1000, 1000)
+        self.amm.swap("DAI", "USDC", 10)
+        self.assertEqual(len(self.reader), 2)
+        self.assertEqual(self.reader.get_pool_state("USDC", "DAI")["token_a_reserve"], 1010)
+        with self.assertRaises(PoolTableException):
+            self.reader.get_pool_state("DAI", "ETH")
+
+    def test_restore_clears_and_reuses_rows(self):
+        snapshot = self.amm.snapshot()
+        self.amm.create_pool("DAI", "USDC", 1000, 1000)
+        self.assertEqual(self.reader.get_pool_state("DAI", "USDC")["token_a_reserve"], 1000)
+        self.amm.restore(snapshot)
+        self.assertEqual(list(self.reader.read()['token_a']), [b'ETH'])
+        with self.assertRaises(PoolTableException):
+            self.reader.get_pool_state("DAI", "USDC")
+
+        self.amm.create_pool("USDT", "USDC", 500, 500)
+        self.assertEqual(len(self.reader), 2)
+        self.assertEqual(self.reader.get_pool_state("USDT", "USDC")["token_b_reserve"], 500)
+        self.assertEqual(self.reader.to_snapshot().pools.keys(), self.amm.snapshot().pools.keys())
+
+    def test_snapshot_round_trip(self):
+        self.amm.create_pool("DAI", "USDC", 1000, 1000)
+        self.amm.swap("USDC", "DAI", 10)
+        self.amm.adjust_fee("DAI", "USDC")
+        self.writer.publish(self.amm)
+        copy = AMM.from_snapshot(self.reader.to_snapshot())
+        for pool_key, pool in self.amm.pools.items():
+            self.assertEqual(copy.pools[pool_key].get_pool_state(), pool.get_pool_state())
+            self.assertEqual(copy.pools[pool_key].fee, pool.fee)
+        self.assertEqual(copy.get_total_value_locked(), self.amm.get_total_value_locked())
+
+    def test_read_retries_rows_being_written(self):
+        self.amm.create_pool("DAI", "USDC", 1000, 1000)
+        sequences = self.writer.rows['sequence']
+        sequences[1] += 1  # Row 1 is mid-write, so its first copy must be discarded
+        read_row = self.reader.read_row
+
+        def finish_write(index):
+            sequences[index] += 1
+            return read_row(index)
+
+        with patch.object(self.reader, 'read_row', side_effect=finish_write) as retry:
+            rows = self.reader.read()
+        retry.assert_called_once_with(1)
+        np.testing.assert_array_equal(rows['reserve_a'], [2000, 1000])
+        np.testing.assert_array_equal(rows['sequence'], [0, 2])
+
+    def test_capacity_and_symbol_limits(self):
+        created = []
+        self.amm.pool_listeners.append(lambda *args: created.append(args))
+        with self.assertRaises(PoolTableException):
+            self.amm.create_pool("X" * 33, "USDC", 1, 1)
+        self.assertNotIn("USDC-" + "X" * 33, self.amm.pools)
+        for i in range(3):
+            self.amm.create_pool(f"T{i}", "USDC", 1, 1)
+        with self.assertRaises(PoolTableException):
+            self.amm.create_pool("T9", "USDC", 1, 1)
+        self.assertEqual(len(self.amm.pools), 4)
+        self.assertEqual([args[0] for args in created], ["T0-USDC", "T1-USDC", "T2-USDC"])
+        self.assertNotIn("T9", self.amm.get_total_value_locked())
+
+    def test_create_replaces_mapped_file(self):
+        replacement = MappedPoolTable.create(self.path, capacity=2)
+        self.addCleanup(replacement.close)
+        # The existing reader keeps the table it mapped
+        self.assertEqual(len(self.reader), 1)
+        self.assertEqual(self.reader.get_pool_state("ETH", "USDC")["token_a_reserve"], 2000)
+        reopened = MappedPoolTable.open(self.path)
+        self.addCleanup(reopened.close)
+        self.assertEqual((len(reopened), reopened.capacity), (0, 2))
+        self.assertEqual(os.listdir(self.directory.name), ["pools.bin"])
+
+    def test_reader_is_read_only(self):
+        with self.assertRaises(PoolTableException):
+            self.reader.publish(self.amm)
+        with self.assertRaises(PoolTableException):
+            MappedPoolTable.open(os.path.join(self.directory.name, "missing.bin"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -13,13 +13,10 @@ class TestRiskManagement(unittest.TestCase):
         self.amm = AMM()
         self.risk_manager = RiskManagement(self.amm)
 
-        # Mock the get_pool method of AMM and the get_pool_state method of LiquidityPool
+        # Mock the get_pool method of AMM and the reserves of the returned LiquidityPool
         self.mock_pool = MagicMock()
-        self.mock_pool.get_pool_state.return_value = {
-            'token_a_reserve': 1000,
-            'token_b_reserve': 2000,
-            'total_lp_tokens': 100
-        }
+        self.mock_pool.get_reserves.return_value = (1000, 2000)
+        self.mock_pool.total_lp_tokens = 100
         self.amm.get_pool = MagicMock(return_value=self.mock_pool)
 
     def test_calculate_total_fees_earned(self):
@@ -39,11 +36,7 @@ class TestRiskManagement(unittest.TestCase):
         self.assertAlmostEqual(returns, 1314.213, delta=0.001)
 
     def test_implement_stop_loss_triggered(self):
-        self.mock_pool.get_pool_state.return_value = {
-            'token_a_reserve': 500,
-            'token_b_reserve': 1000,
-            'total_lp_tokens': 100
-        }
+        self.mock_pool.get_reserves.return_value = (500, 1000)
 
         # Simulate an initial higher value, e.g., 2000 (higher than the current 1500)
         stop_loss_triggered = self.risk_manager.implement_stop_loss('token_a', 'token_b', stop_loss_percentage=0.1,
@@ -51,11 +44,7 @@ class TestRiskManagement(unittest.TestCase):
         self.assertTrue(stop_loss_triggered)
 
     def test_implement_stop_loss_not_triggered(self):
-        self.mock_pool.get_pool_state.return_value = {
-            'token_a_reserve': 900,
-            'token_b_reserve': 1800,
-            'total_lp_tokens': 100
-        }
+        self.mock_pool.get_reserves.return_value = (900, 1800)
 
         stop_loss_triggered = self.risk_manager.implement_stop_loss('token_a', 'token_b', stop_loss_percentage=0.1)
         self.assertFalse(stop_loss_triggered)
@@ -72,28 +61,22 @@ class TestRiskManagementExtended(unittest.TestCase):
         self.amm = AMM()
         self.risk_manager = RiskManagement(self.amm)
 
-        # Mock the get_pool method of AMM and the get_pool_state method of LiquidityPool
+        # Mock the get_pool method of AMM and the reserves of the returned LiquidityPool
         self.mock_pool = MagicMock()
-        self.mock_pool.get_pool_state.return_value = {
-            'token_a_reserve': 1000,
-            'token_b_reserve': 2000,
-            'total_lp_tokens': 100
-        }
+        self.mock_pool.get_reserves.return_value = (1000, 2000)
+        self.mock_pool.total_lp_tokens = 100
         self.amm.get_pool = MagicMock(return_value=self.mock_pool)
 
     def test_calculate_var(self):
-        # Mock the numpy random normal function to return a predictable result
-        np.random.normal = MagicMock(return_value=np.array([-0.01, -0.02, -0.03, 0.01, 0.02]))
+        # Inject a generator returning a predictable result
+        self.risk_manager.rng = MagicMock()
+        self.risk_manager.rng.normal.return_value = np.array([-0.01, -0.02, -0.03, 0.01, 0.02])
 
         var = self.risk_manager.calculate_var('token_a', 'token_b', confidence_level=0.95, num_simulations=5)
         self.assertAlmostEqual(var, 84.0)
 
     def test_implement_stop_loss_triggered(self):
-        self.mock_pool.get_pool_state.return_value = {
-            'token_a_reserve': 500,
-            'token_b_reserve': 1000,
-            'total_lp_tokens': 100
-        }
+        self.mock_pool.get_reserves.return_value = (500, 1000)
 
         # Simulate an initial higher value, e.g., 2000 (higher than the current 1500)
         stop_loss_triggered = self.risk_manager.implement_stop_loss('token_a', 'token_b', stop_loss_percentage=0.1,
@@ -101,5 +84,89 @@ class TestRiskManagementExtended(unittest.TestCase):
         self.assertTrue(stop_loss_triggered)
 
 
+class TestPortfolioRisk(unittest.TestCase):
+
+    def setUp(self):
+        self.amm = AMM()
+        self.amm.create_pool('TokenA', 'TokenB', 1000, 2000)
+        self.amm.create_pool('TokenB', 'TokenC', 100, 1000)
+        self.amm.create_pool('TokenA', 'TokenC', 500, 500)
+        self.risk_manager = RiskManagement(self.amm, num_simulations=2000)
+
+    def test_shock_matrix_statistics(self):
+        self.risk_manager.num_simulations = 200000
+        shocks = self.risk_manager.generate_shocks(['x', 'y', 'z'])
+        self.assertEqual(shocks.shape, (200000, 3))
+        self.assertAlmostEqual(shocks.std(axis=0).mean(), 0.02, delta=0.0005)
+        self.assertAlmostEqual(np.corrcoef(shocks.T)[0, 1], 0.5, delta=0.02)
+
+    def test_pool_var_interpolators_stay_within_their_error_bound(self):
+        interpolate = self.risk_manager.pool_var_interpolators()['TokenA-TokenB']
+        rng = np.random.default_rng(2)
+        reserves_a, reserves_b = rng.uniform(1, 5000, 200), rng.uniform(1, 5000, 200)
+        pool = self.amm.get_pool('TokenA', 'TokenB')
+        exact = []
+        for reserve_a, reserve_b in zip(reserves_a, reserves_b):
+            pool.token_a_reserve, pool.token_b_reserve = reserve_a, reserve_b
+            exact.append(self.risk_manager.calculate_pool_var('TokenA', 'TokenB'))
+        shocks = self.risk_manager._get_shocks([])[:, [self.risk_manager._shock_tokens[token]
+                                                       for token in ('TokenA', 'TokenB')]]
+        bound = np.hypot(reserves_a, reserves_b) * np.hypot(*shocks.T).max() * np.pi / (4 * 256)
+        error = np.abs(interpolate(reserves_a, reserves_b) - exact)
+        self.assertTrue((error <= bound).all())
+        np.testing.assert_array_less(error, 0.01 * np.array(exact))
+
+    def test_perfect_correlation_matches_single_factor_var(self):
+        risk_manager = RiskManagement(self.amm, num_simulations=1000, correlation=1.0)
+        risk = risk_manager.calculate_portfolio_risk()
+        shocks = risk_manager._get_shocks([])[:, 0]
+        expected = np.percentile(-shocks * 3000, 95)
+        self.assertAlmostEqual(risk['pool_var']['TokenA-TokenB'], expected)
+        self.assertAlmostEqual(risk['portfolio_var'], np.percentile(-shocks * 5100, 95))
+
+    def test_portfolio_risk(self):
+        risk = self.risk_manager.calculate_portfolio_risk()
+        self.assertEqual(set(risk['pool_var']), set(self.amm.pools))
+        for pool_key, var in risk['pool_var'].items():
+            self.assertGreater(var, 0)
+            self.assertGreaterEqual(risk['pool_cvar'][pool_key], var)
+        self.assertLessEqual(risk['portfolio_cvar'], sum(risk['pool_cvar'].values()) + 1e-9)
+
+    def test_shocks_are_reused_until_refreshed(self):
+        first = self.risk_manager.calculate_portfolio_risk()
+        self.assertEqual(self.risk_manager.calculate_portfolio_risk(), first)
+        self.amm.swap('TokenA', 'TokenB', 100)
+        self.assertNotEqual(self.risk_manager.calculate_portfolio_risk(), first)
+        self.risk_manager.refresh_shocks()
+        self.assertIsNone(self.risk_manager._shocks)
+
+    def test_pool_var_matches_portfolio_risk(self):
+        var = self.risk_manager.calculate_pool_var('TokenC', 'TokenB')
+        self.amm.swap('TokenA', 'TokenC', 50)
+        risk = self.risk_manager.calculate_portfolio_risk()
+        self.assertEqual(var, risk['pool_var']['TokenB-TokenC'])
+        self.assertEqual(self.risk_manager.calculate_pool_var('TokenA', 'TokenC'), risk['pool_var']['TokenA-TokenC'])
+
+    def test_invalid_correlation(self):
+        with self.assertRaises(ValueError):
+            RiskManagement(self.amm, correlation=1.5)
+
+    def test_seeded_generator_is_reproducible(self):
+        first = RiskManagement(self.amm, num_simulations=100, rng=np.random.default_rng(5))
+        second = RiskManagement(self.amm, num_simulations=100, rng=np.random.default_rng(5))
+        self.assertEqual(first.calculate_portfolio_risk(), second.calculate_portfolio_risk())
+
+    def test_pool_var_interpolators_match_portfolio_risk(self):
+        self.risk_manager.rng = np.random.default_rng(0)
+        interpolators = self.risk_manager.pool_var_interpolators()
+        self.amm.swap('TokenA', 'TokenB', 300)
+        risk = self.risk_manager.calculate_portfolio_risk()
+        for pool_key, pool in self.amm.pools.items():
+            var = interpolators[pool_key](np.array([pool.token_a_reserve, 2 * pool.token_a_reserve]),
+                                          np.array([pool.token_b_reserve, 2 * pool.token_b_reserve]))
+            self.assertAlmostEqual(var[0], risk['pool_var'][pool_key], delta=risk['pool_var'][pool_key] * 1e-3)
+            self.assertAlmostEqual(var[1], 2 * var[0])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,26 @@
+import unittest
+
+import numpy as np
+
+from src.defi_amm.utils.rng import create_streams
+
+
+class TestRandomStreams(unittest.TestCase):
+
+    def test_streams_are_reproducible(self):
+        first = create_streams(42)
+        second = create_streams(42)
+        for a, b in zip(first, second):
+            np.testing.assert_array_equal(a.random(5), b.random(5))
+
+    def test_streams_are_independent(self):
+        streams = create_streams(42)
+        self.assertFalse(np.array_equal(streams.simulation.random(5), streams.risk.random(5)))
+
+    def test_children_of_a_seed_sequence_differ(self):
+        first, second = (create_streams(child) for child in np.random.SeedSequence(1).spawn(2))
+        self.assertFalse(np.array_equal(first.simulation.random(5), second.simulation.random(5)))
+
+
+if __name__ == '__main__':
+    unittest.main()
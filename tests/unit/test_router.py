@@ -0,0 +1,107 @@
+import unittest
+
+from src.defi_amm.models.amm import AMM
+from defi_amm.models.amm import AMMException
+from src.defi_amm.models.router import SwapRouter
+
+
+class TestSwapRouter(unittest.TestCase):
+    def setUp(self):
+        self.amm = AMM()
+        self.amm.create_pool("ETH", "USDC", 100, 200000)
+        self.amm.create_pool("DAI", "ETH", 200000, 100)
+        self.amm.create_pool("DAI", "USDC", 500000, 500000)
+        self.amm.create_pool("USDC", "WBTC", 1000000, 20)
+        self.router = SwapRouter(self.amm, max_hops=3)
+
+    def test_find_paths(self):
+        paths = self.router.find_paths("ETH", "WBTC")
+        self.assertIn(("ETH", "USDC", "WBTC"), paths)
+        self.assertIn(("ETH", "DAI", "USDC", "WBTC"), paths)
+        self.assertEqual(self.router.find_paths("ETH", "WBTC", max_hops=2), [("ETH", "USDC", "WBTC")])
+
+    def test_new_pool_updates_graph(self):
+        self.assertEqual(self.router.find_paths("WBTC", "LINK"), [])
+        self.amm.create_pool("LINK", "WBTC", 1000, 1)
+        self.assertEqual(self.router.find_paths("WBTC", "LINK"), [("WBTC", "LINK")])
+        self.assertIn(("ETH", "USDC", "WBTC", "LINK"), self.router.find_paths("ETH", "LINK"))
+
+    def test_restore_drops_pools_from_graph(self):
+        snapshot = self.amm.snapshot()
+        self.amm.create_pool("LINK", "WBTC", 1000, 1)
+        self.amm.create_pool("ETH", "WBTC", 50, 1)
+        self.assertEqual(self.router.find_paths("WBTC", "LINK"), [("WBTC", "LINK")])
+        self.assertIn(("ETH", "WBTC"), self.router.find_paths("ETH", "WBTC"))
+        self.amm.restore(snapshot)
+        self.assertEqual(self.router.find_paths("WBTC", "LINK"), [])
+        self.assertNotIn(("ETH", "WBTC"), self.router.find_paths("ETH", "WBTC"))
+        self.assertNotIn("LINK", self.router.adjacency)
+        with self.assertRaises(AMMException):
+            self.router.quote_best_path("WBTC", "LINK", 1)
+        route = self.router.quote_split("ETH", "WBTC", 1)
+        self.assertAlmostEqual(self.router.execute(route), route.amount_out)
+
+    def test_pool_changes_only_drop_affected_paths(self):
+        self.amm.create_pool("FOO", "BAR", 10, 10)
+        for pair in [("ETH", "WBTC"), ("DAI", "USDC"), ("FOO", "BAR")]:
+            self.router.find_paths(*pair)
+        cached = dict(self.router._path_cache)
+
+        self.amm.create_pool("BAR", "BAZ", 10, 10)
+        self.assertEqual(dict(self.router._path_cache), {key: cached[key] for key in cached if key[0] != "FOO"})
+        self.assertEqual(self.router.find_paths("ETH", "LINK"), [])
+        self.amm.create_pool("LINK", "WBTC", 1000, 1)
+        # A pool hanging off WBTC cannot extend a path that ends there
+        self.assertIs(self.router._path_cache[("ETH", "WBTC", 3)], cached[("ETH", "WBTC", 3)])
+        self.assertIn(("ETH", "USDC", "WBTC", "LINK"), self.router.find_paths("ETH", "LINK"))
+
+        snapshot = self.amm.snapshot()
+        self.amm.create_pool("ETH", "WBTC", 50, 1)
+        self.router.find_paths("ETH", "WBTC")
+        self.router.find_paths("BAR", "BAZ")
+        self.amm.restore(snapshot)
+        self.assertNotIn(("ETH", "WBTC", 3), self.router._path_cache)
+        self.assertIn(("BAR", "BAZ", 3), self.router._path_cache)
+        self.assertNotIn(("ETH", "WBTC"), self.router.find_paths("ETH", "WBTC"))
+
+    def test_path_cache_is_bounded(self):
+        router = SwapRouter(self.amm, path_cache_size=2)
+        router.find_paths("ETH", "WBTC")
+        router.find_paths("DAI", "USDC")
+        router.find_paths("ETH", "WBTC")
+        router.find_paths("ETH", "USDC")
+        self.assertEqual(list(router._path_cache), [("ETH", "WBTC", 3), ("ETH", "USDC", 3)])
+
+    def test_best_path_matches_direct_quote(self):
+        route = self.router.quote_best_path("ETH", "USDC", 1, max_hops=1)
+        self.assertEqual(route.legs[0].path, ("ETH", "USDC"))
+        self.assertEqual(route.amount_out, self.amm.quote("ETH", "USDC", 1).amounts_out)
+
+    def test_quotes_do_not_mutate(self):
+        state = {key: pool.get_pool_state() for key, pool in self.amm.pools.items()}
+        self.router.quote_split("ETH", "USDC", 10)
+        self.assertEqual({key: pool.get_pool_state() for key, pool in self.amm.pools.items()}, state)
+
+    def test_split_beats_single_path(self):
+        single = self.router.quote_best_path("ETH", "USDC", 20)
+        split = self.router.quote_split("ETH", "USDC", 20, steps=40)
+        self.assertGreater(len(split.legs), 1)
+        self.assertGreater(split.amount_out, single.amount_out)
+        self.assertAlmostEqual(sum(leg.amount_in for leg in split.legs), 20)
+
+    def test_execute_matches_quote(self):
+        route = self.router.quote_split("ETH", "WBTC", 5)
+        self.assertAlmostEqual(self.router.execute(route), route.amount_out)
+
+    def test_no_route(self):
+        self.amm.create_pool("FOO", "BAR", 10, 10)
+        with self.assertRaises(AMMException):
+            self.router.quote_best_path("ETH", "FOO", 1)
+
+    def test_invalid_max_hops(self):
+        with self.assertRaises(AMMException):
+            SwapRouter(self.amm, max_hops=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from defi_amm import main, routes  # noqa: F401 - registers the endpoints
+from defi_amm.models.amm import AMM
+from defi_amm.models.oracle import PriceOracle
+from defi_amm.storage.wal import WriteAheadLog
+
+
+class TestBatchEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.client = main.app.test_client()
+        self.token_a, self.token_b = f"A{id(self)}", f"B{id(self)}"
+        main.amm.create_pool(self.token_a, self.token_b, 1000, 1000)
+
+    def state(self):
+        return main.amm.get_pool_state(self.token_a, self.token_b)
+
+    def test_sequential_batch_reports_each_operation(self):
+        response = self.client.post('/batch', json={"operations": [
+            {"type": "swap", "token_from": self.token_a, "token_to": self.token_b, "amount": 100},
+            {"type": "swap", "token_from": self.token_a, "token_to": "MISSING", "amount": 1},
+            {"type": "unknown"},
+            {"type": "remove_liquidity", "token_a": self.token_a, "token_b": self.token_b, "lp_tokens": 10},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        results = response.json["results"]
+        self.assertEqual([result["success"] for result in results], [True, False, False, True])
+        self.assertAlmostEqual(results[0]["amount_out"], 90.661, delta=0.001)
+
+        history = self.client.get(f'/transaction_history?token_a={self.token_a}&token_b={self.token_b}').json
+        self.assertEqual([record["type"] for record in history["history"]], ["swap", "remove_liquidity"])
+
+    def test_atomic_batch_rolls_back(self):
+        state = self.state()
+        pool = main.amm.get_pool(self.token_a, self.token_b)
+        oracle_count = pool.oracle._count
+        response = self.client.post('/batch', json={"atomic": True, "operations": [
+            {"type": "swap", "token_from": self.token_a, "token_to": self.token_b, "amount": 100},
+            {"type": "remove_liquidity", "token_a": self.token_a, "token_b": self.token_b, "lp_tokens": 1e9},
+        ]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json["failed_index"], 1)
+        self.assertEqual(self.state(), state)
+        main.amm.verify_accumulators()
+        self.assertEqual(main.amm.calculate_recent_volume(self.token_a, self.token_b, 60), 0)
+        self.assertEqual(pool.oracle._count, oracle_count)
+        history = self.client.get(f'/transaction_history?token_a={self.token_a}&token_b={self.token_b}').json
+        self.assertEqual(history["history"], [])
+
+    def test_batch_body_must_be_an_object(self):
+        for body in ([{"type": "swap"}], "swap"):
+            response = self.client.post('/batch', json=body)
+            self.assertEqual(response.status_code, 400)
+            self.assertFalse(response.json["success"])
+
+    def test_atomic_batch_commits(self):
+        response = self.client.post('/batch', json={"atomic": True, "operations": [
+            {"type": "swap", "token_from": self.token_a, "token_to": self.token_b, "amount": 100},
+            {"type": "swap", "token_from": self.token_b, "token_to": self.token_a, "amount": 50},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json["results"]), 2)
+        self.assertEqual(self.state()["token_b_reserve"], 1000 - response.json["results"][0]["amount_out"] + 50)
+
+    def test_single_endpoints(self):
+        response = self.client.post('/swap', json={"token_from": self.token_b, "token_to": self.token_a, "amount": 100})
+        self.assertTrue(response.json["success"])
+        response = self.client.post('/remove_liquidity', json={"token_a": self.token_a, "token_b": self.token_b})
+        self.assertEqual(response.status_code, 400)
+
+
+class TestTransactionHistoryEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.client = main.app.test_client()
+        self.token_a, self.token_b = f"A{id(self)}", f"B{id(self)}"
+        main.amm.create_pool(self.token_a, self.token_b, 1000, 1000)
+        for _ in range(3):
+            self.client.post('/swap', json={"token_from": self.token_a, "token_to": self.token_b, "amount": 1})
+
+    def history(self, query=''):
+        return self.client.get(f'/transaction_history?token_a={self.token_a}&token_b={self.token_b}{query}')
+
+    def test_limit_pages(self):
+        response = self.history('&limit=2')
+        self.assertEqual(len(response.json["history"]), 2)
+        self.assertEqual(len(self.history(f'&cursor={response.json["next_cursor"]}').json["history"]), 1)
+
+    def test_limit_must_be_positive(self):
+        for limit in (0, -2):
+            response = self.history(f'&limit={limit}')
+            self.assertEqual(response.status_code, 400)
+            self.assertFalse(response.json["success"])
+
+
+class TestTwapEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.client = main.app.test_client()
+        self.token_a, self.token_b = f"A{id(self)}", f"B{id(self)}"
+        main.amm.create_pool(self.token_a, self.token_b, 1000, 2000)
+
+    def test_twap(self):
+        now = [0.0]
+        pool = main.amm.get_pool(self.token_a, self.token_b)
+        pool.oracle = PriceOracle(1000, 2000, clock=lambda: now[0])
+        now[0] = 60.0
+        response = self.client.get(f'/twap?token_a={self.token_a}&token_b={self.token_b}&window=60')
+        self.assertEqual(response.status_code, 200)
+        self.assertAlmostEqual(response.json["twap"], 2.0)
+
+    def test_twap_window_older_than_observations(self):
+        response = self.client.get(f'/twap?token_a={self.token_a}&token_b={self.token_b}&window=3600')
+        self.assertEqual(response.status_code, 400)
+
+    def test_twap_requires_window(self):
+        response = self.client.get(f'/twap?token_a={self.token_a}&token_b={self.token_b}')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json["success"])
+
+
+class TestWriteAheadLogging(unittest.TestCase):
+    def setUp(self):
+        self.client = main.app.test_client()
+        self.token_a, self.token_b = f"A{id(self)}", f"B{id(self)}"
+        main.amm.create_pool(self.token_a, self.token_b, 1000, 1000)
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.log = WriteAheadLog(self.directory.name, snapshot_interval=3, sync=False)
+        self.log.recover(AMM())
+        patcher = patch.object(routes, 'write_ahead_log', self.log)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_successful_operations_are_logged(self):
+        self.client.post('/swap', json={"token_from": self.token_a, "token_to": self.token_b, "amount": 10})
+        self.client.post('/remove_liquidity', json={"token_a": self.token_a, "token_b": self.token_b, "lp_tokens": 1e9})
+        self.client.post('/batch', json={"atomic": True, "operations": [
+            {"type": "swap", "token_from": self.token_b, "token_to": self.token_a, "amount": 5},
+            {"type": "remove_liquidity", "token_a": self.token_a, "token_b": self.token_b, "lp_tokens": 1e9}]})
+        self.assertEqual(self.log.last_lsn, 1)
+
+    def test_checkpoint_when_due(self):
+        for _ in range(3):
+            self.client.post('/swap', json={"token_from": self.token_a, "token_to": self.token_b, "amount": 10})
+        self.log.close()
+        recovered = AMM()
+        self.assertEqual(WriteAheadLog(self.directory.name, sync=False).recover(recovered), 0)
+        self.assertEqual(recovered.get_pool_state(self.token_a, self.token_b),
+                         main.amm.get_pool_state(self.token_a, self.token_b))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import math
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.defi_amm.models.amm import AMM
+from src.defi_amm.models.risk_management import RiskManagement
+from src.defi_amm.simulation.history import SimulationHistory, SimulationReport
+from src.defi_amm.simulation.market_simulator import MarketSimulation
+
+
+class TestSimulationHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.history = SimulationHistory(['TokenA', 'TokenB'], capacity=2)
+
+    def test_append_grows_capacity(self):
+        for step in range(1, 6):
+            self.history.append(step, {'TokenA': 100 + step, 'TokenB': 1}, 'trade', True, 10.0 * step, 5.0)
+
+        self.assertEqual(self.history.size, 5)
+        self.assertGreaterEqual(self.history.capacity, 5)
+        np.testing.assert_array_equal(self.history.column('steps'), [1, 2, 3, 4, 5])
+        np.testing.assert_array_equal(self.history.column('prices')[:, 0], [101, 102, 103, 104, 105])
+        np.testing.assert_array_equal(self.history.column('results')[:, 0], [10, 20, 30, 40, 50])
+
+    def test_reserve_preallocates(self):
+        self.history.reserve(100)
+        capacity = self.history.capacity
+        for step in range(100):
+            self.history.append(step, {'TokenA': 1, 'TokenB': 1}, 'trade', True, 1.0, None)
+        self.assertEqual(self.history.capacity, capacity)
+
+    def test_results_and_errors(self):
+        self.history.append(1, {'TokenA': 1, 'TokenB': 1}, 'liquidity', True, (3.0, 4.0), None)
+        self.history.append(2, {'TokenA': 1, 'TokenB': 1}, 'trade', False, "Insufficient liquidity", None)
+
+        np.testing.assert_array_equal(self.history.column('results')[0], [3.0, 4.0])
+        self.assertTrue(np.isnan(self.history.column('results')[1]).all())
+        self.assertEqual(self.history.errors, {1: "Insufficient liquidity"})
+
+    def test_report_view(self):
+        self.history.append(1, {'TokenA': 101, 'TokenB': 1}, 'trade', True, 10.0, 50.0)
+        self.history.append(2, {'TokenA': 102}, 'liquidity', False, "failed", None)
+        self.history.finalize(2, {'total_fees': {}})
+
+        report = SimulationReport(self.history)
+        self.assertEqual(len(report), 3)
+        self.assertEqual(report[0], {'step': 1, 'prices': {'TokenA': 101.0, 'TokenB': 1.0}, 'event_type': 'trade',
+                                     'success': True, 'var': 50.0})
+        self.assertEqual(report[1]['prices'], {'TokenA': 102.0})
+        self.assertIsNone(report[1]['var'])
+        self.assertEqual(report[-1], {'step': 2, 'final_metrics': {'total_fees': {}}})
+        self.assertEqual(len(report[:2]), 2)
+        with self.assertRaises(IndexError):
+            report[3]
+
+        self.assertTrue(np.shares_memory(report.columns['prices'], self.history.prices))
+
+    def test_npz_round_trip(self):
+        self.history.append(1, {'TokenA': 101, 'TokenB': 1}, 'trade', True, 10.0, 50.0)
+        self.history.append(2, {'TokenA': 102, 'TokenB': 2}, 'liquidity', False, "failed", None)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'history.npz')
+            self.history.to_npz(path)
+            loaded = SimulationHistory.from_npz(path)
+
+        self.assertEqual(loaded.tokens, ['TokenA', 'TokenB'])
+        for name in ('steps', 'prices', 'event_types', 'success', 'var', 'results'):
+            np.testing.assert_array_equal(loaded.column(name), self.history.column(name))
+        self.assertEqual(loaded.errors, {1: "failed"})
+
+    def test_from_records(self):
+        history = SimulationHistory.from_records([
+            {'step': 1, 'prices': {'TokenA': 101, 'TokenB': 1}, 'event_type': 'trade', 'success': True, 'var': 50.0},
+            {'step': 1, 'final_metrics': {'lp_returns': {}}}
+        ])
+        self.assertEqual(len(history), 2)
+        self.assertEqual(history.tokens, ['TokenA', 'TokenB'])
+        self.assertEqual(history.final_metrics, {'lp_returns': {}})
+
+
+class TestMarketSimulationHistory(unittest.TestCase):
+
+    def test_run_simulation_records_columns(self):
+        amm = AMM()
+        amm.create_pool('TokenA', 'TokenB', 1000, 2000)
+        amm.create_pool('TokenB', 'TokenC', 100, 1000)
+        simulation = MarketSimulation(amm, RiskManagement(amm, num_simulations=100),
+                                      {'TokenA': 100, 'TokenB': 1, 'TokenC': 10})
+
+        simulation.run_simulation(num_steps=20, volatility=0.01, plot=False)
+        report = simulation.generate_report()
+
+        self.assertEqual(len(report), 21)
+        self.assertEqual(simulation.history.size, 20)
+        np.testing.assert_array_equal(report.columns['steps'], np.arange(1, 21))
+        self.assertEqual(report[-1]['step'], 20)
+        self.assertIn('final_metrics', report[-1])
+        self.assertEqual(set(report[0]['prices']), {'TokenA', 'TokenB', 'TokenC'})
+        self.assertFalse(math.isnan(report.columns['prices'][-1, 0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
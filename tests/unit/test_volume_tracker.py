@@ -0,0 +1,65 @@
+import unittest
+
+from src.defi_amm.models.volume_tracker import VolumeTracker
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestVolumeTracker(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock(1000.0)
+        self.tracker = VolumeTracker(windows=(60, 3600), num_buckets=60, clock=self.clock)
+
+    def test_sums_within_window(self):
+        self.tracker.record('A-B', 10)
+        self.clock.now += 30
+        self.tracker.record('A-B', 5)
+        self.assertEqual(self.tracker.volume('A-B', 60), 15)
+        self.assertEqual(self.tracker.volume('A-B', 3600), 15)
+        self.assertEqual(self.tracker.volume('C-D', 60), 0)
+
+    def test_restore_state(self):
+        self.tracker.record('A-B', 10)
+        state = self.tracker.get_state('A-B')
+        self.tracker.record('A-B', 5)
+        self.tracker.record('C-D', 5)
+        self.tracker.restore_state('A-B', state)
+        self.tracker.restore_state('C-D', None)
+        self.assertEqual(self.tracker.volume('A-B', 60), 10)
+        self.assertEqual(self.tracker.volume('C-D', 60), 0)
+
+    def test_old_volume_expires(self):
+        self.tracker.record('A-B', 10)
+        self.clock.now += 45
+        self.tracker.record('A-B', 5)
+        self.clock.now += 30
+        self.assertEqual(self.tracker.volume('A-B', 60), 5)
+        self.assertEqual(self.tracker.volume('A-B', 3600), 15)
+        self.clock.now += 3600
+        self.assertEqual(self.tracker.volume('A-B', 60), 0)
+        self.assertEqual(self.tracker.volume('A-B', 3600), 0)
+
+    def test_back_to_back_records_do_not_extrapolate(self):
+        for _ in range(100):
+            self.tracker.record('A-B', 1)
+        self.assertEqual(self.tracker.volume('A-B', 60), 100)
+
+    def test_clock_going_backwards_counts_in_current_bucket(self):
+        self.tracker.record('A-B', 10)
+        self.tracker.record('A-B', 5, timestamp=self.clock.now - 120)
+        self.assertEqual(self.tracker.volume('A-B', 60), 15)
+
+    def test_untracked_window(self):
+        with self.assertRaises(ValueError):
+            self.tracker.volume('A-B', 86400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from src.defi_amm.models.amm import AMM
+from src.defi_amm.storage.wal import (ADD_LIQUIDITY, CREATE_POOL, REMOVE_LIQUIDITY, SWAP, WriteAheadLog,
+                                      WriteAheadLogException, decode_records, encode_record)
+
+
+class TestWriteAheadLog(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.amm = AMM()
+        self.log = self.open_log(self.amm)
+
+    def tearDown(self):
+        self.log.close()
+        self.directory.cleanup()
+
+    def open_log(self, amm, snapshot_interval=1000):
+        log = WriteAheadLog(self.directory.name, snapshot_interval=snapshot_interval, sync=False)
+        log.recover(amm)
+        return log
+
+    def execute(self, operation, token_a, token_b, *amounts):
+        if operation == CREATE_POOL:
+            self.amm.create_pool(token_a, token_b, *amounts)
+        elif operation == ADD_LIQUIDITY:
+            self.amm.add_liquidity(token_a, token_b, *amounts)
+        elif operation == REMOVE_LIQUIDITY:
+            self.amm.remove_liquidity(token_a, token_b, *amounts)
+        else:
+            self.amm.swap(token_a, token_b, *amounts)
+        return self.log.append(operation, token_a, token_b, *amounts)
+
+    def run_workload(self):
+        self.execute(CREATE_POOL, "USDC", "ETH", 2000, 1)
+        self.execute(CREATE_POOL, "DAI", "USDC", 1000, 1000)
+        for i in range(20):
+            self.execute(SWAP, "USDC", "ETH", 10 + i)
+            self.execute(SWAP, "ETH", "USDC", 0.001 * i + 0.001)
+            self.execute(SWAP, "DAI", "USDC", 5)
+        self.execute(ADD_LIQUIDITY, "DAI", "USDC", 100, 100 * self.amm.get_exchange_rate("DAI", "USDC"))
+        self.execute(REMOVE_LIQUIDITY, "USDC", "ETH", 3)
+
+    def restart(self, snapshot_interval=1000):
+        self.log.close()
+        recovered = AMM()
+        self.log = WriteAheadLog(self.directory.name, snapshot_interval=snapshot_interval, sync=False)
+        replayed = self.log.recover(recovered)
+        return recovered, replayed
+
+    def assertSameState(self, recovered):
+        self.assertEqual(set(recovered.pools), set(self.amm.pools))
+        for pool_key, pool in self.amm.pools.items():
+            self.assertEqual(recovered.pools[pool_key].get_pool_state(), pool.get_pool_state())
+        recovered.verify_accumulators()
+
+    def test_record_round_trip(self):
+        first = encode_record(7, SWAP, "ETH", "USDC", (1.5,))
+        data = first + encode_record(8, ADD_LIQUIDITY, "A", "B", (1, 2))
+        records, end = decode_records(data)
+        self.assertEqual(records, [(7, SWAP, "ETH", "USDC", (1.5,)), (8, ADD_LIQUIDITY, "A", "B", (1.0, 2.0))])
+        self.assertEqual(end, len(data))
+        self.assertEqual(decode_records(data[:-1]), (records[:1], len(first)))
+
+    def test_replay_reproduces_state(self):
+        self.run_workload()
+        self.log.flush()
+        recovered, replayed = self.restart()
+        self.assertEqual(replayed, 64)
+        self.assertSameState(recovered)
+
+    def test_recovery_starts_from_latest_snapshot(self):
+        self.run_workload()
+        self.log.checkpoint(self.amm)
+        self.execute(SWAP, "USDC", "ETH", 7)
+        self.log.flush()
+        self.assertEqual(len(os.listdir(self.directory.name)), 2)
+
+        recovered, replayed = self.restart()
+        self.assertEqual(replayed, 1)
+        self.assertSameState(recovered)
+
+        self.amm = recovered
+        self.execute(SWAP, "ETH", "USDC", 0.01)
+        self.log.flush()
+        recovered, replayed = self.restart()
+        self.assertEqual(replayed, 2)
+        self.assertSameState(recovered)
+
+    def test_needs_checkpoint(self):
+        self.log.snapshot_interval = 10
+        self.execute(CREATE_POOL, "USDC", "ETH", 2000, 1)
+        self.assertFalse(self.log.needs_checkpoint)
+        for _ in range(9):
+            self.execute(SWAP, "USDC", "ETH", 1)
+        self.assertTrue(self.log.needs_checkpoint)
+        self.log.checkpoint(self.amm)
+        self.assertFalse(self.log.needs_checkpoint)
+
+    def test_torn_tail_is_discarded(self):
+        self.run_workload()
+        self.log.flush()
+        self.log.close()
+        segment = os.path.join(self.directory.name, os.listdir(self.directory.name)[0])
+        with open(segment, 'ab') as file:
+            file.write(encode_record(65, SWAP, "USDC", "ETH", (1.0,))[:-3])
+
+        recovered, replayed = self.restart()
+        self.assertEqual(replayed, 64)
+        self.assertSameState(recovered)
+        with open(segment, 'rb') as file:
+            self.assertEqual(len(decode_records(file.read())[0]), 64)
+
+    def test_missing_records_are_detected(self):
+        self.execute(CREATE_POOL, "USDC", "ETH", 2000, 1)
+        self.log.flush()
+        with open(os.path.join(self.directory.name, f"wal-{5:020d}.log"), 'wb') as file:
+            file.write(encode_record(5, SWAP, "USDC", "ETH", (1.0,)))
+        with self.assertRaises(WriteAheadLogException):
+            self.restart()
+
+    def test_append_requires_recovery(self):
+        log = WriteAheadLog(self.directory.name, sync=False)
+        with self.assertRaises(WriteAheadLogException):
+            log.append(SWAP, "USDC", "ETH", 1)
+
+    def test_group_commit(self):
+        self.execute(CREATE_POOL, "USDC", "ETH", 2000, 1)
+        writes = []
+        write = self.log._write
+        self.log._write = lambda data: (writes.append(data), write(data))
+        lock = threading.Lock()
+
+        def client():
+            for _ in range(50):
+                with lock:
+                    lsn = self.execute(SWAP, "USDC", "ETH", 1)
+                self.log.wait_durable(lsn)
+
+        threads = [threading.Thread(target=client) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertLessEqual(len(writes), 401)
+        recovered, replayed = self.restart()
+        self.assertEqual(replayed, 401)
+        self.assertSameState(recovered)
+
+
+if __name__ == '__main__':
+    unittest.main()